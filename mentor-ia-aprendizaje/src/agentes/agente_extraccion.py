@@ -909,297 +909,1220 @@ Agente encargado de:
 """
 
 import os
-import glob
-import uuid
-from typing import Dict, List, Any
+import multiprocessing
+import time
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from itertools import chain
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Set, Tuple
 
 from dotenv import load_dotenv
-from qdrant_client.models import PointStruct
-from pypdf import PdfReader
+from qdrant_client.models import (
+    FieldCondition,
+    Filter,
+    FilterSelector,
+    HasIdCondition,
+    MatchAny,
+    MatchValue,
+    PointIdsList,
+    PointStruct,
+    SetPayload,
+    SetPayloadOperation,
+)
 
-from src.embeddings import (
-    VectorConfig,
-    crear_cliente_qdrant,
-    crear_modelo_embeddings,
+from src.cache_disco import CacheDisco
+from src.chunking import chunkear_paginas
+from src.deduplicacion_chunks import DeduplicadorChunks
+from src.embeddings import VectorConfig, asegurar_coleccion, contar_por_valor
+from src.extraccion_pdf import (
+    contar_paginas_pdf,
+    extraer_imagenes_paginas_pdf,
+    extraer_paginas_pdf,
+)
+from src.huellas import generar_id_punto, hash_texto_128
+from src.manifiesto import EntradaManifiesto, ManifiestoIngesta
+from src.pipeline_ingesta import (
+    EstadisticasIngesta,
+    IngestaCancelada,
+    IngestaConfig,
+    ProgresoIngesta,
+    en_segundo_plano,
+    mapa_ordenado,
+)
+from src.planificador_embeddings import PlanificadorEmbeddings
+from src.almacen_textos import AlmacenTextos
+from src.ocr_vision import (  # OCR Vision
+    extraer_textos_contenidos_vision,
+    extraer_textos_imagenes_vision,
+    PreprocesadoOcrConfig,
+)
+from src.recursos import (
+    obtener_almacen_textos,
+    obtener_cache_ocr,
+    obtener_cliente_qdrant,
+    obtener_cliente_vision,
+    obtener_modelo_embeddings,
 )
-from src.ocr_vision import crear_cliente_vision, extraer_texto_imagen_vision  # OCR Vision
 
 load_dotenv()
 
+# Tipos de archivo que sabe ingestar el agente
+EXTENSIONES_SOPORTADAS = {".pdf", ".png", ".jpg", ".jpeg", ".txt", ".md"}
+
+
+def tipo_fuente(ruta: str) -> str:
+    """
+    "pdf", "imagen" o "texto" según la extensión (campo tipo_fuente del payload).
+    """
+    ext = os.path.splitext(ruta)[1].lower()
+    if ext in {".png", ".jpg", ".jpeg"}:
+        return "imagen"
+    if ext in {".txt", ".md"}:
+        return "texto"
+    return "pdf"
+
 
 class AgenteExtraccion:
-    def __init__(self) -> None:
+    def __init__(
+        self,
+        client: Optional[Any] = None,
+        embeddings_model: Optional[Any] = None,
+        vision_client: Optional[Any] = None,
+        manifiesto: Optional[ManifiestoIngesta] = None,
+        ingesta_config: Optional[IngestaConfig] = None,
+        cache_ocr: Optional[CacheDisco] = None,
+        almacen_textos: Optional[AlmacenTextos] = None,
+    ) -> None:
+        """
+        Sin argumentos, usa los clientes reales compartidos del proceso
+        (src.recursos), creados a partir del .env la primera vez. Los
+        parámetros permiten inyectar otros (Qdrant en memoria, modelos
+        falsos en benchmarks, etc.).
+        """
         # 1) Configuración de Qdrant
         self.vector_config = VectorConfig()
-        self.client = crear_cliente_qdrant()
+        self.client = client if client is not None else obtener_cliente_qdrant()
+        # Crea la colección, o le aplica la cuantización de VectorConfig si cambió
+        asegurar_coleccion(self.client, self.vector_config)
 
         # 2) Modelo de embeddings (Gemini)
-        self.embeddings_model = crear_modelo_embeddings()
+        self.embeddings_model = (
+            embeddings_model if embeddings_model is not None else obtener_modelo_embeddings()
+        )
 
         # 3) Cliente de Google Vision para OCR en imágenes
-        self.vision_client = crear_cliente_vision()
+        self.vision_client = (
+            vision_client if vision_client is not None else obtener_cliente_vision()
+        )
+        # Textos OCR ya extraídos, por hash de la imagen (OCR_CACHE_MB=0 la desactiva)
+        self.cache_ocr = cache_ocr if cache_ocr is not None else obtener_cache_ocr()
+        # Reducción / recompresión de las imágenes antes de enviarlas (OCR_PREPROCESAR)
+        self.preprocesado_ocr = PreprocesadoOcrConfig()
+        # Texto de los chunks fuera del payload de Qdrant (ALMACEN_TEXTOS=1; None = en el payload)
+        self.almacen_textos = (
+            almacen_textos if almacen_textos is not None else obtener_almacen_textos()
+        )
+
+        # 4) Manifiesto de ingesta (qué archivos ya están en Qdrant y con qué contenido)
+        self.manifiesto = manifiesto or ManifiestoIngesta(self.vector_config.collection_name)
+
+        # 5) Tamaños de lote y de cola de la ingesta en streaming, y presupuestos por documento
+        self.ingesta_config = ingesta_config or IngestaConfig()
+        self._pool_pdf: Optional[ProcessPoolExecutor] = None
+        self.ultimas_estadisticas = EstadisticasIngesta()
+
+        # 6) Llamadas de embeddings con lote adaptativo y reintentos ante 429 / timeouts
+        self.planificador_embeddings = PlanificadorEmbeddings(
+            self.embeddings_model,
+            lote_inicial=self.ingesta_config.lote_embeddings,
+            lote_max=self.ingesta_config.lote_embeddings_max,
+            latencia_objetivo=self.ingesta_config.latencia_objetivo_embeddings,
+            max_intentos=self.ingesta_config.intentos_embeddings,
+        )
 
     # ---------------------------------------------------------
-    #  UTILIDAD: chunking simple
+    #  UTILIDAD: chunking
     # ---------------------------------------------------------
-    def _chunkear_texto(
+    def _chunkear_paginas(self, paginas: Iterable[Tuple[int, str]]) -> Iterator[Tuple[str, int, int]]:
+        """
+        Divide un documento en chunks de frases completas (ver
+        src/chunking.py), página a página (pares (número, texto)) sin
+        tenerlo entero en memoria.
+
+        Genera (chunk, pagina_inicio, pagina_fin).
+        """
+        return chunkear_paginas(
+            paginas,
+            max_tokens=self.ingesta_config.tokens_por_chunk,
+            overlap_tokens=self.ingesta_config.solapamiento_tokens,
+        )
+
+    # ---------------------------------------------------------
+    #  LECTURA DE FUENTES
+    # ---------------------------------------------------------
+    def _leer_fuente(self, ruta: str) -> Optional[str]:
+        """
+        Lee un archivo de texto (.txt, .md). Los PDFs se leen por páginas
+        (_leer_pdfs_por_paginas) y las imágenes con OCR en paralelo
+        (_leer_imagenes_en_paralelo).
+
+        Devuelve:
+            - el texto leído ("" si el archivo está vacío),
+            - None si hubo un error leyéndolo (se reintentará en la próxima ingesta).
+        """
+        print(f"[INGESTA] Leyendo archivo de texto: {ruta}")
+        try:
+            with open(ruta, 'r', encoding='utf-8') as f:
+                contenido = f.read().strip()
+
+            print(f"[INGESTA]  -> Texto leído: {len(contenido)} caracteres.")
+
+            if not contenido:
+                print(f"[WARN] El archivo de texto {ruta} está vacío.")
+
+            return contenido
+        except Exception as e:
+            print(f"[WARN] Error leyendo archivo de texto {ruta}: {e}")
+            return None
+
+    def _leer_imagenes_en_paralelo(
         self,
-        texto: str,
-        max_chars: int = 900,
-        overlap: int = 150,
-        # max_chunks: int = 200,
-        max_chunks: int = 100, # limitar a 100 chunks por documento
-    ) -> List[str]:
+        rutas: List[str],
+    ) -> Iterator[Tuple[str, Optional[str]]]:
         """
-        Divide un texto largo en chunks de tamaño aproximado max_chars,
-        con solapamiento overlap. Limita a max_chunks por documento.
+        OCR de varias imágenes con Vision: `concurrencia_ocr` peticiones en
+        vuelo como mucho, cada una con hasta `imagenes_por_lote_ocr` imágenes.
+
+        Genera (ruta, texto) en el orden de `rutas`; texto=None si Vision falló.
         """
-        if not texto:
-            return []
+        if not rutas:
+            return
+
+        config = self.ingesta_config
+        print(
+            f"[INGESTA] OCR de {len(rutas)} imágenes "
+            f"({config.concurrencia_ocr} peticiones en vuelo, "
+            f"{config.imagenes_por_lote_ocr} imágenes por petición)..."
+        )
 
-        chunks: List[str] = []
-        inicio = 0
-        longitud = len(texto)
-
-        while inicio < longitud and len(chunks) < max_chunks:
-            fin = min(inicio + max_chars, longitud)
-            trozo = texto[inicio:fin].strip()
-            if trozo:
-                chunks.append(trozo)
-
-            # Avance con solapamiento
-            inicio = fin - overlap
-            if inicio < 0:
-                inicio = 0
-            if inicio >= longitud:
-                break
+        for ruta, texto in extraer_textos_imagenes_vision(
+            rutas,
+            client=self.vision_client,
+            max_concurrencia=config.concurrencia_ocr,
+            imagenes_por_lote=config.imagenes_por_lote_ocr,
+            cache=self.cache_ocr,
+            preprocesado=self.preprocesado_ocr,
+        ):
+            if texto is None:
+                print(f"[WARN] Error usando Vision OCR en {ruta}")
+            else:
+                print(f"[INGESTA]  -> {ruta}: texto OCR extraído: {len(texto)} caracteres.")
+                if not texto:
+                    print(f"[WARN] La imagen {ruta} no produjo texto con Vision.")
+            yield ruta, texto
 
-        if len(chunks) >= max_chunks:
-            print("[WARN] Se alcanzó el máximo de chunks por documento.")
+    def _leer_pdfs_por_paginas(
+        self,
+        rutas: List[str],
+        estadisticas: Optional[EstadisticasIngesta] = None,
+    ) -> Iterator[Tuple[str, Optional[Iterator[Tuple[int, str]]]]]:
+        """
+        Genera (ruta, paginas) por cada PDF, donde `paginas` es un iterador
+        perezoso de (número, texto); paginas=None si no se pudo abrir el PDF.
 
-        return chunks
+        El texto se extrae en un pool de procesos en tareas de
+        `paginas_por_tarea` páginas, con pocas tareas en vuelo: un PDF de
+        miles de páginas no se carga entero en memoria.
+        """
+        config = self.ingesta_config
+        paso = max(1, config.paginas_por_tarea)
 
-    # ---------------------------------------------------------
-    #  LECTURA DE FUENTES (PDFs + IMÁGENES)
-    # ---------------------------------------------------------
-    def _leer_fuentes_desde_carpeta(
+        for ruta in rutas:
+            try:
+                n_paginas = contar_paginas_pdf(ruta)
+            except Exception as e:
+                print(f"[WARN] No se pudo leer el PDF {ruta}: {e}")
+                yield ruta, None
+                continue
+
+            print(f"[INGESTA] Leyendo PDF: {ruta} ({n_paginas} páginas)")
+            rangos = [(ruta, i, i + paso) for i in range(0, n_paginas, paso)]
+
+            if config.procesos_pdf <= 1 or not rangos:
+                yield ruta, self._paginas_pdf(ruta, rangos, None, estadisticas)
+                continue
+
+            futuros = mapa_ordenado(
+                self._obtener_pool_pdf(),
+                extraer_paginas_pdf,
+                rangos,
+                en_vuelo=config.procesos_pdf * 2,
+            )
+            # Empezar ya la extracción, mientras la etapa de chunking termina
+            # el documento anterior
+            primero = next(futuros)
+            yield ruta, self._paginas_pdf(
+                ruta, rangos, chain([primero], futuros), estadisticas
+            )
+
+    def _paginas_pdf(
         self,
-        carpeta: str = "data/ejemplos",
-    ) -> List[Dict[str, Any]]:
+        ruta: str,
+        rangos: List[Tuple[str, int, int]],
+        futuros: Optional[Iterator[Any]],
+        estadisticas: Optional[EstadisticasIngesta] = None,
+    ) -> Iterator[Tuple[int, str]]:
         """
-        Busca PDFs e imágenes en la carpeta y devuelve una lista de:
-        [
-            {
-                "source_path": "ruta/al/archivo",
-                "texto": "contenido textual extraído"
-            },
-            ...
-        ]
+        Páginas (número desde 1, texto) de un PDF, rango a rango. Sin
+        `futuros`, cada rango se extrae aquí mismo al pedirlo. Las páginas
+        sin texto de cada rango pasan por OCR (_ocr_paginas_sin_texto).
         """
-        print(f"[INGESTA] Buscando fuentes en: {carpeta}")
+        if futuros is None:
+            textos_por_rango = (extraer_paginas_pdf(*r) for r in rangos)
+        else:
+            textos_por_rango = (f.result() for f in futuros)
+
+        n_paginas = 0
+        con_texto = False
+        try:
+            for (_, inicio, _), textos in zip(rangos, textos_por_rango):
+                # OCR selectivo: solo las páginas escaneadas del rango, antes
+                # de entregarlas al chunking
+                textos = self._ocr_paginas_sin_texto(ruta, inicio, textos, estadisticas)
+                for numero, texto in enumerate(textos, start=inicio + 1):
+                    n_paginas += 1
+                    con_texto = con_texto or bool(texto.strip())
+                    yield numero, texto
+        except BrokenProcessPool:
+            # Un proceso murió: se crea un pool nuevo en la próxima ingesta
+            self._pool_pdf = None
+            raise
+
+        print(f"[INGESTA]  -> {ruta}: {n_paginas} páginas leídas.")
+        if not con_texto:
+            # PDF sin texto legible ni imágenes con texto
+            print(f"[WARN] PDF sin texto extraíble (ni con pypdf ni con OCR): {ruta}")
+
+    def _ocr_paginas_sin_texto(
+        self,
+        ruta: str,
+        inicio: int,
+        textos: List[str],
+        estadisticas: Optional[EstadisticasIngesta] = None,
+    ) -> List[str]:
+        """
+        Completa los textos de las páginas [inicio, inicio + len(textos)) de
+        un PDF (lo llama _paginas_pdf por cada rango que extrae la ingesta en
+        streaming): las que pypdf deja vacías (escaneadas) se sustituyen por el
+        OCR de sus imágenes, todas las del rango en las mismas peticiones
+        por lotes a Vision. Las páginas con texto no se tocan.
+
+        Si Vision falla en alguna, lanza RuntimeError: el documento queda
+        como fallido y se reintenta en la próxima ingesta (la caché de OCR
+        evita pagar otra vez las páginas que sí salieron).
+        """
+        config = self.ingesta_config
+        vacias = [i for i, texto in enumerate(textos) if not texto.strip()]
+        if not config.ocr_pdf or not vacias:
+            return textos
+
+        indices = [inicio + i for i in vacias]
+        try:
+            if config.procesos_pdf > 1:
+                imagenes_por_pagina = self._obtener_pool_pdf().submit(
+                    extraer_imagenes_paginas_pdf, ruta, indices
+                ).result()
+            else:
+                imagenes_por_pagina = extraer_imagenes_paginas_pdf(ruta, indices)
+        except BrokenProcessPool:
+            self._pool_pdf = None
+            raise
+        except Exception as e:
+            print(f"[WARN] No se pudieron extraer las imágenes de {ruta}: {e}")
+            return textos
+
+        contenidos = [imagen for imagenes in imagenes_por_pagina for imagen in imagenes]
+        if not contenidos:
+            return textos
+
+        ocr = extraer_textos_contenidos_vision(
+            contenidos,
+            client=self.vision_client,
+            max_concurrencia=config.concurrencia_ocr,
+            imagenes_por_lote=config.imagenes_por_lote_ocr,
+            cache=self.cache_ocr,
+            preprocesado=self.preprocesado_ocr,
+        )
 
-        patrones = [
-            os.path.join(carpeta, "*.pdf"),
-            os.path.join(carpeta, "*.png"),
-            os.path.join(carpeta, "*.jpg"),
-            os.path.join(carpeta, "*.jpeg"),
-            os.path.join(carpeta, "*.txt"),
-            os.path.join(carpeta, "*.md"),
-        ]
+        textos = list(textos)
+        pos = 0
+        for i, imagenes in zip(vacias, imagenes_por_pagina):
+            if not imagenes:
+                continue
+            partes = ocr[pos : pos + len(imagenes)]
+            pos += len(imagenes)
+            if any(parte is None for parte in partes):
+                raise RuntimeError(f"Vision OCR falló en la página {inicio + i + 1}")
+            # Varias imágenes en una página (p. ej. un escáner que la parte en
+            # franjas): se unen en el orden en que aparecen
+            textos[i] = "\n".join(parte for parte in partes if parte)
+            if estadisticas is not None:
+                estadisticas.paginas_ocr += 1
+
+        print(
+            f"[INGESTA]  -> {ruta}: OCR de {sum(1 for imgs in imagenes_por_pagina if imgs)} "
+            f"páginas sin texto ({len(contenidos)} imágenes)."
+        )
+        return textos
+
+    def _obtener_pool_pdf(self) -> ProcessPoolExecutor:
+        """
+        Pool de procesos para los PDFs. Se crea en la primera ingesta que lo
+        necesita y se reutiliza después, para no pagar el arranque cada vez.
+        """
+        if self._pool_pdf is None:
+            # "spawn": hacer fork de un proceso con hilos (uvicorn, etapas de la
+            # ingesta) puede dejar locks tomados en el hijo.
+            self._pool_pdf = ProcessPoolExecutor(
+                max_workers=self.ingesta_config.procesos_pdf,
+                mp_context=multiprocessing.get_context("spawn"),
+            )
+        return self._pool_pdf
+
+    def _listar_rutas(self, carpeta: str = "data/ejemplos") -> List[str]:
+        """
+        Busca PDFs, imágenes y archivos de texto en la carpeta.
+
+        La extensión se compara en minúsculas, igual que en la subida,
+        ingestar_archivo y la vigilancia: un archivo que ellos indexan (p. ej.
+        Notas.TXT) tiene que aparecer aquí, o _reconciliar_carpeta lo daría
+        por borrado.
+        """
+        print(f"[INGESTA] Buscando fuentes en: {carpeta}")
 
         rutas: List[str] = []
-        for patron in patrones:
-            rutas.extend(glob.glob(patron))
+        if os.path.isdir(carpeta):
+            with os.scandir(carpeta) as entradas:
+                rutas = sorted(
+                    os.path.join(carpeta, e.name)
+                    for e in entradas
+                    if e.is_file()
+                    and os.path.splitext(e.name)[1].lower() in EXTENSIONES_SOPORTADAS
+                )
 
         print(f"[INGESTA] Archivos encontrados: {rutas}")
+        return rutas
 
-        documentos: List[Dict[str, Any]] = []
+    def _iterar_fuentes(
+        self,
+        rutas: List[str],
+        forzar: bool = False,
+        progreso: Optional[ProgresoIngesta] = None,
+        estadisticas: Optional[EstadisticasIngesta] = None,
+        deduplicador: Optional[DeduplicadorChunks] = None,
+    ) -> Iterator[Dict[str, Any]]:
+        """
+        Etapa de lectura. Genera, de uno en uno:
+            {
+                "source_path": "ruta/al/archivo",
+                "texto": "contenido textual extraído",
+                "entrada_manifiesto": EntradaManifiesto,
+            }
+        Los PDFs llevan "paginas" (iterador perezoso de (número, texto)) en
+        lugar de "texto": se extraen a medida que la etapa de chunking avanza.
+
+        Los archivos que no cambiaron desde la última ingesta (según el
+        manifiesto) se omiten sin leerlos, salvo que forzar=True o que tengan
+        chunks fusionados en los de un archivo que sí cambió (ver
+        _invalidar_fusionadas): esos se vuelven a procesar enteros con él.
+
+        Antes del primer documento, precarga en `deduplicador` las huellas de
+        los chunks de los archivos que no se van a reprocesar: un archivo
+        idéntico a otro ya indexado no vuelve a generar embeddings.
+        """
+        progreso = progreso or ProgresoIngesta()
+        entradas: Dict[str, EntradaManifiesto] = {}
+        con_texto = 0
 
         for ruta in rutas:
+            entrada = self.manifiesto.revisar(ruta, forzar=forzar)
+            if entrada is not None:
+                entradas[ruta] = entrada
+
+        for ruta in self._invalidar_fusionadas(list(entradas)):
+            entrada = self.manifiesto.revisar(ruta)
+            if entrada is not None:
+                entradas[ruta] = entrada
+        sin_cambios = sum(1 for ruta in rutas if ruta not in entradas)
+
+        # Se van a sustituir: ya no están en Qdrant a través de otros archivos
+        self._olvidar_fusiones(list(entradas))
+        if deduplicador is not None and entradas:
+            precargados = self.manifiesto.huellas_chunks(excluir=set(entradas))
+            for huella, punto_id, ruta in precargados:
+                deduplicador.precargar(huella, punto_id, ruta)
+            print(f"[INGESTA] Huellas de chunks ya indexados: {len(precargados)}")
+
+        # Los PDFs se extraen en un pool de procesos, las imágenes con varias
+        # peticiones a Vision en vuelo; los de texto, aquí mismo
+        pdfs: List[str] = []
+        imagenes: List[str] = []
+        textos: List[str] = []
+        for ruta in entradas:
             ext = os.path.splitext(ruta)[1].lower()
-
-            # ---------------- PDF ----------------
             if ext == ".pdf":
-                print(f"[INGESTA] Leyendo PDF: {ruta}")
-                try:
-                    reader = PdfReader(ruta)
-                    paginas_texto: List[str] = []
-                    for page in reader.pages:
-                        texto_pagina = page.extract_text() or ""
-                        paginas_texto.append(texto_pagina)
-
-                    contenido = "\n\n".join(paginas_texto).strip()
-                    print(
-                        f"[INGESTA]  -> Páginas: {len(reader.pages)} | "
-                        f"Texto extraído: {len(contenido)} caracteres."
-                    )
+                pdfs.append(ruta)
+            elif ext in {".png", ".jpg", ".jpeg"}:
+                imagenes.append(ruta)
+            else:
+                textos.append(ruta)
 
-                    if not contenido:
-                        # PDF sin texto legible (ej. escaneado sin OCR interno)
-                        print(
-                            "[WARN] PDF sin texto extraíble por pypdf. "
-                            "Más adelante se podría manejar con Vision (OCR para PDF)."
-                        )
-                        continue
+        lecturas = chain(
+            ((ruta, self._leer_fuente(ruta)) for ruta in textos),
+            self._leer_imagenes_en_paralelo(imagenes),
+        )
 
-                    documentos.append(
-                        {
-                            "source_path": ruta,
-                            "texto": contenido,
-                        }
-                    )
-                except Exception as e:
-                    print(f"[WARN] No se pudo leer el PDF {ruta}: {e}")
+        for ruta, texto in lecturas:
+            if progreso.cancelado():
+                raise IngestaCancelada()
 
-            # --------------- IMÁGENES ---------------
-            elif ext in {".png", ".jpg", ".jpeg"}:
-                print(f"[INGESTA] Leyendo imagen para OCR: {ruta}")
-                try:
-                    texto = extraer_texto_imagen_vision(
-                        ruta_imagen=ruta,
-                        client=self.vision_client,
-                    ).strip()
-
-                    print(
-                        f"[INGESTA]  -> Texto OCR extraído: {len(texto)} caracteres."
-                    )
+            if texto is None:
+                continue
 
-                    if not texto:
-                        print(
-                            f"[WARN] La imagen {ruta} no produjo texto con Vision."
-                        )
-                        continue
+            if texto:
+                con_texto += 1
+            progreso.etapa(ruta, "extraido")
 
-                    documentos.append(
-                        {
-                            "source_path": ruta,
-                            "texto": texto,
-                        }
-                    )
-                except Exception as e:
-                    print(f"[WARN] Error usando Vision OCR en {ruta}: {e}")
+            # También se entregan los archivos sin texto, para registrarlos en
+            # el manifiesto y no volver a pagar OCR / lectura en cada ingesta.
+            yield {
+                "source_path": ruta,
+                "texto": texto,
+                "entrada_manifiesto": entradas[ruta],
+            }
+
+        n_pdfs = 0
+        for ruta, paginas in self._leer_pdfs_por_paginas(pdfs, estadisticas):
+            if progreso.cancelado():
+                raise IngestaCancelada()
+
+            if paginas is None:
+                continue
 
-            # --------------- ARCHIVOS DE TEXTO (.txt, .md) ---------------
-            elif ext in {".txt", ".md"}:
-                print(f"[INGESTA] Leyendo archivo de texto: {ruta}")
-                try:
-                    with open(ruta, 'r', encoding='utf-8') as f:
-                        contenido = f.read().strip()
+            n_pdfs += 1
+            yield {
+                "source_path": ruta,
+                "paginas": paginas,
+                "entrada_manifiesto": entradas[ruta],
+            }
 
-                    print(f"[INGESTA]  -> Texto leído: {len(contenido)} caracteres.")
+        print(f"[INGESTA] Archivos sin cambios (omitidos): {sin_cambios}")
+        print(f"[INGESTA] Total fuentes con texto: {con_texto} (+ {n_pdfs} PDFs)")
 
-                    if not contenido:
-                        print(f"[WARN] El archivo de texto {ruta} está vacío.")
+    # ---------------------------------------------------------
+    #  ETAPAS DE CHUNKING Y EMBEDDINGS
+    # ---------------------------------------------------------
+    def _iterar_chunks(
+        self,
+        documentos: Iterable[Dict[str, Any]],
+        progreso: Optional[ProgresoIngesta] = None,
+        deduplicador: Optional[DeduplicadorChunks] = None,
+        estadisticas: Optional[EstadisticasIngesta] = None,
+    ) -> Iterator[Dict[str, Any]]:
+        """
+        Etapa de chunking. Por cada documento genera un elemento por chunk:
+            {"id": ..., "texto": ..., "payload": {...}}
+        seguido de un marcador
+            {"fin_documento": doc, "chunk_ids": [...]}
+        que indica que ya se emitieron todos sus chunks.
+
+        Con `deduplicador`, los chunks duplicados o casi duplicados de otro ya
+        emitido en esta ingesta, o idénticos a uno ya indexado, se omiten
+        (no se embeben ni se suben). El marcador lleva también las huellas
+        de los chunks emitidos ("huellas"), para el manifiesto.
+
+        Los chunks de PDFs llevan page_start / page_end en el payload. Si un
+        PDF falla a medio leer, su marcador lleva "fallido": True.
+
+        Los documentos se procesan enteros salvo que se configuren
+        presupuestos (max_chunks_documento / max_paginas_documento).
+        """
+        progreso = progreso or ProgresoIngesta()
+        estadisticas = estadisticas or EstadisticasIngesta()
+        max_chunks = self.ingesta_config.max_chunks_documento
+        max_paginas = self.ingesta_config.max_paginas_documento
+
+        for doc in documentos:
+            source_path = doc["source_path"]
+
+            #NUEVO
+            # Determinar tipo de fuente y nombre de archivo para metadatos
+            tipo = tipo_fuente(source_path)
+            nombre_archivo = os.path.basename(source_path)
+            #NUEVO FIN
+
+            print(f"[INGESTA] Chunking del documento: {source_path}")
+            es_pdf = "paginas" in doc
+            recortes: List[str] = []
+
+            def paginas_con_presupuesto() -> Iterator[Tuple[int, str]]:
+                paginas = doc["paginas"] if es_pdf else [(1, doc["texto"])]
+                for n, (numero, texto) in enumerate(paginas):
+                    if es_pdf and max_paginas and n >= max_paginas:
+                        recortes.append(f"{max_paginas} páginas")
+                        return
+                    if es_pdf:
+                        estadisticas.paginas += 1
+                    estadisticas.bytes_texto += len(texto.encode("utf-8"))
+                    yield numero, texto
+
+            trozos = self._chunkear_paginas(paginas_con_presupuesto())
+
+            chunk_ids: List[Any] = []
+            huellas: List[str] = []
+            try:
+                for idx, (chunk_text, page_start, page_end) in enumerate(trozos):
+                    if max_chunks and idx >= max_chunks:
+                        recortes.append(f"{max_chunks} chunks")
+                        break
+
+                    # Id determinista: re-ingestar el mismo chunk sobrescribe el punto
+                    punto_id = generar_id_punto(source_path, idx, chunk_text)
+                    if deduplicador is not None and deduplicador.revisar(
+                        punto_id, chunk_text, source_path
+                    ) is not None:
                         continue
+                    chunk_ids.append(punto_id)
+                    huellas.append(hash_texto_128(chunk_text))
+
+                    # NUEVO PAYLOAD CON TIPO DE FUENTE Y NOMBRE DE ARCHIVO
+                    payload = {
+                        "texto": chunk_text,
+                        "source_path": source_path,
+                        "nombre_archivo": nombre_archivo,
+                        "tipo_fuente": tipo,   # "pdf", "imagen" o "texto"
+                        "chunk_index": idx,
+                    }
+                    if es_pdf:
+                        payload["page_start"] = page_start
+                        payload["page_end"] = page_end
+
+                    yield {"id": punto_id, "texto": chunk_text, "payload": payload}
+            except Exception as e:
+                print(f"[WARN] No se pudo procesar {source_path}: {e}")
+                yield {"fin_documento": doc, "chunk_ids": chunk_ids, "fallido": True}
+                continue
+            finally:
+                trozos.close()
+
+            estadisticas.documentos += 1
+            estadisticas.chunks += len(chunk_ids)
+            estadisticas.bytes_archivos += doc["entrada_manifiesto"].size
+            if recortes:
+                estadisticas.documentos_recortados += 1
+                print(
+                    f"[WARN] {source_path} supera el presupuesto por documento "
+                    f"({recortes[0]}): se ingesta solo hasta ahí."
+                )
 
-                    documentos.append(
-                        {
-                            "source_path": ruta,
-                            "texto": contenido,
-                        }
-                    )
-                except Exception as e:
-                    print(f"[WARN] Error leyendo archivo de texto {ruta}: {e}")
+            print(f"[INGESTA]  -> Chunks generados: {len(chunk_ids)}")
+            if es_pdf:
+                progreso.etapa(source_path, "extraido")
+            progreso.etapa(source_path, "chunkeado")
 
-            # --------------- OTROS ---------------
-            else:
-                print(f"[INGESTA] Tipo de archivo no soportado, se ignora: {ruta}")
+            yield {"fin_documento": doc, "chunk_ids": chunk_ids, "huellas": huellas}
+
+    def _iterar_puntos(
+        self,
+        elementos: Iterable[Dict[str, Any]],
+        progreso: Optional[ProgresoIngesta] = None,
+    ) -> Iterator[Any]:
+        """
+        Etapa de embeddings. Agrupa los chunks (aunque sean de documentos
+        distintos) en lotes del tamaño que marca el planificador de embeddings
+        (se adapta a la latencia y a los límites de la API) y genera un PointStruct por
+        chunk, en el mismo orden. Los marcadores de fin de documento pasan tal cual.
+        """
+        progreso = progreso or ProgresoIngesta()
+        pendientes: List[Dict[str, Any]] = []
+        n_chunks = 0
+
+        for elem in elementos:
+            pendientes.append(elem)
+            if "fin_documento" not in elem:
+                n_chunks += 1
 
-        print(f"[INGESTA] Total fuentes con texto: {len(documentos)}")
-        return documentos
+            if n_chunks >= self.planificador_embeddings.lote:
+                yield from self._embeber_pendientes(pendientes, progreso)
+                pendientes = []
+                n_chunks = 0
+
+        if pendientes:
+            yield from self._embeber_pendientes(pendientes, progreso)
+
+    def _embeber_pendientes(
+        self,
+        pendientes: List[Dict[str, Any]],
+        progreso: ProgresoIngesta,
+    ) -> Iterator[Any]:
+        chunks = [e for e in pendientes if "fin_documento" not in e]
+
+        vectores: List[List[float]] = []
+        if chunks:
+            print(f"[INGESTA]  -> Generando embeddings para {len(chunks)} chunks...")
+            vectores = self.planificador_embeddings.embeber([c["texto"] for c in chunks])
+
+        it_vectores = iter(vectores)
+        for elem in pendientes:
+            if "fin_documento" in elem:
+                if not elem.get("fallido"):
+                    progreso.etapa(elem["fin_documento"]["source_path"], "embebido")
+                yield elem
+            else:
+                yield PointStruct(
+                    id=elem["id"],
+                    vector=next(it_vectores),
+                    payload=elem["payload"],
+                )
 
     # ---------------------------------------------------------
     #  INGESTA PRINCIPAL
     # ---------------------------------------------------------
-    def ingestar_documentos(self, carpeta: str = "data/ejemplos") -> int:
+    def ingestar_documentos(
+        self,
+        carpeta: str = "data/ejemplos",
+        forzar: bool = False,
+        progreso: Optional[ProgresoIngesta] = None,
+    ) -> int:
         """
         Lee PDFs e imágenes de la carpeta, extrae texto (pypdf / Vision),
         chunkéa, genera embeddings y hace upsert en Qdrant.
 
+        Las etapas (lectura → chunking → embeddings → upsert) se encadenan
+        en streaming con colas acotadas y lotes de tamaño fijo, así que la
+        memoria no crece con el tamaño de la carpeta.
+
+        Solo procesa archivos nuevos o modificados según el manifiesto de
+        ingesta; forzar=True reprocesa todo. Antes borra de Qdrant los chunks
+        de los archivos de la carpeta que ya no existen (ver _reconciliar_carpeta).
+
+        `progreso` recibe el avance por archivo y etapa; si pide cancelar, se
+        lanza IngestaCancelada (lo ya subido queda registrado en el manifiesto).
+
         Devuelve:
             número total de chunks insertados.
         """
         print("[INGESTA] Iniciando proceso de ingesta...")
+        rutas = self._listar_rutas(carpeta)
+        fuentes_previas, reingestar = self._reconciliar_carpeta(carpeta, rutas, forzar)
+        rutas.extend(r for r in reingestar if r not in rutas)
+        return self._ingestar_rutas(rutas, forzar, progreso, fuentes_previas)
 
-        documentos = self._leer_fuentes_desde_carpeta(carpeta)
+    def ingestar_archivo(
+        self,
+        ruta: str,
+        forzar: bool = False,
+        progreso: Optional[ProgresoIngesta] = None,
+    ) -> int:
+        """
+        Ingesta un único archivo (por ejemplo, el recién subido) sin recorrer
+        el resto de la carpeta: el coste depende solo del tamaño del archivo.
 
-        if not documentos:
-            print("[INFO] No se encontraron documentos/imagenes con texto para ingestar.")
+        Igual que ingestar_documentos, respeta el manifiesto (si el archivo no
+        cambió no se reprocesa, salvo forzar=True) y sustituye en Qdrant los
+        chunks de su versión anterior.
+
+        Devuelve:
+            número de chunks insertados.
+        """
+        _, ext = os.path.splitext(ruta)
+        if ext.lower() not in EXTENSIONES_SOPORTADAS:
+            raise ValueError(f"Tipo de archivo no soportado: {ruta}")
+        if not os.path.isfile(ruta):
+            raise FileNotFoundError(ruta)
+
+        print(f"[INGESTA] Iniciando ingesta de un archivo: {ruta}")
+        return self._ingestar_rutas([ruta], forzar, progreso)
+
+    def sincronizar_archivos(
+        self,
+        rutas: List[str],
+        progreso: Optional[ProgresoIngesta] = None,
+    ) -> int:
+        """
+        Aplica cambios puntuales de archivos (los que detecta src/vigilancia.py):
+        las rutas que ya no existen se borran de Qdrant y del manifiesto, y las
+        demás se ingestan juntas (solo si cambiaron, según el manifiesto).
+
+        Devuelve:
+            número de chunks insertados.
+        """
+        rutas = sorted(set(rutas))
+        desaparecidas = [r for r in rutas if not os.path.exists(r)]
+        existentes = [
+            r
+            for r in rutas
+            if os.path.isfile(r) and os.path.splitext(r)[1].lower() in EXTENSIONES_SOPORTADAS
+        ]
+
+        if desaparecidas:
+            print(f"[INGESTA] Archivos eliminados: {desaparecidas}")
+            reingestar = self._eliminar_fuentes(desaparecidas)
+            existentes.extend(r for r in reingestar if r not in existentes)
+        if not existentes:
             return 0
 
-        puntos_a_insertar: List[PointStruct] = []
+        print(f"[INGESTA] Iniciando ingesta de archivos modificados: {existentes}")
+        return self._ingestar_rutas(existentes, False, progreso)
+
+    def _ingestar_rutas(
+        self,
+        rutas: List[str],
+        forzar: bool,
+        progreso: Optional[ProgresoIngesta],
+        fuentes_previas: Optional[Set[str]] = None,
+    ) -> int:
+        """
+        `fuentes_previas`: source_path presentes en la colección aunque no
+        estén en el manifiesto (si se recorrió la colección); sus chunks
+        anteriores también se sustituyen.
+        """
+        progreso = progreso or ProgresoIngesta()
+        fuentes_previas = fuentes_previas or set()
+        config = self.ingesta_config
+        self.planificador_embeddings.reiniciar_estadisticas()
+        estadisticas = EstadisticasIngesta()
+        inicio = time.perf_counter()
+        deduplicador = (
+            DeduplicadorChunks(umbral=config.umbral_duplicados)
+            if config.deduplicar
+            else None
+        )
+
+        documentos = en_segundo_plano(
+            self._iterar_fuentes(
+                rutas,
+                forzar=forzar,
+                progreso=progreso,
+                estadisticas=estadisticas,
+                deduplicador=deduplicador,
+            ),
+            config.tam_cola,
+        )
+        puntos = en_segundo_plano(
+            self._iterar_puntos(
+                self._iterar_chunks(documentos, progreso, deduplicador, estadisticas),
+                progreso,
+            ),
+            config.tam_cola,
+        )
+
+        lote: List[PointStruct] = []
+        terminados: List[Dict[str, Any]] = []
         total_chunks = 0
 
-        for doc in documentos:
-            source_path = doc["source_path"]
-            texto = doc["texto"]
+        try:
+            for elem in puntos:
+                if progreso.cancelado():
+                    print("[INGESTA] Ingesta cancelada.")
+                    raise IngestaCancelada()
+
+                if not isinstance(elem, PointStruct):
+                    terminados.append(elem)
+                    continue
+
+                lote.append(elem)
+                if len(lote) >= config.lote_upsert:
+                    total_chunks += self._upsert_lote(lote)
+                    lote = []
+                    # Los documentos cuyo marcador llegó antes de este lote ya están completos
+                    self._cerrar_documentos(terminados, progreso, fuentes_previas)
+                    terminados = []
+
+            if lote:
+                total_chunks += self._upsert_lote(lote)
+            self._cerrar_documentos(terminados, progreso, fuentes_previas)
+        finally:
+            # También si la ingesta se corta: los archivos fusionados en chunks
+            # que no llegaron a registrarse deben reingestarse
+            if deduplicador is not None:
+                self._registrar_fusiones(deduplicador)
+        self.manifiesto.guardar()
+
+        if deduplicador is not None:
+            print(f"[INGESTA] Chunks duplicados: {deduplicador.estadisticas()}")
+
+        estadisticas.segundos = time.perf_counter() - inicio
+        self.ultimas_estadisticas = estadisticas
 
-            #NUEVO
-            # Determinar tipo de fuente y nombre de archivo para metadatos
-            _, ext = os.path.splitext(source_path)
-            ext = ext.lower()
-            if ext in {".png", ".jpg", ".jpeg"}:
-                tipo_fuente = "imagen"
-            elif ext in {".txt", ".md"}:
-                tipo_fuente = "texto"
+        print(f"[OK] Se ingresaron {total_chunks} chunks en Qdrant.")
+        if self.almacen_textos is not None:
+            print(f"[INGESTA] Almacén de textos: {self.almacen_textos.estadisticas()}")
+        print(f"[INGESTA] Estadísticas: {estadisticas.como_dict()}")
+        print(f"[INGESTA] Embeddings: {self.planificador_embeddings.estadisticas()}")
+
+        estadisticas = getattr(self.embeddings_model, "estadisticas", None)
+        if estadisticas is not None:
+            print(f"[INGESTA] Caché de embeddings: {estadisticas()}")
+        if self.cache_ocr is not None:
+            print(f"[INGESTA] Caché de OCR: {self.cache_ocr.estadisticas()}")
+        return total_chunks
+
+    def _registrar_fusiones(self, deduplicador: DeduplicadorChunks) -> None:
+        """
+        Registra en el manifiesto, en la entrada del archivo de cada chunk
+        conservado, los otros archivos cuyos chunks duplicados se omitieron
+        por él (y lo anota en su payload, `fuentes_fusionadas`). Así, cuando
+        ese archivo cambia o se borra, los fusionados se vuelven a ingestar.
+
+        Si el chunk conservado no quedó registrado (su documento falló o la
+        ingesta se cortó antes), los fusionados se invalidan ya.
+
+        En los chunks de ingestas anteriores, las fuentes se añaden a las que
+        ya tenía anotadas el punto.
+        """
+        if not deduplicador.fusiones:
+            return
+
+        registrados: Dict[str, Set[Any]] = {}
+        fusiones: Dict[Any, Set[str]] = {}
+        huerfanas: Set[str] = set()
+        for punto_id, rutas in deduplicador.fusiones.items():
+            ruta = deduplicador.ruta(punto_id)
+            if ruta not in registrados:
+                registrados[ruta] = set(self.manifiesto.chunk_ids(ruta))
+            if punto_id in registrados[ruta]:
+                self.manifiesto.anotar_fusionadas(ruta, rutas)
+                fusiones[punto_id] = set(rutas)
             else:
-                tipo_fuente = "pdf"
+                huerfanas.update(rutas)
+
+        precargados = [p for p in fusiones if deduplicador.es_precargado(p)]
+        for i in range(0, len(precargados), self.ingesta_config.lote_upsert):
+            for punto in self.client.retrieve(
+                collection_name=self.vector_config.collection_name,
+                ids=precargados[i : i + self.ingesta_config.lote_upsert],
+                with_payload=["fuentes_fusionadas"],
+                with_vectors=False,
+            ):
+                anteriores = (punto.payload or {}).get("fuentes_fusionadas") or []
+                fusiones[str(punto.id)].update(anteriores)
+
+        if huerfanas:
+            print(
+                f"[INGESTA] {len(huerfanas)} archivos tenían chunks fusionados en otros "
+                f"que no se subieron; se reingestarán en la próxima ingesta."
+            )
+            for ruta in huerfanas:
+                self.manifiesto.invalidar(ruta)
+        self.manifiesto.guardar()
+
+        operaciones = [
+            SetPayloadOperation(
+                set_payload=SetPayload(
+                    payload={"fuentes_fusionadas": sorted(rutas)},
+                    points=[punto_id],
+                )
+            )
+            for punto_id, rutas in fusiones.items()
+        ]
+        print(f"[INGESTA] Anotando fuentes fusionadas en {len(operaciones)} chunks...")
+        for i in range(0, len(operaciones), self.ingesta_config.lote_upsert):
+            self.client.batch_update_points(
+                collection_name=self.vector_config.collection_name,
+                update_operations=operaciones[i : i + self.ingesta_config.lote_upsert],
+            )
+
+    def _upsert_lote(self, lote: List[PointStruct]) -> int:
+        if self.almacen_textos is not None:
+            # El texto va al almacén local (antes que a Qdrant: ningún punto
+            # queda sin su texto) y sale del payload
+            self.almacen_textos.guardar_varios(
+                (p.id, p.payload["source_path"], p.payload.pop("texto")) for p in lote
+            )
+        print(f"[INGESTA] Enviando {len(lote)} puntos a Qdrant...")
+        self.client.upsert(
+            collection_name=self.vector_config.collection_name,
+            points=lote,
+        )
+        return len(lote)
 
-            nombre_archivo = os.path.basename(source_path)
-            #NUEVO FIN
+    def _cerrar_documentos(
+        self,
+        terminados: List[Dict[str, Any]],
+        progreso: ProgresoIngesta,
+        fuentes_previas: Optional[Set[str]] = None,
+    ) -> None:
+        """
+        Para cada documento ya subido por completo: borra de Qdrant los chunks
+        de su versión anterior y registra la versión nueva en el manifiesto.
 
-            print(f"[INGESTA] Chunking del documento: {source_path}")
-            chunks = self._chunkear_texto(texto)
-            print(f"[INGESTA]  -> Chunks generados: {len(chunks)}")
+        El borrado es por filtro (source_path del documento y id fuera de los
+        nuevos), así que también caen los chunks que el manifiesto no conocía;
+        todos los documentos del lote van en un único delete.
 
-            if not chunks:
+        Si el documento falló a medio leer, se borran los chunks que ya se
+        habían subido (salvo los que siguen siendo de la versión anterior) y
+        no se registra: se reintentará en la próxima ingesta.
+        """
+        if not terminados:
+            return
+
+        fuentes_previas = fuentes_previas or set()
+        ids_obsoletos: List[Any] = []
+        filtros_obsoletos: List[Filter] = []
+        for marcador in terminados:
+            doc = marcador["fin_documento"]
+            source_path = doc["source_path"]
+            nuevos = marcador["chunk_ids"]
+
+            if marcador.get("fallido"):
+                anteriores = set(self.manifiesto.chunk_ids(source_path))
+                ids_obsoletos.extend(i for i in nuevos if i not in anteriores)
                 continue
 
-            # 1) Embeddings de todos los chunks de este documento
-            print("[INGESTA]  -> Generando embeddings para los chunks...")
-            vectores = self.embeddings_model.embed_documents(chunks)
-            print("[INGESTA]  -> Embeddings generados.")
-
-            # 2) Crear puntos para Qdrant
-            for idx, (chunk_text, vector) in enumerate(zip(chunks, vectores)):
-                punto_id = uuid.uuid4().int >> 64  # entero grande casi único
-
-                # ANTERIOR PAYLOAD
-                # payload = {
-                #     "texto": chunk_text,
-                #     "source_path": source_path,
-                #     "chunk_index": idx,
-                # }
-                
-                # NUEVO PAYLOAD CON TIPO DE FUENTE Y NOMBRE DE ARCHIVO
-                payload = {
-                    "texto": chunk_text,
-                    "source_path": source_path,
-                    "nombre_archivo": nombre_archivo,
-                    "tipo_fuente": tipo_fuente,   # "pdf" o "imagen"
-                    "chunk_index": idx,
-                }
-
-
-                puntos_a_insertar.append(
-                    PointStruct(
-                        id=punto_id,
-                        vector=vector,
-                        payload=payload,
+            if self.almacen_textos is not None:
+                self.almacen_textos.conservar_solo(source_path, nuevos)
+
+            # Solo si el archivo pudo tener chunks antes: los nuevos no cuestan un filtro
+            if self.manifiesto.chunk_ids(source_path) or source_path in fuentes_previas:
+                filtros_obsoletos.append(
+                    Filter(
+                        must=[_filtro_fuentes([source_path])],
+                        must_not=[HasIdCondition(has_id=nuevos)] if nuevos else None,
                     )
                 )
+            self.manifiesto.registrar(
+                source_path, doc["entrada_manifiesto"], nuevos, marcador["huellas"]
+            )
+
+        if ids_obsoletos:
+            print(f"[INGESTA] Eliminando {len(ids_obsoletos)} chunks de documentos fallidos...")
+            self.client.delete(
+                collection_name=self.vector_config.collection_name,
+                points_selector=PointIdsList(points=ids_obsoletos),
+            )
+            if self.almacen_textos is not None:
+                self.almacen_textos.borrar(ids_obsoletos)
+        if filtros_obsoletos:
+            print(
+                f"[INGESTA] Eliminando chunks obsoletos de {len(filtros_obsoletos)} "
+                f"documentos actualizados..."
+            )
+            self._borrar_por_filtro(Filter(should=filtros_obsoletos))
+
+        # Guardar tras cada lote: si la ingesta se corta, lo ya subido no se repite
+        self.manifiesto.guardar()
+
+        for marcador in terminados:
+            if not marcador.get("fallido"):
+                progreso.etapa(marcador["fin_documento"]["source_path"], "subido")
 
-            total_chunks += len(chunks)
-            print(f"[INGESTA]  -> Total de chunks acumulados: {total_chunks}")
+    # ---------------------------------------------------------
+    #  SINCRONIZACIÓN DE BORRADOS
+    # ---------------------------------------------------------
+    def tiene_chunks(self, ruta: str) -> bool:
+        """
+        Si el archivo tiene algún chunk en Qdrant (solo lectura).
+        """
+        return bool(
+            self.client.count(
+                collection_name=self.vector_config.collection_name,
+                count_filter=_filtro_fuentes([ruta]),
+                exact=True,
+            ).count
+        )
 
-        if not puntos_a_insertar:
-            print("[INFO] No se generaron puntos para Qdrant.")
-            return 0
+    def eliminar_documento(self, ruta: str, progreso: Optional[ProgresoIngesta] = None) -> int:
+        """
+        Borra de Qdrant todos los chunks de un archivo (un único delete
+        filtrado por source_path) y lo quita del manifiesto. No toca el
+        archivo en disco.
 
-        print(f"[INGESTA] Enviando {len(puntos_a_insertar)} puntos a Qdrant...")
-        self.client.upsert(
+        Los archivos con chunks duplicados fusionados en los suyos se
+        vuelven a ingestar a continuación, para que no pierdan ese contenido.
+
+        Modifica Qdrant y el manifiesto como una ingesta: no se debe llamar
+        a la vez que otra con el mismo agente (en la app, ambas son trabajos
+        de la misma cola).
+
+        Devuelve:
+            número de chunks borrados.
+        """
+        filtro = _filtro_fuentes([ruta])
+        chunks = self.client.count(
+            collection_name=self.vector_config.collection_name,
+            count_filter=filtro,
+            exact=True,
+        ).count
+
+        if chunks:
+            print(f"[INGESTA] Eliminando {chunks} chunks de {ruta} en Qdrant...")
+        reingestar = self._eliminar_fuentes([ruta])
+        if reingestar:
+            self._ingestar_rutas(reingestar, False, progreso)
+        return chunks
+
+    def _reconciliar_carpeta(
+        self,
+        carpeta: str,
+        rutas: List[str],
+        completa: bool = False,
+    ) -> Tuple[Set[str], List[str]]:
+        """
+        Borra de Qdrant (un único delete filtrado por source_path) los chunks
+        de archivos de `carpeta` que ya no existen, y los quita del manifiesto.
+
+        Los archivos desaparecidos salen del manifiesto. Con completa=True, o
+        si el manifiesto está vacío (primera ingesta o manifiesto perdido),
+        también se recorre la colección para encontrar los que el manifiesto
+        no conoce.
+
+        Devuelve:
+            - los source_path de la carpeta encontrados en la colección
+              (vacío si no se recorrió),
+            - los archivos que hay que volver a ingestar porque tenían chunks
+              fusionados en los de los desaparecidos.
+        """
+        carpeta_norm = os.path.normpath(carpeta)
+        actuales = set(rutas)
+
+        def en_carpeta(ruta: str) -> bool:
+            return os.path.dirname(os.path.normpath(ruta)) == carpeta_norm
+
+        conocidas = [r for r in self.manifiesto.rutas() if en_carpeta(r)]
+        fuentes_coleccion: Set[str] = set()
+        if completa or not conocidas:
+            fuentes_coleccion = {f for f in self._fuentes_en_coleccion() if en_carpeta(f)}
+
+        desaparecidas = sorted((set(conocidas) | fuentes_coleccion) - actuales)
+        reingestar: List[str] = []
+        if desaparecidas:
+            print(
+                f"[INGESTA] Eliminando de Qdrant los chunks de {len(desaparecidas)} "
+                f"archivos que ya no están en {carpeta}: {desaparecidas}"
+            )
+            reingestar = self._eliminar_fuentes(desaparecidas)
+
+        return fuentes_coleccion & actuales, reingestar
+
+    def _eliminar_fuentes(self, rutas: List[str]) -> List[str]:
+        """
+        Borra de Qdrant los chunks de `rutas` (un único delete filtrado por
+        source_path) y las quita del manifiesto.
+
+        Devuelve los archivos con chunks fusionados en los borrados, ya
+        invalidados en el manifiesto (ver _invalidar_fusionadas).
+        """
+        self._borrar_por_filtro(_filtro_fuentes(rutas))
+        if self.almacen_textos is not None:
+            self.almacen_textos.borrar_fuentes(rutas)
+        reingestar = self._invalidar_fusionadas(rutas)
+        self._olvidar_fusiones(rutas)
+        for ruta in rutas:
+            self.manifiesto.eliminar(ruta)
+        self.manifiesto.guardar()
+        return reingestar
+
+    def _invalidar_fusionadas(self, rutas: List[str]) -> List[str]:
+        """
+        Los chunks duplicados de otros archivos fusionados en los de `rutas`
+        (y, a su vez, en los de esos) solo están en Qdrant a través de ellos:
+        si `rutas` se borran o se reingestan, esos archivos se invalidan en
+        el manifiesto para que se vuelvan a ingestar enteros.
+
+        Devuelve los que siguen existiendo en disco.
+        """
+        vistas = set(rutas)
+        pendientes = list(rutas)
+        afectadas: List[str] = []
+        while pendientes:
+            for ruta in self.manifiesto.fusionadas(pendientes.pop()):
+                if ruta not in vistas:
+                    vistas.add(ruta)
+                    pendientes.append(ruta)
+                    afectadas.append(ruta)
+
+        if not afectadas:
+            return []
+
+        print(
+            f"[INGESTA] {len(afectadas)} archivos tienen chunks fusionados en los de "
+            f"archivos modificados o borrados; se reingestarán: {afectadas}"
+        )
+        for ruta in afectadas:
+            self.manifiesto.invalidar(ruta)
+        self.manifiesto.guardar()
+        return [r for r in afectadas if os.path.isfile(r)]
+
+    def _olvidar_fusiones(self, rutas: List[str]) -> None:
+        """
+        Quita `rutas` (archivos que se borran o se reingestan) de los
+        fusionados del manifiesto y del payload `fuentes_fusionadas` de los
+        chunks que las nombran: ya no están en Qdrant a través de ellos.
+        """
+        rutas = self.manifiesto.quitar_fusionadas(rutas)
+        if not rutas:
+            return
+
+        quitar = set(rutas)
+        filtro = Filter(
+            must=[FieldCondition(key="fuentes_fusionadas", match=MatchAny(any=rutas))]
+        )
+        operaciones: List[SetPayloadOperation] = []
+        offset = None
+        while True:
+            puntos, offset = self.client.scroll(
+                collection_name=self.vector_config.collection_name,
+                scroll_filter=filtro,
+                limit=self.ingesta_config.lote_upsert,
+                offset=offset,
+                with_payload=["fuentes_fusionadas"],
+                with_vectors=False,
+            )
+            for punto in puntos:
+                anteriores = (punto.payload or {}).get("fuentes_fusionadas") or []
+                operaciones.append(
+                    SetPayloadOperation(
+                        set_payload=SetPayload(
+                            payload={"fuentes_fusionadas": [r for r in anteriores if r not in quitar]},
+                            points=[punto.id],
+                        )
+                    )
+                )
+            if offset is None:
+                break
+
+        for i in range(0, len(operaciones), self.ingesta_config.lote_upsert):
+            self.client.batch_update_points(
+                collection_name=self.vector_config.collection_name,
+                update_operations=operaciones[i : i + self.ingesta_config.lote_upsert],
+            )
+
+    def _fuentes_en_coleccion(self) -> Set[str]:
+        """
+        source_path distintos de la colección (una consulta al índice de payload).
+        """
+        return set(
+            contar_por_valor(self.client, self.vector_config.collection_name, "source_path")
+        )
+
+    def _borrar_por_filtro(self, filtro: Filter) -> None:
+        """
+        Borra los puntos que cumplen `filtro` en un único delete.
+        """
+        self.client.delete(
             collection_name=self.vector_config.collection_name,
-            points=puntos_a_insertar,
+            points_selector=FilterSelector(filter=filtro),
         )
-        print(f"[OK] Se ingresaron {total_chunks} chunks en Qdrant.")
-        return total_chunks
+
+
+def _filtro_fuentes(rutas: List[str]) -> Filter:
+    """
+    Filtro de Qdrant por source_path (uno o varios archivos).
+    """
+    if len(rutas) == 1:
+        condicion = FieldCondition(key="source_path", match=MatchValue(value=rutas[0]))
+    else:
+        condicion = FieldCondition(key="source_path", match=MatchAny(any=list(rutas)))
+    return Filter(must=[condicion])
@@ -7,20 +7,23 @@ Agente encargado de:
 - Si no hay contexto útil en PDFs, hacer fallback al conocimiento general del modelo.
 """
 
+import asyncio
 import os
 import requests
 from datetime import date, timedelta
-from typing import Any, Dict, List, Optional
+from typing import Any, Dict, List, Optional, Tuple
 
 from dotenv import load_dotenv
-from langchain_google_genai import ChatGoogleGenerativeAI
 
-from src.embeddings import (
-    VectorConfig,
-    crear_cliente_qdrant,
-    crear_modelo_embeddings,
+from src.embeddings import VectorConfig
+from src.recursos import (
+    obtener_almacen_textos,
+    obtener_cliente_qdrant,
+    obtener_cliente_qdrant_async,
+    obtener_llm,
+    obtener_modelo_embeddings,
 )
-from src.similitud import buscar_similares
+from src.similitud import buscar_similares, buscar_similares_async
 
 load_dotenv()
 print(f"DEBUG: Current working directory: {os.getcwd()}")
@@ -31,21 +34,18 @@ class AgentePlanRepaso:
     def __init__(self) -> None:
         # 1) Configuración de Qdrant (igual que en AgenteRespuesta)
         self.vector_config = VectorConfig()
-        self.client = crear_cliente_qdrant()
+        self.client = obtener_cliente_qdrant()
+        # 1b) Cliente asíncrono para crear_plan_async (endpoint /plan-repaso)
+        self.client_async = obtener_cliente_qdrant_async()
 
         # 2) Modelo de embeddings (Gemini, mismo que usas para indexar)
-        self.embeddings_model = crear_modelo_embeddings()
+        self.embeddings_model = obtener_modelo_embeddings()
+
+        # 2b) Texto de los chunks fuera de Qdrant (ALMACEN_TEXTOS=1)
+        self.almacen_textos = obtener_almacen_textos()
 
         # 3) Modelo de lenguaje (Gemini flash)
-        api_key = os.getenv("GOOGLE_API_KEY") or os.getenv("GEMINI_API_KEY")
-        if not api_key:
-            raise ValueError("Falta GOOGLE_API_KEY o GEMINI_API_KEY en el archivo .env")
-
-        self.llm = ChatGoogleGenerativeAI(
-            model="gemini-flash-latest",
-            google_api_key=api_key,
-            temperature=0.7,
-        )
+        self.llm = obtener_llm(temperatura=0.7)
 
     # ---------------------------------------------------------
     #  MÉTODO PRIVADO: buscar contexto relevante en Qdrant
@@ -167,8 +167,43 @@ class AgentePlanRepaso:
             collection_name=self.vector_config.collection_name,
             query_vector=query_vector,
             top_k=top_k,
+            almacen_textos=self.almacen_textos,
+            search_params=self.vector_config.parametros_busqueda(),
         )
+        return self._evaluar_contexto(tema, puntos, umbral_score, min_score_para_usar_pdf)
+
+    async def _buscar_contexto_en_pdfs_async(
+        self,
+        tema: str,
+        top_k: int = 5,
+        umbral_score: float = 0.45,
+        min_score_para_usar_pdf: float = 0.60,
+    ) -> Dict[str, Any]:
+        """
+        Como _buscar_contexto_en_pdfs, con embedding y búsqueda asíncronos.
+        """
+        query_vector: List[float] = await self.embeddings_model.aembed_query(tema)
 
+        puntos = await buscar_similares_async(
+            client=self.client_async,
+            collection_name=self.vector_config.collection_name,
+            query_vector=query_vector,
+            top_k=top_k,
+            almacen_textos=self.almacen_textos,
+            search_params=self.vector_config.parametros_busqueda(),
+        )
+        return self._evaluar_contexto(tema, puntos, umbral_score, min_score_para_usar_pdf)
+
+    def _evaluar_contexto(
+        self,
+        tema: str,
+        puntos: List[Any],
+        umbral_score: float,
+        min_score_para_usar_pdf: float,
+    ) -> Dict[str, Any]:
+        """
+        Aplica a los puntos recuperados los criterios de _buscar_contexto_en_pdfs.
+        """
         if not puntos:
             return {
                 "uso_pdf": False,
@@ -303,25 +338,78 @@ class AgentePlanRepaso:
 
         # 1) Intentar recuperar contexto desde PDFs (Qdrant)
         contexto = self._buscar_contexto_en_pdfs(tema)
-        uso_pdf = contexto["uso_pdf"]
-        fragmentos = contexto["fragmentos"]
+        sesiones = self._preparar_sesiones(tema, fecha_inicio, contexto)
 
-        if uso_pdf:
-            origen = "pdf"
-            detalle_origen = (
+        # 2) Generar cada sesión de repaso
+        respuestas = [self.llm.invoke(prompt) for _, _, prompt in sesiones]
+
+        # 3) Preparar respuesta final
+        plan_response = self._componer_plan(tema, fecha_inicio, contexto, sesiones, respuestas)
+
+        # 4) Si se proporcionó email, enviar webhook para automatización
+        if email:
+            self._enviar_webhook(email, plan_response)
+
+        return plan_response
+
+    async def crear_plan_async(
+        self,
+        tema: str,
+        fecha_inicio: Optional[date] = None,
+        email: Optional[str] = None,
+    ) -> Dict[str, Any]:
+        """
+        Como crear_plan, pero sin bloquear el bucle de eventos (endpoint
+        /plan-repaso): búsqueda asíncrona en Qdrant y las cuatro sesiones
+        pedidas al LLM a la vez en lugar de una tras otra.
+        """
+        if fecha_inicio is None:
+            fecha_inicio = date.today()
+
+        contexto = await self._buscar_contexto_en_pdfs_async(tema)
+        sesiones = self._preparar_sesiones(tema, fecha_inicio, contexto)
+        respuestas = await asyncio.gather(
+            *(self.llm.ainvoke(prompt) for _, _, prompt in sesiones)
+        )
+        plan_response = self._componer_plan(tema, fecha_inicio, contexto, sesiones, respuestas)
+
+        if email:
+            # requests es bloqueante: el webhook va a un hilo
+            await asyncio.to_thread(self._enviar_webhook, email, plan_response)
+
+        return plan_response
+
+    def _detalle_origen(self, contexto: Dict[str, Any]) -> Tuple[str, str]:
+        """
+        (origen, detalle_origen) del plan según si se usaron los PDFs.
+        """
+        if contexto["uso_pdf"]:
+            return (
+                "pdf",
                 "El plan se generó utilizando contenido de los PDFs "
-                "indexados en Qdrant relacionados con este tema."
+                "indexados en Qdrant relacionados con este tema.",
             )
-            # Concatenamos algunos fragmentos para el prompt (sin exagerar)
-            contexto_texto = "\n\n".join(fragmentos[:5])
-        else:
-            origen = "modelo"
-            detalle_origen = (
-                "No se encontró contenido relevante sobre este tema en los PDFs "
-                "cargados. El plan se generó con base en el conocimiento general "
-                "del modelo."
-            )
-            contexto_texto = ""
+        return (
+            "modelo",
+            "No se encontró contenido relevante sobre este tema en los PDFs "
+            "cargados. El plan se generó con base en el conocimiento general "
+            "del modelo.",
+        )
+
+    def _preparar_sesiones(
+        self,
+        tema: str,
+        fecha_inicio: date,
+        contexto: Dict[str, Any],
+    ) -> List[Tuple[str, date, str]]:
+        """
+        (tipo, fecha, prompt) de cada sesión de repaso (D+1, D+7, D+14, D+30).
+        """
+        uso_pdf = contexto["uso_pdf"]
+        fragmentos = contexto["fragmentos"]
+
+        # Concatenamos algunos fragmentos para el prompt (sin exagerar)
+        contexto_texto = "\n\n".join(fragmentos[:5]) if uso_pdf else ""
 
         sesiones_config = [
             ("D+1", 1),
@@ -330,9 +418,8 @@ class AgentePlanRepaso:
             ("D+30", 30),
         ]
 
-        sesiones: List[Dict[str, Any]] = []
+        sesiones: List[Tuple[str, date, str]] = []
 
-        # 2) Generar cada sesión de repaso
         for tipo, dias in sesiones_config:
             fecha_sesion = fecha_inicio + timedelta(days=dias)
 
@@ -382,51 +469,59 @@ Actividades:
 - [actividad 3 muy específica]
 """
 
-            respuesta_llm = self.llm.invoke(prompt)
-            descripcion = (
-                respuesta_llm.content
-                if hasattr(respuesta_llm, "content")
-                else str(respuesta_llm)
-            )
+            sesiones.append((tipo, fecha_sesion, prompt))
 
-            sesiones.append(
-                {
-                    "tipo": tipo,
-                    "fecha": fecha_sesion.isoformat(),
-                    "descripcion": descripcion,
-                }
-            )
+        return sesiones
 
-        # 3) Preparar respuesta final
-        plan_response = {
+    def _componer_plan(
+        self,
+        tema: str,
+        fecha_inicio: date,
+        contexto: Dict[str, Any],
+        sesiones: List[Tuple[str, date, str]],
+        respuestas: List[Any],
+    ) -> Dict[str, Any]:
+        origen, detalle_origen = self._detalle_origen(contexto)
+
+        return {
             "tema": tema,
             "fecha_inicio": fecha_inicio.isoformat(),
             "origen": origen,               # "pdf" o "modelo"
             "detalle_origen": detalle_origen,
-            "fuentes": contexto["fuentes"] if uso_pdf else [],  # útil para debug / UI / auditoría
-            "sesiones": sesiones,
+            "fuentes": contexto["fuentes"] if contexto["uso_pdf"] else [],  # útil para debug / UI / auditoría
+            "sesiones": [
+                {
+                    "tipo": tipo,
+                    "fecha": fecha_sesion.isoformat(),
+                    "descripcion": (
+                        respuesta_llm.content
+                        if hasattr(respuesta_llm, "content")
+                        else str(respuesta_llm)
+                    ),
+                }
+                for (tipo, fecha_sesion, _), respuesta_llm in zip(sesiones, respuestas)
+            ],
         }
 
-        # 4) Si se proporcionó email, enviar webhook para automatización
-        if email:
-            webhook_url = os.getenv("MAKE_WEBHOOK_URL")  # URL del webhook de Make.com
-            print(f"DEBUG: MAKE_WEBHOOK_URL = {webhook_url}")  # Debug
-            if webhook_url:
-                try:
-                    webhook_data = {
-                        "email": email,
-                        **plan_response
-                    }
-                    print(f"DEBUG: Enviando webhook a: {webhook_url}")
-                    print(f"DEBUG: Datos del webhook: {webhook_data}")
-                    response = requests.post(webhook_url, json=webhook_data, timeout=5)
-                    print(f"Webhook enviado a Make.com: {response.status_code}")
-                    if response.status_code != 200:
-                        print(f"Respuesta de Make.com: {response.text}")
-                except Exception as e:
-                    print(f"Error enviando webhook: {e}")
-            else:
-                print("MAKE_WEBHOOK_URL no configurada, omitiendo envío de webhook")
-
-        return plan_response
-
+    def _enviar_webhook(self, email: str, plan_response: Dict[str, Any]) -> None:
+        """
+        Envía el plan al webhook de Make.com (MAKE_WEBHOOK_URL) para automatización.
+        """
+        webhook_url = os.getenv("MAKE_WEBHOOK_URL")  # URL del webhook de Make.com
+        print(f"DEBUG: MAKE_WEBHOOK_URL = {webhook_url}")  # Debug
+        if webhook_url:
+            try:
+                webhook_data = {
+                    "email": email,
+                    **plan_response
+                }
+                print(f"DEBUG: Enviando webhook a: {webhook_url}")
+                print(f"DEBUG: Datos del webhook: {webhook_data}")
+                response = requests.post(webhook_url, json=webhook_data, timeout=5)
+                print(f"Webhook enviado a Make.com: {response.status_code}")
+                if response.status_code != 200:
+                    print(f"Respuesta de Make.com: {response.text}")
+            except Exception as e:
+                print(f"Error enviando webhook: {e}")
+        else:
+            print("MAKE_WEBHOOK_URL no configurada, omitiendo envío de webhook")
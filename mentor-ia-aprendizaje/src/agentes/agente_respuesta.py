@@ -10,14 +10,16 @@ import re
 from typing import Any, Dict, List
 
 from dotenv import load_dotenv
-from langchain_google_genai import ChatGoogleGenerativeAI
 
-from src.embeddings import (
-    crear_cliente_qdrant,
-    crear_modelo_embeddings,
-    VectorConfig,
+from src.embeddings import VectorConfig
+from src.recursos import (
+    obtener_almacen_textos,
+    obtener_cliente_qdrant,
+    obtener_cliente_qdrant_async,
+    obtener_llm,
+    obtener_modelo_embeddings,
 )
-from src.similitud import buscar_similares
+from src.similitud import buscar_similares, buscar_similares_async
 
 load_dotenv()
 
@@ -26,21 +28,18 @@ class AgenteRespuesta:
     def __init__(self) -> None:
         # Qdrant
         self.vector_config = VectorConfig()
-        self.client = crear_cliente_qdrant()
+        self.client = obtener_cliente_qdrant()
+        # Cliente asíncrono para responder_async (endpoint /query)
+        self.client_async = obtener_cliente_qdrant_async()
 
         # Embeddings
-        self.embeddings_model = crear_modelo_embeddings()
+        self.embeddings_model = obtener_modelo_embeddings()
+
+        # Texto de los chunks fuera de Qdrant (ALMACEN_TEXTOS=1)
+        self.almacen_textos = obtener_almacen_textos()
 
         # LLM
-        api_key = os.getenv("GOOGLE_API_KEY") or os.getenv("GEMINI_API_KEY")
-        if not api_key:
-            raise ValueError("Falta GOOGLE_API_KEY o GEMINI_API_KEY en el archivo .env")
-
-        self.llm = ChatGoogleGenerativeAI(
-            model="gemini-flash-latest",
-            google_api_key=api_key,
-            temperature=0.25,
-        )
+        self.llm = obtener_llm(temperatura=0.25)
 
     # ---------------------------------------------------------
     #     BÚSQUEDA INTELIGENTE EN PDF (mismo criterio que PlanRepaso)
@@ -60,8 +59,42 @@ class AgenteRespuesta:
             collection_name=self.vector_config.collection_name,
             query_vector=query_vector,
             top_k=top_k,
+            almacen_textos=self.almacen_textos,
+            search_params=self.vector_config.parametros_busqueda(),
+        )
+        return self._evaluar_contexto(pregunta, puntos, umbral_score, min_score_para_usar_pdf)
+
+    async def _buscar_contexto_pdf_async(
+        self,
+        pregunta: str,
+        top_k: int = 5,
+        umbral_score: float = 0.45,
+        min_score_para_usar_pdf: float = 0.60,
+    ) -> Dict[str, Any]:
+
+        query_vector: List[float] = await self.embeddings_model.aembed_query(pregunta)
+
+        puntos = await buscar_similares_async(
+            client=self.client_async,
+            collection_name=self.vector_config.collection_name,
+            query_vector=query_vector,
+            top_k=top_k,
+            almacen_textos=self.almacen_textos,
+            search_params=self.vector_config.parametros_busqueda(),
         )
+        return self._evaluar_contexto(pregunta, puntos, umbral_score, min_score_para_usar_pdf)
 
+    def _evaluar_contexto(
+        self,
+        pregunta: str,
+        puntos: List[Any],
+        umbral_score: float,
+        min_score_para_usar_pdf: float,
+    ) -> Dict[str, Any]:
+        """
+        Decide con los puntos recuperados si la respuesta usa los PDFs
+        (mismo criterio en la búsqueda síncrona y en la asíncrona).
+        """
         if not puntos:
             return {"uso_pdf": False, "fragmentos": [], "fuentes": []}
 
@@ -198,15 +231,31 @@ PREGUNTA:
     # RESPUESTA PRINCIPAL (HÍBRIDA)
     # ---------------------------------------------------------
     def responder(self, pregunta: str) -> Dict[str, Any]:
-
         contexto = self._buscar_contexto_pdf(pregunta)
-        uso_pdf = contexto["uso_pdf"]
+        prompt = self._construir_prompt(pregunta, contexto)
+        return self._componer_respuesta(contexto, self.llm.invoke(prompt))
 
-        if uso_pdf:
+    async def responder_async(self, pregunta: str) -> Dict[str, Any]:
+        """
+        Como responder, pero sin bloquear el bucle de eventos: embedding,
+        búsqueda en Qdrant y llamada al LLM son asíncronos (endpoint /query).
+        """
+        contexto = await self._buscar_contexto_pdf_async(pregunta)
+        prompt = self._construir_prompt(pregunta, contexto)
+        return self._componer_respuesta(contexto, await self.llm.ainvoke(prompt))
+
+    def _construir_prompt(self, pregunta: str, contexto: Dict[str, Any]) -> str:
+        if contexto["uso_pdf"]:
             # Creamos prompt RAG
             contexto_texto = "\n\n".join(contexto["fragmentos"][:5])
-            prompt = self._prompt_con_contexto(pregunta, contexto_texto)
+            return self._prompt_con_contexto(pregunta, contexto_texto)
+        # Prompt sin PDFs
+        return self._prompt_sin_contexto(pregunta)
+
+    def _componer_respuesta(self, contexto: Dict[str, Any], respuesta_llm: Any) -> Dict[str, Any]:
+        uso_pdf = contexto["uso_pdf"]
 
+        if uso_pdf:
             # ANTES
             # origen = "pdf"
             # detalle = "Se usaron fragmentos relevantes de los PDFs indexados en Qdrant."
@@ -217,9 +266,6 @@ PREGUNTA:
 
 
         else:
-            # Prompt sin PDFs
-            prompt = self._prompt_sin_contexto(pregunta)
-
             origen = "modelo"
             detalle = "No se encontró contexto relevante en PDFs. La respuesta proviene del conocimiento general del modelo."
 
@@ -238,9 +284,6 @@ PREGUNTA:
         #     "fuentes": contexto["fuentes"] if uso_pdf else [],
         # }
 
-        respuesta_llm = self.llm.invoke(prompt)
-        
-
         # -> DESDE ACA DEVUELVE EN OTRO FORMATO
         # texto_respuesta = (
         #     respuesta_llm.content
@@ -0,0 +1,191 @@
+"""
+almacen_textos.py
+
+Almacén local (SQLite) del texto de los chunks, comprimido con zstandard
+y direccionado por el id del punto de Qdrant.
+
+Con ALMACEN_TEXTOS=1, la ingesta guarda aquí el texto de cada chunk y el
+payload de Qdrant solo lleva metadatos (source_path, páginas, índice...):
+la colección ocupa bastante menos en RAM y disco, y los scrolls que solo
+miran metadatos no traen el texto por la red. Los agentes piden en bloque
+el texto de los top-k que devuelve la búsqueda (buscar_similares).
+
+Los puntos antiguos que aún llevan "texto" en el payload siguen
+funcionando: solo se consulta el almacén para los que no lo tienen.
+
+Importante: el almacén vive en el disco de la app. Si la app se despliega
+sin disco persistente (p. ej. un contenedor efímero) hay que dejarlo
+desactivado, o los textos se perderían mientras Qdrant conserva los puntos.
+"""
+
+import os
+import sqlite3
+import threading
+from dataclasses import dataclass
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+import zstandard
+
+_ESQUEMA = """
+-- WITHOUT ROWID: las filas viven en el índice del id (no se guarda dos veces)
+CREATE TABLE IF NOT EXISTS textos (
+    id TEXT PRIMARY KEY,
+    source_path TEXT NOT NULL,
+    texto BLOB NOT NULL
+) WITHOUT ROWID;
+CREATE INDEX IF NOT EXISTS textos_source_path ON textos (source_path);
+"""
+
+# SQLite limita el número de parámetros por consulta
+_MAX_PARAMETROS = 500
+
+
+@dataclass
+class AlmacenTextosConfig:
+    # Guardar el texto de los chunks aquí en lugar de en el payload de Qdrant (1/0)
+    activo: bool = os.getenv("ALMACEN_TEXTOS", "0") == "1"
+    ruta: str = os.getenv("ALMACEN_TEXTOS_RUTA", "data/textos_chunks.sqlite3")
+    # Nivel de compresión zstd (1-22)
+    nivel_zstd: int = int(os.getenv("ALMACEN_TEXTOS_NIVEL_ZSTD", "3"))
+
+
+class AlmacenTextos:
+    def __init__(self, ruta: str, nivel_zstd: int = 3) -> None:
+        self.ruta = ruta
+        self.nivel_zstd = nivel_zstd
+
+        carpeta = os.path.dirname(ruta)
+        if carpeta:
+            os.makedirs(carpeta, exist_ok=True)
+
+        self._conn = sqlite3.connect(ruta, check_same_thread=False, timeout=30)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._lock = threading.Lock()
+        # Los (de)compresores de zstandard no se pueden compartir entre hilos
+        self._local = threading.local()
+        with self._lock, self._conn:
+            self._conn.executescript(_ESQUEMA)
+
+    def _compresor(self) -> zstandard.ZstdCompressor:
+        if not hasattr(self._local, "compresor"):
+            self._local.compresor = zstandard.ZstdCompressor(level=self.nivel_zstd)
+        return self._local.compresor
+
+    def _descompresor(self) -> zstandard.ZstdDecompressor:
+        if not hasattr(self._local, "descompresor"):
+            self._local.descompresor = zstandard.ZstdDecompressor()
+        return self._local.descompresor
+
+    # ---------------------------------------------------------
+    #  LECTURA
+    # ---------------------------------------------------------
+    def obtener_varios(self, ids: Iterable[Any]) -> Dict[str, str]:
+        """
+        Devuelve {id: texto} de los ids presentes (una consulta por cada
+        500 ids). Los ids se comparan como texto, igual que los devuelve Qdrant.
+        """
+        ids = list(dict.fromkeys(str(i) for i in ids))
+        filas: List[Tuple[str, bytes]] = []
+        with self._lock:
+            for i in range(0, len(ids), _MAX_PARAMETROS):
+                parte = ids[i : i + _MAX_PARAMETROS]
+                marcas = ",".join("?" * len(parte))
+                filas.extend(
+                    self._conn.execute(
+                        f"SELECT id, texto FROM textos WHERE id IN ({marcas})", parte
+                    ).fetchall()
+                )
+
+        descompresor = self._descompresor()
+        return {i: descompresor.decompress(t).decode("utf-8") for i, t in filas}
+
+    # ---------------------------------------------------------
+    #  ESCRITURA
+    # ---------------------------------------------------------
+    def guardar_varios(self, items: Iterable[Tuple[Any, str, str]]) -> None:
+        """
+        Guarda (id, source_path, texto); sobrescribe los ids que ya existan.
+        """
+        compresor = self._compresor()
+        filas = [
+            (str(i), source_path, compresor.compress(texto.encode("utf-8")))
+            for i, source_path, texto in items
+        ]
+        if not filas:
+            return
+        with self._lock, self._conn:
+            self._conn.executemany(
+                "INSERT OR REPLACE INTO textos (id, source_path, texto) VALUES (?, ?, ?)",
+                filas,
+            )
+
+    def borrar(self, ids: Iterable[Any]) -> None:
+        ids = [str(i) for i in ids]
+        with self._lock, self._conn:
+            self._conn.executemany("DELETE FROM textos WHERE id = ?", [(i,) for i in ids])
+
+    def borrar_fuentes(self, rutas: Iterable[str]) -> None:
+        """
+        Borra los textos de todos los chunks de `rutas`.
+        """
+        with self._lock, self._conn:
+            self._conn.executemany(
+                "DELETE FROM textos WHERE source_path = ?", [(r,) for r in rutas]
+            )
+
+    def conservar_solo(self, source_path: str, ids: Iterable[Any]) -> None:
+        """
+        Borra los textos de `source_path` cuyo id no esté en `ids` (la versión
+        anterior del documento), como el delete filtrado de Qdrant.
+        """
+        conservar = {str(i) for i in ids}
+        with self._lock, self._conn:
+            actuales = self._conn.execute(
+                "SELECT id FROM textos WHERE source_path = ?", (source_path,)
+            ).fetchall()
+            self._conn.executemany(
+                "DELETE FROM textos WHERE id = ?",
+                [(i,) for (i,) in actuales if i not in conservar],
+            )
+
+    # ---------------------------------------------------------
+    #  ESTADÍSTICAS
+    # ---------------------------------------------------------
+    def estadisticas(self) -> Dict[str, int]:
+        with self._lock:
+            entradas, comprimidos = self._conn.execute(
+                "SELECT COUNT(*), COALESCE(SUM(LENGTH(texto)), 0) FROM textos"
+            ).fetchone()
+        return {"entradas": entradas, "bytes_comprimidos": comprimidos}
+
+
+def crear_almacen_textos(
+    config: Optional[AlmacenTextosConfig] = None,
+) -> Optional[AlmacenTextos]:
+    """
+    Almacén de textos según la configuración, o None si está desactivado
+    (ALMACEN_TEXTOS=0, por defecto): el texto va en el payload. El
+    compartido por el proceso se pide a src.recursos.obtener_almacen_textos.
+    """
+    config = config or AlmacenTextosConfig()
+    if not config.activo:
+        return None
+    return AlmacenTextos(config.ruta, config.nivel_zstd)
+
+
+def completar_textos(puntos: List[Any], almacen: Optional[AlmacenTextos]) -> None:
+    """
+    Añade "texto" al payload de los puntos que no lo llevan, con una sola
+    consulta al almacén para todos.
+    """
+    if almacen is None:
+        return
+    sin_texto = [p for p in puntos if p.payload is not None and "texto" not in p.payload]
+    if not sin_texto:
+        return
+    textos = almacen.obtener_varios(p.id for p in sin_texto)
+    for p in sin_texto:
+        texto = textos.get(str(p.id))
+        if texto is not None:
+            p.payload["texto"] = texto
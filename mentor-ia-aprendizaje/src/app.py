@@ -26,9 +26,16 @@ from typing import List  # si no lo tenías ya importado arriba
 
 #from src.agentes.agente_analisis import AgenteAnalisis
 from src.agentes.agente_plan_repaso import AgentePlanRepaso #<- NUEVO
-from src.agentes.agente_extraccion import AgenteExtraccion  # <- NUEVO
+from src.agentes.agente_extraccion import AgenteExtraccion, tipo_fuente  # <- NUEVO
 from src.agentes.agente_respuesta import AgenteRespuesta  # <- NUEVO
-from src.ocr_vision import extraer_texto_imagen_vision # <- NUEVO
+from src.ocr_vision import (  # <- NUEVO
+    PreprocesadoOcrConfig,
+    extraer_texto_imagen_vision,
+)
+from src.recursos import obtener_cache_ocr, obtener_cliente_qdrant_async, obtener_cliente_vision
+from qdrant_client.models import FieldCondition, Filter, MatchValue
+from src.trabajos import GestorTrabajos
+from src.vigilancia import VigilanciaConfig, VigilanteDocumentos
 
 import os #<- NUEVO
 import requests  # Para enviar webhooks
@@ -67,6 +74,57 @@ extraccion_agent = AgenteExtraccion() # <- NUEVO
 respuesta_agent = AgenteRespuesta()  # <- NUEVO
 
 
+def _trabajo_carpeta(parametros, progreso):
+    return extraccion_agent.ingestar_documentos(
+        parametros["carpeta"],
+        forzar=parametros.get("forzar", False),
+        progreso=progreso,
+    )
+
+
+def _trabajo_archivo(parametros, progreso):
+    return extraccion_agent.ingestar_archivo(
+        parametros["ruta"],
+        forzar=parametros.get("forzar", False),
+        progreso=progreso,
+    )
+
+
+def _trabajo_cambios(parametros, progreso):
+    return extraccion_agent.sincronizar_archivos(parametros["rutas"], progreso=progreso)
+
+
+def _trabajo_eliminar(parametros, progreso):
+    return extraccion_agent.eliminar_documento(parametros["ruta"], progreso=progreso)
+
+
+# Ingestas (y borrados) en segundo plano: los endpoints devuelven un id de
+# trabajo al momento. Un único hilo los ejecuta de uno en uno, así que nunca
+# usan a la vez el agente ni el manifiesto.
+gestor_trabajos = GestorTrabajos(
+    {
+        "carpeta": _trabajo_carpeta,
+        "archivo": _trabajo_archivo,
+        "cambios": _trabajo_cambios,
+        "eliminar": _trabajo_eliminar,
+    }
+)
+gestor_trabajos.iniciar()
+
+# Vigilancia de BASE_DOCS_DIR (VIGILANCIA_ACTIVA=1): cada lote de archivos
+# creados, modificados o borrados se encola como un trabajo "cambios"
+vigilancia_config = VigilanciaConfig()
+if vigilancia_config.activa:
+    # Ponerse al día con lo que cambió mientras la app estaba parada
+    gestor_trabajos.crear("carpeta", {"carpeta": str(BASE_DOCS_DIR)})
+    vigilante_documentos = VigilanteDocumentos(
+        str(BASE_DOCS_DIR),
+        lambda rutas: gestor_trabajos.crear("cambios", {"rutas": rutas}),
+        vigilancia_config,
+    )
+    vigilante_documentos.iniciar()
+
+
 class QueryRequest(BaseModel):
     pregunta: str
 
@@ -141,10 +199,11 @@ def health_check():
 
 
 @app.post("/plan-repaso")
-def crear_plan_repaso(request: PlanRepasoRequest):
+async def crear_plan_repaso(request: PlanRepasoRequest):
     # plan = analisis_agent.crear_plan_repaso(request.tema)
     # return plan
-    return plan_agent.crear_plan(request.tema, request.fecha_inicio, request.email) #<- NUEVO
+    # Búsqueda en Qdrant y llamadas a Gemini asíncronas: no ocupan un hilo del pool
+    return await plan_agent.crear_plan_async(request.tema, request.fecha_inicio, request.email)
 
 
 # FUNCIONAL - PERO SE CAMBIO POR UNA SALIDA MAS LIMPIA
@@ -163,12 +222,15 @@ def crear_plan_repaso(request: PlanRepasoRequest):
 
 # NUEVO - RESPUESTA MAS DETALLADA
 @app.post("/query")
-def hacer_pregunta(request: QueryRequest):
+async def hacer_pregunta(request: QueryRequest):
     """
     Endpoint que usa el AgenteRespuesta para hacer RAG sobre los documentos
     previamente ingestados en Qdrant.
+
+    Embedding, búsqueda y respuesta del LLM son asíncronos: mientras se
+    espera a Qdrant o a Gemini, el bucle atiende otras peticiones.
     """
-    resultado = respuesta_agent.responder(request.pregunta)
+    resultado = await respuesta_agent.responder_async(request.pregunta)
 
     return {
         "pregunta": request.pregunta,
@@ -189,14 +251,50 @@ def hacer_pregunta(request: QueryRequest):
 #     return {"chunks_ingresados": cantidad}
 
 # NUEVO - USANDO BASE_DOCS_DIR Para dejarlo explícito y consistente
-@app.post("/ingestar")
-def ingestar_documentos():
+@app.post("/ingestar", status_code=202)
+def ingestar_documentos(forzar: bool = False):
     """
     Endpoint para lanzar la ingesta de documentos en BASE_DOCS_DIR
     hacia la base vectorial en Qdrant.
+
+    La ingesta corre en segundo plano: se devuelve el id del trabajo,
+    consultable en /trabajos/{trabajo_id}.
     """
-    cantidad = extraccion_agent.ingestar_documentos(str(BASE_DOCS_DIR))
-    return {"chunks_ingresados": cantidad}
+    trabajo = gestor_trabajos.crear(
+        "carpeta", {"carpeta": str(BASE_DOCS_DIR), "forzar": forzar}
+    )
+    return {"trabajo_id": trabajo["id"], "estado": trabajo["estado"]}
+
+
+@app.get("/trabajos")
+def listar_trabajos(limite: int = 50):
+    """
+    Últimos trabajos de ingesta con su estado y progreso por etapa.
+    """
+    return gestor_trabajos.listar(limite)
+
+
+@app.get("/trabajos/{trabajo_id}")
+def obtener_trabajo(trabajo_id: str):
+    """
+    Estado de un trabajo de ingesta y progreso por archivo y etapa
+    (extraido, chunkeado, embebido, subido).
+    """
+    trabajo = gestor_trabajos.obtener(trabajo_id)
+    if trabajo is None:
+        raise HTTPException(status_code=404, detail="Trabajo no encontrado")
+    return trabajo
+
+
+@app.post("/trabajos/{trabajo_id}/cancelar")
+def cancelar_trabajo(trabajo_id: str):
+    """
+    Cancela un trabajo pendiente o en curso. Lo ya subido a Qdrant se conserva.
+    """
+    trabajo = gestor_trabajos.cancelar(trabajo_id)
+    if trabajo is None:
+        raise HTTPException(status_code=404, detail="Trabajo no encontrado")
+    return trabajo
 
 
 # ---------------- SUBIR PDF E INGESTAR ----------------
@@ -230,10 +328,11 @@ def ingestar_documentos():
 #     }
 
 # NUEVO - SUBIR DOCUMENTO E INGESTAR USANDO BASE_DOCS_DIR
-@app.post("/upload-document")
+@app.post("/upload-document", status_code=202)
 async def upload_document(file: UploadFile = File(...)):
     """
-    Sube un documento (PDF, TXT, MD, imagen) a BASE_DOCS_DIR y lanza la ingesta sobre esa carpeta.
+    Sube un documento (PDF, TXT, MD, imagen) a BASE_DOCS_DIR y encola la ingesta
+    de ese archivo. Devuelve el id del trabajo (ver /trabajos/{trabajo_id}).
     """
 
     filename = file.filename or ""
@@ -257,12 +356,13 @@ async def upload_document(file: UploadFile = File(...)):
     with dest_path.open("wb") as f:
         f.write(contenido)
 
-    # Lanzar ingesta (escanea toda la carpeta BASE_DOCS_DIR)
-    chunks_ingresados = extraccion_agent.ingestar_documentos(str(upload_dir))
+    # Encolar la ingesta solo del archivo subido (no se reescanea BASE_DOCS_DIR)
+    trabajo = gestor_trabajos.crear("archivo", {"ruta": str(dest_path)})
 
     return {
         "filename": filename,
-        "chunks_ingresados": chunks_ingresados,
+        "trabajo_id": trabajo["id"],
+        "estado": trabajo["estado"],
     }
 
 
@@ -292,7 +392,13 @@ async def ocr_imagen(file: UploadFile = File(...)):
 
     try:
         # 3) Llamamos a Vision usando la ruta temporal
-        texto = extraer_texto_imagen_vision(ruta_imagen=tmp_path)
+        # Con caché: la misma imagen no se vuelve a enviar a Vision
+        texto = extraer_texto_imagen_vision(
+            ruta_imagen=tmp_path,
+            client=obtener_cliente_vision(),
+            cache=obtener_cache_ocr(),
+            preprocesado=PreprocesadoOcrConfig(),
+        )
     finally:
         # 4) Borramos el archivo temporal
         try:
@@ -303,6 +409,37 @@ async def ocr_imagen(file: UploadFile = File(...)):
     return {"texto": texto}
 
 
+# ---------------- ELIMINAR DOCUMENTO ----------------
+@app.delete("/documentos/{nombre}", status_code=202)
+def eliminar_documento(nombre: str):
+    """
+    Elimina un documento de BASE_DOCS_DIR: el archivo al momento, y sus
+    vectores en Qdrant (un único delete filtrado por source_path) y su
+    entrada del manifiesto en un trabajo en segundo plano, en la misma cola
+    que las ingestas (ver /trabajos/{trabajo_id}; chunks_ingresados es el
+    número de chunks borrados).
+    """
+    if not nombre or Path(nombre).name != nombre:
+        raise HTTPException(status_code=400, detail="Nombre de documento no válido")
+
+    ruta = BASE_DOCS_DIR / nombre
+    archivo_eliminado = ruta.is_file()
+    # Primero el archivo, para que una ingesta de la carpeta no lo vuelva a subir
+    if archivo_eliminado:
+        ruta.unlink()
+    elif not extraccion_agent.tiene_chunks(str(ruta)):
+        raise HTTPException(status_code=404, detail="Documento no encontrado")
+
+    trabajo = gestor_trabajos.crear("eliminar", {"ruta": str(ruta)})
+
+    return {
+        "nombre": nombre,
+        "archivo_eliminado": archivo_eliminado,
+        "trabajo_id": trabajo["id"],
+        "estado": trabajo["estado"],
+    }
+
+
 # # === Nuevo: listar documentos indexados ===
 
 # BASE_DOCS_DIR = Path("data/ejemplos")
@@ -340,56 +477,69 @@ async def ocr_imagen(file: UploadFile = File(...)):
 # === Nuevo: listar documentos indexados === Como ya movimos BASE_DOCS_DIR arriba, aquí solo asegúrate de quitar la redeclaración para que no esté dos veces.
 #ya va bien, pero lo alineamos)
 @app.get("/documentos-indexados")
-def documentos_indexados():
+async def documentos_indexados():
     """
     Devuelve la lista de documentos que han sido indexados en Qdrant.
     Consulta la base de datos vectorial para obtener documentos únicos indexados.
+
+    Incluye los documentos cuyos chunks son todos duplicados de los de otro
+    (se fusionaron en ellos al ingestar): tienen 0 chunks propios y
+    `chunks_fusionados` > 0.
     """
     try:
-        from src.embeddings import crear_cliente_qdrant, VectorConfig
-
-        # Conectar a Qdrant
-        client = crear_cliente_qdrant()
-        vector_config = VectorConfig()
-
-        # Hacer scroll para obtener todos los puntos (con límite razonable)
-        # Usamos scroll para obtener información de documentos indexados
-        scroll_result = client.scroll(
-            collection_name=vector_config.collection_name,
-            limit=10000,  # Límite alto para obtener todos
-            with_payload=True,
-            with_vectors=False
+        from src.embeddings import MAX_VALORES_FACETA, VectorConfig
+
+        # Cliente asíncrono compartido: la espera a Qdrant no ocupa un hilo del pool
+        client = obtener_cliente_qdrant_async()
+        coleccion = VectorConfig().collection_name
+
+        async def contar(campo, filtro=None):
+            # Facet sobre el índice de payload: no recorre los puntos
+            respuesta = await client.facet(
+                collection_name=coleccion,
+                key=campo,
+                facet_filter=filtro,
+                limit=MAX_VALORES_FACETA,
+                exact=True,
+            )
+            return {hit.value: hit.count for hit in respuesta.hits}
+
+        # Chunks por documento, y el tipo de cada documento con un facet por
+        # tipo de fuente (solo hay unos pocos: pdf, imagen, texto)
+        chunks_por_fuente = await contar("source_path")
+        fusionados_por_fuente = await contar("fuentes_fusionadas")
+        tipo_por_fuente = {}
+        for tipo in await contar("tipo_fuente"):
+            filtro = Filter(must=[FieldCondition(key="tipo_fuente", match=MatchValue(value=tipo))])
+            for source_path in await contar("source_path", filtro):
+                tipo_por_fuente[source_path] = tipo
+
+        documentos = [
+            {
+                "nombre": os.path.basename(source_path),
+                "ruta": source_path,
+                "tipo": tipo_por_fuente.get(source_path, "desconocido"),
+                "chunks": chunks,
+                "chunks_fusionados": fusionados_por_fuente.get(source_path, 0),
+            }
+            for source_path, chunks in chunks_por_fuente.items()
+        ]
+        documentos.extend(
+            {
+                "nombre": os.path.basename(source_path),
+                "ruta": source_path,
+                "tipo": tipo_fuente(source_path),
+                "chunks": 0,
+                "chunks_fusionados": fusionados,
+            }
+            for source_path, fusionados in fusionados_por_fuente.items()
+            if source_path not in chunks_por_fuente
         )
-
-        # Extraer documentos únicos de los payloads
-        documentos_unicos = {}
-        total_chunks = 0
-
-        for point in scroll_result[0]:  # scroll_result[0] contiene los puntos
-            payload = point.payload or {}
-            source_path = payload.get("source_path", "")
-            nombre_archivo = payload.get("nombre_archivo", "")
-            tipo_fuente = payload.get("tipo_fuente", "desconocido")
-
-            if source_path and nombre_archivo:
-                # Usar source_path como clave única
-                if source_path not in documentos_unicos:
-                    documentos_unicos[source_path] = {
-                        "nombre": nombre_archivo,
-                        "ruta": source_path,
-                        "tipo": tipo_fuente,
-                        "chunks": 0
-                    }
-                documentos_unicos[source_path]["chunks"] += 1
-                total_chunks += 1
-
-        # Convertir a lista y ordenar
-        documentos = list(documentos_unicos.values())
         documentos.sort(key=lambda d: d["nombre"].lower())
 
         return {
             "documentos": documentos,
-            "total_chunks": total_chunks,
+            "total_chunks": sum(chunks_por_fuente.values()),
             "total_documentos": len(documentos)
         }
 
@@ -0,0 +1,139 @@
+"""
+bench_almacen_textos.py
+
+Cuánto ahorra sacar el texto de los chunks del payload de Qdrant
+(ALMACEN_TEXTOS=1) y cuánto cuesta traerlo del almacén local.
+
+Mide, para N chunks:
+- bytes de payload por punto (JSON, lo que Qdrant guarda y envía) con y
+  sin "texto",
+- bytes por chunk en el almacén (zstd) y velocidad de escritura,
+- latencia de traer los textos de un top-k al azar (p50 / p99),
+- bytes que mueve un scroll de toda la colección como el de
+  /documentos-indexados, con el payload entero y solo con los metadatos.
+
+El texto sintético por defecto tiene poco vocabulario y se comprime más
+que uno real; con --texto se puede usar un archivo de texto propio.
+
+Uso:
+    python -m src.benchmarks.bench_almacen_textos --chunks 20000 --top-k 5
+"""
+
+import argparse
+import json
+import os
+import random
+import tempfile
+import time
+from typing import List
+
+from src.almacen_textos import AlmacenTextos
+from src.benchmarks.pdf_sintetico import texto_pagina
+from src.chunking import chunk_text
+from src.huellas import generar_id_punto
+
+_METADATOS = ("source_path", "nombre_archivo", "tipo_fuente")
+
+
+def _chunks(n: int, ruta_texto: str) -> List[str]:
+    if ruta_texto:
+        with open(ruta_texto, encoding="utf-8") as f:
+            chunks = chunk_text(f.read())
+        # Repetir el texto si hace falta para llegar a n
+        return [chunks[i % len(chunks)] for i in range(n)]
+
+    chunks: List[str] = []
+    pagina = 1
+    while len(chunks) < n:
+        chunks.extend(chunk_text(texto_pagina(pagina, 1800)))
+        pagina += 1
+    return chunks[:n]
+
+
+def _percentil(valores: List[float], p: float) -> float:
+    valores = sorted(valores)
+    return valores[min(len(valores) - 1, int(p * len(valores)))]
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Benchmark del almacén de textos de chunks.")
+    parser.add_argument("--chunks", type=int, default=20000)
+    parser.add_argument("--top-k", type=int, default=5)
+    parser.add_argument("--consultas", type=int, default=2000)
+    parser.add_argument("--nivel", type=int, default=3, help="Nivel de compresión zstd.")
+    parser.add_argument("--texto", default="", help="Archivo de texto real a chunkear (opcional).")
+    args = parser.parse_args()
+
+    chunks = _chunks(args.chunks, args.texto)
+    payloads = []
+    for i, texto in enumerate(chunks):
+        source_path = f"data/ejemplos/documento_{i // 200:03d}.pdf"
+        payloads.append(
+            {
+                "id": generar_id_punto(source_path, i % 200, texto),
+                "texto": texto,
+                "source_path": source_path,
+                "nombre_archivo": os.path.basename(source_path),
+                "tipo_fuente": "pdf",
+                "chunk_index": i % 200,
+                "page_start": 1 + (i % 200) // 2,
+                "page_end": 1 + (i % 200) // 2,
+            }
+        )
+
+    def bytes_json(campos) -> int:
+        return sum(
+            len(json.dumps({k: p[k] for k in campos if k in p}, ensure_ascii=False).encode("utf-8"))
+            for p in payloads
+        )
+
+    todos = [k for k in payloads[0] if k != "id"]
+    sin_texto = [k for k in todos if k != "texto"]
+    bytes_texto = sum(len(t.encode("utf-8")) for t in chunks)
+
+    with tempfile.TemporaryDirectory() as carpeta:
+        almacen = AlmacenTextos(os.path.join(carpeta, "textos.sqlite3"), args.nivel)
+
+        inicio = time.perf_counter()
+        for i in range(0, len(payloads), 128):  # como los lotes de upsert
+            almacen.guardar_varios(
+                (p["id"], p["source_path"], p["texto"]) for p in payloads[i : i + 128]
+            )
+        segundos_escritura = time.perf_counter() - inicio
+        comprimidos = almacen.estadisticas()["bytes_comprimidos"]
+        almacen._conn.execute("PRAGMA wal_checkpoint(TRUNCATE)")
+        archivo = sum(
+            os.path.getsize(os.path.join(carpeta, f)) for f in os.listdir(carpeta)
+        )
+
+        rng = random.Random(0)
+        ids = [p["id"] for p in payloads]
+        latencias = []
+        for _ in range(args.consultas):
+            top = rng.sample(ids, args.top_k)
+            inicio = time.perf_counter()
+            textos = almacen.obtener_varios(top)
+            latencias.append(time.perf_counter() - inicio)
+            assert len(textos) == args.top_k
+
+    n = len(payloads)
+    print(f"[BENCH] {n} chunks, {bytes_texto / n:.0f} B de texto por chunk, zstd nivel {args.nivel}")
+    print(f"payload por punto con texto:   {bytes_json(todos) / n:8.0f} B")
+    print(f"payload por punto sin texto:   {bytes_json(sin_texto) / n:8.0f} B")
+    print(
+        f"almacén por chunk:             {comprimidos / n:8.0f} B comprimidos "
+        f"(x{bytes_texto / comprimidos:.1f}), {archivo / n:.0f} B en disco con índices"
+    )
+    print(f"escritura:                     {n / segundos_escritura:8.0f} chunks/s")
+    print(
+        f"textos de un top-{args.top_k}:            "
+        f"p50 {1e6 * _percentil(latencias, 0.5):.0f} µs, p99 {1e6 * _percentil(latencias, 0.99):.0f} µs"
+    )
+    print(
+        f"scroll de /documentos-indexados: {bytes_json(todos) / 1024 / 1024:.1f} MB con el payload "
+        f"entero, {bytes_json(_METADATOS) / 1024 / 1024:.1f} MB solo metadatos"
+    )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,111 @@
+"""
+bench_chunking.py
+
+Micro-benchmark del chunker de src/chunking.py frente a los dos chunkers
+por caracteres que había antes (chunk_text 800/200 y el de AgenteExtraccion
+900/150, reproducidos aquí tal cual).
+
+Para cada uno mide, sobre el mismo texto sintético:
+- MB/s de texto chunkeado,
+- número de chunks,
+- tokens estimados enviados a embeddings (y cuántos sobran respecto al texto),
+- chunks que empiezan o terminan cortando una palabra.
+
+Uso:
+    python -m src.benchmarks.bench_chunking --paginas 500
+"""
+
+import argparse
+import time
+from typing import Callable, List, Tuple
+
+from src.benchmarks.pdf_sintetico import texto_pagina
+from src.chunking import chunk_text, estimar_tokens
+
+
+def _por_caracteres(text: str, chunk_size: int, chunk_overlap: int) -> List[str]:
+    """
+    El chunk_text original: ventanas fijas de caracteres.
+    """
+    chunks: List[str] = []
+    start = 0
+    while start < len(text):
+        chunks.append(text[start : start + chunk_size])
+        start += chunk_size - chunk_overlap
+    return chunks
+
+
+def _por_caracteres_agente(texto: str, max_chars: int = 900, overlap: int = 150) -> List[str]:
+    """
+    El chunker original de AgenteExtraccion: ventanas de caracteres sin espacios en los bordes.
+    """
+    chunks: List[str] = []
+    inicio = 0
+    while inicio < len(texto):
+        fin = min(inicio + max_chars, len(texto))
+        chunk = texto[inicio:fin].strip()
+        if chunk:
+            chunks.append(chunk)
+        if fin >= len(texto):
+            break
+        inicio = fin - overlap
+    return chunks
+
+
+def _cortes_de_palabra(texto: str, chunks: List[str]) -> int:
+    """
+    Chunks cuyo primer o último carácter está en mitad de una palabra del texto.
+    """
+    cortes = 0
+    desde = 0
+    for chunk in chunks:
+        pos = texto.find(chunk[:40], desde)
+        if pos < 0:
+            continue
+        desde = pos
+        fin = pos + len(chunk)
+        empieza_cortado = pos > 0 and texto[pos - 1].isalnum() and texto[pos].isalnum()
+        termina_cortado = fin < len(texto) and texto[fin - 1].isalnum() and texto[fin].isalnum()
+        cortes += empieza_cortado or termina_cortado
+    return cortes
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Benchmark de los chunkers.")
+    parser.add_argument("--paginas", type=int, default=500, help="Páginas de texto sintético.")
+    parser.add_argument("--caracteres", type=int, default=1800, help="Caracteres por página.")
+    parser.add_argument("--repeticiones", type=int, default=3, help="Se toma la mejor.")
+    args = parser.parse_args()
+
+    texto = "\n\n".join(texto_pagina(i, args.caracteres) for i in range(1, args.paginas + 1))
+    mb = len(texto.encode("utf-8")) / (1024 * 1024)
+    tokens_texto = estimar_tokens(texto)
+
+    chunkers: List[Tuple[str, Callable[[str], List[str]]]] = [
+        ("caracteres 800/200", lambda t: _por_caracteres(t, 800, 200)),
+        ("agente 900/150", _por_caracteres_agente),
+        ("frases 256/32 tok", lambda t: chunk_text(t, 256, 32)),
+    ]
+
+    print(f"[BENCH] {args.paginas} páginas, {mb:.1f} MB, {tokens_texto} tokens estimados")
+    print(
+        f"{'chunker':<20} {'MB/s':>7} {'chunks':>7} {'tok/chunk':>9} "
+        f"{'tokens':>9} {'% extra':>8} {'cortes':>7}"
+    )
+    for nombre, chunker in chunkers:
+        mejor = float("inf")
+        for _ in range(args.repeticiones):
+            inicio = time.perf_counter()
+            chunks = chunker(texto)
+            mejor = min(mejor, time.perf_counter() - inicio)
+
+        tokens = sum(estimar_tokens(c) for c in chunks)
+        print(
+            f"{nombre:<20} {mb / mejor:>7.1f} {len(chunks):>7} {tokens / len(chunks):>9.0f} "
+            f"{tokens:>9} {100 * (tokens - tokens_texto) / tokens_texto:>7.1f}% "
+            f"{_cortes_de_palabra(texto, chunks):>7}"
+        )
+
+
+if __name__ == "__main__":
+    main()
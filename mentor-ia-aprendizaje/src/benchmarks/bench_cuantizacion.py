@@ -0,0 +1,197 @@
+"""
+bench_cuantizacion.py
+
+Recall@k y memoria de la cuantización de vectores (QDRANT_CUANTIZACION)
+frente a la búsqueda sin cuantizar, para elegir cuantización, sobremuestreo
+y reevaluación.
+
+Dos modos:
+- por defecto, simulado con numpy (no hace falta servidor): reproduce lo
+  que hace Qdrant (int8 con el rango del cuantil 0.99, o 1 bit por
+  dimensión; se sacan top_k * sobremuestreo candidatos con los vectores
+  cuantizados y, si se reevalúa, se reordenan con los originales),
+- con --url, contra un Qdrant real: crea una colección temporal por
+  configuración con asegurar_coleccion y mide recall y latencia de
+  buscar_similares con VectorConfig.parametros_busqueda().
+
+La referencia es siempre el top-k exacto (producto escalar de los vectores
+normalizados = coseno). Los vectores son sintéticos (vectores_sinteticos.py);
+con --vectores se puede usar un .npy de embeddings reales (N x dimensión). En el modo
+simulado, ms/consulta es el coste en numpy, no el de Qdrant.
+
+Uso:
+    python -m src.benchmarks.bench_cuantizacion --puntos 50000 --top-k 5
+    python -m src.benchmarks.bench_cuantizacion --url http://localhost:6333
+"""
+
+import argparse
+import time
+import uuid
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
+from qdrant_client import QdrantClient
+from qdrant_client.models import PointStruct
+
+from src.benchmarks.vectores_sinteticos import cargar_vectores, recall, top_k, vectores_sinteticos
+from src.embeddings import VectorConfig, asegurar_coleccion
+from src.similitud import buscar_similares
+
+# (cuantización, sobremuestreo, reevaluar)
+_CONFIGURACIONES = [
+    ("ninguna", 1.0, False),
+    ("escalar", 1.0, False),
+    ("escalar", 2.0, True),
+    ("binaria", 1.0, False),
+    ("binaria", 2.0, True),
+    ("binaria", 4.0, True),
+]
+
+
+def _bytes_por_vector(cuantizacion: str, d: int) -> int:
+    # Lo que ocupa en RAM cada vector cuantizado (o el original sin cuantizar)
+    return {"ninguna": 4 * d, "escalar": d + 4, "binaria": (d + 7) // 8}[cuantizacion]
+
+
+# ---------------------------------------------------------
+#  SIMULADO (NUMPY)
+# ---------------------------------------------------------
+def _cuantizar(cuantizacion: str, puntos: np.ndarray, consultas: np.ndarray):
+    if cuantizacion == "escalar":
+        bajo, alto = np.quantile(puntos, [0.005, 0.995])
+        paso = (alto - bajo) / 255
+        q = lambda x: np.clip(np.round((x - bajo) / paso), 0, 255) * paso + bajo  # noqa: E731
+        return q(puntos), q(consultas)
+    if cuantizacion == "binaria":
+        signo = lambda x: np.where(x > 0, 1.0, -1.0).astype(np.float32)  # noqa: E731
+        return signo(puntos), signo(consultas)
+    return puntos, consultas
+
+
+def _simular(
+    puntos: np.ndarray, consultas: np.ndarray, k: int, exactos: np.ndarray
+) -> List[Tuple[str, float, bool, float, float]]:
+    resultados = []
+    for cuantizacion, sobremuestreo, reevaluar in _CONFIGURACIONES:
+        qp, qc = _cuantizar(cuantizacion, puntos, consultas)
+        inicio = time.perf_counter()
+        n_candidatos = max(k, int(round(k * sobremuestreo)))
+        candidatos = top_k(qc @ qp.T, n_candidatos)
+        if reevaluar:
+            originales = np.einsum("qd,qcd->qc", consultas, puntos[candidatos])
+            candidatos = np.take_along_axis(candidatos, top_k(originales, k), axis=1)
+        encontrados = [c[:k].tolist() for c in candidatos]
+        ms = 1000 * (time.perf_counter() - inicio) / len(consultas)
+        resultados.append((cuantizacion, sobremuestreo, reevaluar, recall(encontrados, exactos), ms))
+    return resultados
+
+
+# ---------------------------------------------------------
+#  QDRANT REAL
+# ---------------------------------------------------------
+def _esperar_indexado(client: QdrantClient, coleccion: str, limite_s: float = 600) -> None:
+    inicio = time.perf_counter()
+    while time.perf_counter() - inicio < limite_s:
+        if client.get_collection(coleccion).status.value == "green":
+            return
+        time.sleep(0.5)
+
+
+def _medir_qdrant(
+    args: argparse.Namespace, puntos: np.ndarray, consultas: np.ndarray, exactos: np.ndarray
+) -> List[Tuple[str, float, bool, float, float]]:
+    client = QdrantClient(url=args.url, api_key=args.api_key)
+    ids = [str(uuid.UUID(int=i + 1)) for i in range(len(puntos))]
+    posicion: Dict[str, int] = {i: n for n, i in enumerate(ids)}
+
+    resultados = []
+    colecciones: Dict[str, Optional[str]] = {}
+    try:
+        for cuantizacion, sobremuestreo, reevaluar in _CONFIGURACIONES:
+            config = VectorConfig(
+                collection_name=colecciones.get(cuantizacion) or f"bench_cuant_{uuid.uuid4().hex[:8]}",
+                vector_size=puntos.shape[1],
+                cuantizacion=cuantizacion,
+                vectores_en_disco=cuantizacion != "ninguna",
+                sobremuestreo=sobremuestreo,
+                reevaluar=reevaluar,
+            )
+            if cuantizacion not in colecciones:
+                colecciones[cuantizacion] = config.collection_name
+                asegurar_coleccion(client, config)
+                for i in range(0, len(puntos), 256):
+                    client.upsert(
+                        config.collection_name,
+                        [
+                            PointStruct(id=ids[j], vector=puntos[j].tolist())
+                            for j in range(i, min(i + 256, len(puntos)))
+                        ],
+                    )
+                _esperar_indexado(client, config.collection_name)
+
+            encontrados = []
+            inicio = time.perf_counter()
+            for q in consultas:
+                respuesta = buscar_similares(
+                    client,
+                    config.collection_name,
+                    q.tolist(),
+                    top_k=args.top_k,
+                    search_params=config.parametros_busqueda(),
+                )
+                encontrados.append([posicion[str(p.id)] for p in respuesta])
+            ms = 1000 * (time.perf_counter() - inicio) / len(consultas)
+            resultados.append((cuantizacion, sobremuestreo, reevaluar, recall(encontrados, exactos), ms))
+    finally:
+        for coleccion in colecciones.values():
+            client.delete_collection(coleccion)
+    return resultados
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Recall y memoria de la cuantización de vectores.")
+    parser.add_argument("--puntos", type=int, default=50000)
+    parser.add_argument("--consultas", type=int, default=500)
+    parser.add_argument("--dimension", type=int, default=768)
+    parser.add_argument("--temas", type=int, default=200, help="Grupos de vectores sintéticos.")
+    parser.add_argument("--top-k", type=int, default=5)
+    parser.add_argument("--vectores", default="", help=".npy con embeddings reales (opcional).")
+    parser.add_argument("--url", default="", help="Qdrant real (por defecto, simulado con numpy).")
+    parser.add_argument("--api-key", default=None)
+    args = parser.parse_args()
+
+    if args.vectores:
+        puntos, consultas = cargar_vectores(args.vectores, args.consultas)
+    else:
+        puntos, consultas = vectores_sinteticos(args.puntos, args.consultas, args.dimension, args.temas)
+    exactos = top_k(consultas @ puntos.T, args.top_k)
+    d = puntos.shape[1]
+
+    if args.url:
+        resultados = _medir_qdrant(args, puntos, consultas, exactos)
+    else:
+        resultados = _simular(puntos, consultas, args.top_k, exactos)
+
+    print(
+        f"[BENCH] {len(puntos)} vectores de {d} dims, {len(consultas)} consultas, "
+        f"recall@{args.top_k} frente al top-{args.top_k} exacto "
+        f"({'Qdrant en ' + args.url if args.url else 'simulado con numpy'})"
+    )
+    print(
+        f"{'cuantización':<13} {'sobrem.':>8} {'reevaluar':>9} {'B/vector RAM':>13} "
+        f"{'RAM vs float32':>15} {'recall':>8} {'ms/consulta':>12}"
+    )
+    for cuantizacion, sobremuestreo, reevaluar, valor_recall, ms in resultados:
+        b = _bytes_por_vector(cuantizacion, d)
+        print(
+            f"{cuantizacion:<13} {sobremuestreo:>8.1f} {'sí' if reevaluar else 'no':>9} {b:>13} "
+            f"{f'/{4 * d / b:.1f}':>15} {valor_recall:>8.3f} {ms:>12.2f}"
+        )
+    print(
+        "[BENCH] Con cuantización, los vectores originales pueden ir a disco "
+        "(QDRANT_VECTORES_EN_DISCO=1): solo se leen para reevaluar los candidatos."
+    )
+
+
+if __name__ == "__main__":
+    main()
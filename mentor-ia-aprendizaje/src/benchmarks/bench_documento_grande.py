@@ -0,0 +1,154 @@
+"""
+bench_documento_grande.py
+
+Ingesta de un PDF sintético grande (por defecto hasta 5.000 páginas) con
+AgenteExtraccion, para comprobar que tiempo y memoria crecen de forma
+lineal con el tamaño del documento y que no se pierde ningún chunk.
+
+Se mide el documento a varias escalas (1/8, 1/4, 1/2 y el tamaño completo),
+cada una en un proceso nuevo para medir su pico de memoria (RSS) por separado.
+Los embeddings son falsos y los puntos se descartan en lugar de guardarse
+en Qdrant, para que la memoria medida sea la de la ingesta (lectura,
+chunking y lotes), no la del almacén.
+
+Uso:
+    python -m src.benchmarks.bench_documento_grande --paginas 5000 --procesos 1
+"""
+
+import argparse
+import contextlib
+import io
+import multiprocessing
+import os
+import resource
+import tempfile
+import time
+from concurrent.futures import ProcessPoolExecutor
+from typing import Any, Dict, List
+
+from qdrant_client import QdrantClient
+
+from src.agentes.agente_extraccion import AgenteExtraccion
+from src.benchmarks.embeddings_falsos import EmbeddingsFalsos
+from src.benchmarks.pdf_sintetico import generar_pdf
+from src.benchmarks.vision_falso import ServidorVisionFalso
+from src.manifiesto import ManifiestoIngesta
+from src.pipeline_ingesta import IngestaConfig
+
+
+class _QdrantDescartado:
+    """
+    QdrantClient en memoria que cuenta los puntos recibidos en lugar de
+    guardarlos. Las demás llamadas (colección, índices de payload, facet,
+    count, delete...) van a un cliente en memoria real, que queda vacío:
+    cualquier llamada nueva de AgenteExtraccion funciona sin tocar esto.
+    """
+
+    def __init__(self) -> None:
+        self._client = QdrantClient(":memory:")
+        self.puntos = 0
+
+    def upsert(self, collection_name: str, points: List[Any], **kwargs: Any) -> None:
+        self.puntos += len(points)
+
+    def __getattr__(self, nombre: str) -> Any:
+        return getattr(self._client, nombre)
+
+
+def _pico_rss_mb() -> float:
+    # ru_maxrss está en KB en Linux
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+
+
+def _medir(
+    paginas: int,
+    caracteres: int,
+    procesos: int,
+    verboso: bool,
+) -> Dict[str, float]:
+    """
+    Se ejecuta en un proceso propio: genera el PDF, lo ingesta y devuelve
+    tiempos, estadísticas y el aumento del pico de RSS durante la ingesta.
+    """
+    with tempfile.TemporaryDirectory() as carpeta, ServidorVisionFalso() as servidor:
+        generar_pdf(os.path.join(carpeta, "libro.pdf"), paginas, caracteres)
+
+        salida = contextlib.nullcontext() if verboso else contextlib.redirect_stdout(io.StringIO())
+        qdrant = _QdrantDescartado()
+        with salida:
+            agente = AgenteExtraccion(
+                client=qdrant,
+                embeddings_model=EmbeddingsFalsos(),
+                vision_client=servidor.crear_cliente(),
+                manifiesto=ManifiestoIngesta(
+                    "bench", ruta=os.path.join(carpeta, "manifiesto.json")
+                ),
+                ingesta_config=IngestaConfig(procesos_pdf=procesos),
+            )
+
+        rss_base = _pico_rss_mb()
+        inicio = time.perf_counter()
+        with salida:
+            chunks = agente.ingestar_documentos(carpeta)
+        segundos = time.perf_counter() - inicio
+        rss_pico = _pico_rss_mb()
+
+        if agente._pool_pdf is not None:
+            agente._pool_pdf.shutdown()
+
+    estadisticas = agente.ultimas_estadisticas
+    return {
+        "paginas": estadisticas.paginas,
+        "mb_texto": estadisticas.bytes_texto / (1024 * 1024),
+        "chunks": chunks,
+        "segundos": segundos,
+        "pico_mb": rss_pico - rss_base,
+        "recortados": estadisticas.documentos_recortados,
+        "puntos": qdrant.puntos,
+    }
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Benchmark de ingesta de un PDF grande.")
+    parser.add_argument("--paginas", type=int, default=5000, help="Páginas a la escala mayor.")
+    parser.add_argument("--caracteres", type=int, default=1800, help="Caracteres por página.")
+    parser.add_argument(
+        "--procesos",
+        type=int,
+        default=1,
+        help="Procesos para extraer el PDF (1 = en el propio proceso, así la memoria medida lo incluye).",
+    )
+    parser.add_argument("--escalas", type=int, default=4, help="Número de tamaños (mitad cada vez).")
+    parser.add_argument("--verboso", action="store_true", help="Mostrar el log de la ingesta.")
+    args = parser.parse_args()
+
+    tamanos = sorted({max(1, args.paginas >> i) for i in range(args.escalas)})
+
+    print(
+        f"[BENCH] PDF sintético de {args.caracteres} caracteres por página, "
+        f"{args.procesos} proceso(s) de extracción"
+    )
+    print(
+        f"{'páginas':>8} {'MB texto':>9} {'chunks':>8} {'s':>8} {'pág/s':>8} "
+        f"{'chunks/s':>9} {'+RSS MB':>8} {'ms/pág':>7} {'KB RSS/pág':>11}"
+    )
+
+    # ProcessPoolExecutor y no multiprocessing.Pool: sus procesos no son
+    # daemon, así que la ingesta puede crear su pool de PDFs (--procesos > 1)
+    contexto = multiprocessing.get_context("spawn")
+    for paginas in tamanos:
+        with ProcessPoolExecutor(1, mp_context=contexto) as pool:
+            r = pool.submit(_medir, paginas, args.caracteres, args.procesos, args.verboso).result()
+        print(
+            f"{r['paginas']:>8} {r['mb_texto']:>9.1f} {r['chunks']:>8} "
+            f"{r['segundos']:>8.2f} {r['paginas'] / r['segundos']:>8.0f} "
+            f"{r['chunks'] / r['segundos']:>9.0f} {r['pico_mb']:>8.1f} "
+            f"{1000 * r['segundos'] / r['paginas']:>7.2f} "
+            f"{1024 * r['pico_mb'] / r['paginas']:>11.1f}"
+        )
+        if r["recortados"] or r["puntos"] != r["chunks"]:
+            print(f"[WARN] Documento recortado o puntos perdidos: {r}")
+
+
+if __name__ == "__main__":
+    main()
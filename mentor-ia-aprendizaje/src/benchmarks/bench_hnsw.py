@@ -0,0 +1,232 @@
+"""
+bench_hnsw.py
+
+Recall@k frente a latencia p99 de la búsqueda en Qdrant según los
+parámetros de HNSW de VectorConfig, para ajustarlos al tamaño del corpus:
+
+- m y ef_construct (QDRANT_HNSW_M, QDRANT_HNSW_EF_CONSTRUCT): una colección
+  temporal por combinación, indexada con asegurar_coleccion,
+- hnsw_ef por consulta (QDRANT_HNSW_EF): se barre en cada colección con
+  buscar_similares y VectorConfig.parametros_busqueda().
+
+Necesita un Qdrant real (local por defecto, p. ej.
+`docker run -p 6333:6333 qdrant/qdrant`): el modo en memoria de
+qdrant-client busca siempre por fuerza bruta. Los vectores son sintéticos
+de 768 dimensiones (vectores_sinteticos.py) o un .npy propio (--vectores).
+
+Muestra una tabla (con * en las configuraciones que ninguna otra supera a
+la vez en recall y en p99), un gráfico de texto recall / p99 y, con --csv,
+guarda los resultados para dibujarlos con otra herramienta.
+
+Uso:
+    python -m src.benchmarks.bench_hnsw --puntos 50000 --m 8,16,32 --ef-construct 100,200
+    python -m src.benchmarks.bench_hnsw --ef 16,32,64,128,256 --csv hnsw.csv
+"""
+
+import argparse
+import csv
+import time
+import uuid
+from typing import Dict, List, Tuple
+
+import numpy as np
+from qdrant_client import QdrantClient
+from qdrant_client.models import PointStruct, SearchParams
+
+from src.benchmarks.vectores_sinteticos import cargar_vectores, recall, top_k, vectores_sinteticos
+from src.embeddings import VectorConfig, asegurar_coleccion
+from src.similitud import buscar_similares
+
+_MARCAS = "ABCDEFGHIJKLMNOPQRSTUVWXYZ"
+
+
+def _enteros(texto: str) -> List[int]:
+    return [int(x) for x in texto.split(",") if x.strip()]
+
+
+def _percentil(valores: List[float], p: float) -> float:
+    valores = sorted(valores)
+    return valores[min(len(valores) - 1, int(p * len(valores)))]
+
+
+def _esperar_indexado(client: QdrantClient, coleccion: str, limite_s: float = 1800) -> None:
+    # El optimizador tarda un momento en arrancar tras los upserts (y hasta
+    # entonces la colección sigue en verde)
+    time.sleep(1)
+    inicio = time.perf_counter()
+    while time.perf_counter() - inicio < limite_s:
+        if client.get_collection(coleccion).status.value == "green":
+            return
+        time.sleep(0.5)
+    print(f"[WARN] {coleccion} sigue indexando tras {limite_s:.0f} s; se mide igualmente")
+
+
+def _indexar(client: QdrantClient, config: VectorConfig, puntos: np.ndarray, ids: List[str]) -> float:
+    """
+    Crea la colección, sube los puntos y espera a que el índice esté listo.
+    Devuelve los segundos que tarda.
+    """
+    inicio = time.perf_counter()
+    asegurar_coleccion(client, config)
+    for i in range(0, len(puntos), 256):
+        client.upsert(
+            config.collection_name,
+            [PointStruct(id=ids[j], vector=puntos[j].tolist()) for j in range(i, min(i + 256, len(puntos)))],
+            wait=i + 256 >= len(puntos),  # el último espera a que se apliquen todos
+        )
+    _esperar_indexado(client, config.collection_name)
+    return time.perf_counter() - inicio
+
+
+def _buscar(
+    client: QdrantClient,
+    coleccion: str,
+    consultas: np.ndarray,
+    k: int,
+    parametros: SearchParams,
+    posicion: Dict[str, int],
+) -> Tuple[List[List[int]], List[float]]:
+    encontrados, latencias = [], []
+    buscar_similares(client, coleccion, consultas[0].tolist(), top_k=k, search_params=parametros)
+    for q in consultas:
+        inicio = time.perf_counter()
+        respuesta = buscar_similares(client, coleccion, q.tolist(), top_k=k, search_params=parametros)
+        latencias.append(time.perf_counter() - inicio)
+        encontrados.append([posicion[str(p.id)] for p in respuesta])
+    return encontrados, latencias
+
+
+def _frontera(filas: List[Dict]) -> None:
+    # Marca las filas que ninguna otra supera en recall y en p99 a la vez
+    for fila in filas:
+        fila["frontera"] = not any(
+            o["recall"] >= fila["recall"] and o["p99_ms"] <= fila["p99_ms"]
+            and (o["recall"] > fila["recall"] or o["p99_ms"] < fila["p99_ms"])
+            for o in filas
+        )
+
+
+def _grafico(filas: List[Dict], ancho: int = 64, alto: int = 18) -> None:
+    """
+    Recall (vertical) frente a p99 (horizontal) en texto, una letra por
+    combinación de m / ef_construct.
+    """
+    xs = [f["p99_ms"] for f in filas]
+    ys = [f["recall"] for f in filas]
+    x0, x1 = min(xs), max(xs)
+    y0, y1 = min(ys), max(ys)
+    # Con todos los valores iguales, un margen para no dividir por cero
+    x1 = max(x1, x0 + 0.01)
+    y0 = min(y0, y1 - 0.001)
+    lienzo = [[" "] * ancho for _ in range(alto)]
+    for f in filas:
+        col = round((f["p99_ms"] - x0) / (x1 - x0) * (ancho - 1))
+        fila = alto - 1 - round((f["recall"] - y0) / (y1 - y0) * (alto - 1))
+        lienzo[fila][col] = f["marca"]
+
+    print(f"\nrecall@k (de {y0:.3f} a {y1:.3f}) frente a p99 (de {x0:.2f} a {x1:.2f} ms)")
+    for n, linea in enumerate(lienzo):
+        etiqueta = f"{y1:.3f}" if n == 0 else f"{y0:.3f}" if n == alto - 1 else ""
+        print(f"{etiqueta:>6} |{''.join(linea)}")
+    print(f"{'':>6} +{'-' * ancho}")
+    print(f"{'':>6}  {x0:<10.2f}{'p99 ms':^{ancho - 20}}{x1:>10.2f}")
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Recall / latencia de HNSW en Qdrant.")
+    parser.add_argument("--url", default="http://localhost:6333")
+    parser.add_argument("--api-key", default=None)
+    parser.add_argument("--puntos", type=int, default=50000)
+    parser.add_argument("--consultas", type=int, default=500)
+    parser.add_argument("--dimension", type=int, default=768)
+    parser.add_argument("--vectores", default="", help=".npy con embeddings reales (opcional).")
+    parser.add_argument("--top-k", type=int, default=5)
+    parser.add_argument("--m", default="16,32", help="Valores de m, separados por comas.")
+    parser.add_argument("--ef-construct", default="100,200", help="Valores de ef_construct.")
+    parser.add_argument("--ef", default="16,32,64,128,256", help="Valores de hnsw_ef por consulta.")
+    parser.add_argument("--csv", default="", help="Guardar los resultados en este CSV.")
+    args = parser.parse_args()
+
+    if args.vectores:
+        puntos, consultas = cargar_vectores(args.vectores, args.consultas)
+    else:
+        puntos, consultas = vectores_sinteticos(args.puntos, args.consultas, args.dimension)
+    exactos = top_k(consultas @ puntos.T, args.top_k)
+    ids = [str(uuid.UUID(int=i + 1)) for i in range(len(puntos))]
+    posicion = {i: n for n, i in enumerate(ids)}
+
+    client = QdrantClient(url=args.url, api_key=args.api_key)
+    try:
+        client.get_collections()
+    except Exception as e:
+        raise SystemExit(f"[ERROR] No se puede conectar con Qdrant en {args.url}: {e}")
+
+    print(
+        f"[BENCH] Qdrant en {args.url}: {len(puntos)} vectores de {puntos.shape[1]} dims, "
+        f"{len(consultas)} consultas, recall@{args.top_k}"
+    )
+
+    filas: List[Dict] = []
+    combinaciones = [(m, efc) for m in _enteros(args.m) for efc in _enteros(args.ef_construct)]
+    for marca, (m, efc) in zip(_MARCAS, combinaciones):
+        config = VectorConfig(
+            collection_name=f"bench_hnsw_{uuid.uuid4().hex[:8]}",
+            vector_size=puntos.shape[1],
+            cuantizacion="ninguna",
+            hnsw_m=m,
+            hnsw_ef_construct=efc,
+            umbral_indexado_kb=1,  # indexar con HNSW aunque la colección sea pequeña
+        )
+        try:
+            segundos = _indexar(client, config, puntos, ids)
+            print(f"[BENCH] {marca}: m={m}, ef_construct={efc}, indexado en {segundos:.1f} s")
+
+            # Referencia: búsqueda exacta por fuerza bruta en el servidor
+            if not filas:
+                _, latencias = _buscar(
+                    client, config.collection_name, consultas, args.top_k, SearchParams(exact=True), posicion
+                )
+                print(
+                    f"[BENCH] Búsqueda exacta: p50 {1000 * _percentil(latencias, 0.5):.2f} ms, "
+                    f"p99 {1000 * _percentil(latencias, 0.99):.2f} ms"
+                )
+
+            for ef in _enteros(args.ef):
+                config.hnsw_ef = ef
+                encontrados, latencias = _buscar(
+                    client, config.collection_name, consultas, args.top_k, config.parametros_busqueda(), posicion
+                )
+                filas.append(
+                    {
+                        "marca": marca,
+                        "m": m,
+                        "ef_construct": efc,
+                        "hnsw_ef": ef,
+                        "indexado_s": segundos,
+                        "recall": recall(encontrados, exactos),
+                        "p50_ms": 1000 * _percentil(latencias, 0.5),
+                        "p99_ms": 1000 * _percentil(latencias, 0.99),
+                    }
+                )
+        finally:
+            client.delete_collection(config.collection_name)
+
+    _frontera(filas)
+    print(f"\n{'':>2}{'m':>4} {'ef_constr':>10} {'hnsw_ef':>8} {'recall':>8} {'p50 ms':>8} {'p99 ms':>8}")
+    for f in filas:
+        print(
+            f"{f['marca']}{'*' if f['frontera'] else ' '}{f['m']:>4} {f['ef_construct']:>10} "
+            f"{f['hnsw_ef']:>8} {f['recall']:>8.3f} {f['p50_ms']:>8.2f} {f['p99_ms']:>8.2f}"
+        )
+    _grafico(filas)
+
+    if args.csv:
+        with open(args.csv, "w", newline="", encoding="utf-8") as archivo:
+            escritor = csv.DictWriter(archivo, fieldnames=list(filas[0]))
+            escritor.writeheader()
+            escritor.writerows(filas)
+        print(f"[BENCH] Resultados guardados en {args.csv}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,310 @@
+"""
+bench_ingesta.py
+
+Benchmark de extremo a extremo de la ingesta de AgenteExtraccion sin
+servicios externos, como línea base para comparar cada cambio en la ingesta:
+
+- Qdrant en el propio proceso (QdrantClient(":memory:") o una ruta local),
+- embeddings falsos deterministas (EmbeddingsFalsos),
+- Vision falso por gRPC local (ServidorVisionFalso),
+- un corpus sintético de PDFs de texto, PDFs escaneados, fotos y .txt de
+  tamaño configurable.
+
+Informa archivos/s, chunks/s, pico de RSS y el tiempo de cada etapa. El
+tiempo por etapa es exclusivo: lo que una etapa pasa esperando a otra (por
+ejemplo, el chunking pidiendo páginas a pypdf) se cuenta en la otra, y la
+espera en las colas entre hilos va aparte. Como las etapas van en hilos
+distintos, la suma puede superar el tiempo total.
+
+La ingesta se mide en un proceso nuevo, aparte del que genera el corpus,
+para que el pico de RSS sea solo el suyo. Con --guardar se guarda el resultado en JSON y con
+--comparar se muestra la diferencia con uno guardado antes.
+
+Uso:
+    python -m src.benchmarks.bench_ingesta --pdfs 20 --paginas 50 --imagenes 20 --textos 50
+    python -m src.benchmarks.bench_ingesta --guardar base.json
+    python -m src.benchmarks.bench_ingesta --comparar base.json
+"""
+
+import argparse
+import contextlib
+import io
+import json
+import multiprocessing
+import os
+import resource
+import tempfile
+import threading
+import time
+from collections import defaultdict
+from concurrent.futures import ProcessPoolExecutor
+from functools import wraps
+from typing import Any, Callable, Dict, Iterable, Iterator, Optional
+
+from qdrant_client import QdrantClient
+
+import src.agentes.agente_extraccion as agente_extraccion
+from src.agentes.agente_extraccion import AgenteExtraccion
+from src.benchmarks.embeddings_falsos import EmbeddingsFalsos
+from src.benchmarks.imagenes_sinteticas import foto_apuntes, generar_pdf_escaneado
+from src.benchmarks.pdf_sintetico import generar_pdf, texto_pagina
+from src.benchmarks.vision_falso import ServidorVisionFalso
+from src.cache_disco import CacheDisco
+from src.deduplicacion_chunks import DeduplicadorChunks
+from src.embeddings import VectorConfig
+from src.manifiesto import ManifiestoIngesta
+from src.pipeline_ingesta import IngestaConfig
+
+_ESPERA = "espera en colas"
+
+
+class _Cronometro:
+    """
+    Tiempo exclusivo por etapa: si una etapa llama a otra medida (o consume
+    su iterador), ese tiempo se descuenta de la primera y se cuenta en la otra.
+    """
+
+    def __init__(self) -> None:
+        self.segundos: Dict[str, float] = defaultdict(float)
+        self._lock = threading.Lock()
+        self._local = threading.local()
+
+    @contextlib.contextmanager
+    def medir(self, etapa: str) -> Iterator[None]:
+        pila = getattr(self._local, "pila", None)
+        if pila is None:
+            pila = self._local.pila = []
+        pila.append([etapa, 0.0])  # [etapa, segundos de etapas anidadas]
+        inicio = time.perf_counter()
+        try:
+            yield
+        finally:
+            total = time.perf_counter() - inicio
+            _, anidadas = pila.pop()
+            with self._lock:
+                self.segundos[etapa] += total - anidadas
+            if pila:
+                pila[-1][1] += total
+
+    def iterador(self, etapa: str, iterable: Iterable[Any]) -> Iterator[Any]:
+        it = iter(iterable)
+        while True:
+            with self.medir(etapa):
+                try:
+                    elemento = next(it)
+                except StopIteration:
+                    return
+            yield elemento
+
+    def funcion(self, etapa: str, funcion: Callable[..., Any]) -> Callable[..., Any]:
+        @wraps(funcion)
+        def medida(*args: Any, **kwargs: Any) -> Any:
+            with self.medir(etapa):
+                return funcion(*args, **kwargs)
+
+        return medida
+
+    def generador(self, etapa: str, funcion: Callable[..., Iterable[Any]]) -> Callable[..., Iterator[Any]]:
+        @wraps(funcion)
+        def medido(*args: Any, **kwargs: Any) -> Iterator[Any]:
+            return self.iterador(etapa, funcion(*args, **kwargs))
+
+        return medido
+
+
+def _instrumentar(agente: AgenteExtraccion, cronometro: _Cronometro) -> None:
+    """
+    Envuelve las etapas de la ingesta de `agente` (y las colas entre hilos)
+    con el cronómetro.
+    """
+    c = cronometro
+    agente._iterar_fuentes = c.generador("lectura y manifiesto", agente._iterar_fuentes)
+    agente._leer_imagenes_en_paralelo = c.generador("OCR imágenes", agente._leer_imagenes_en_paralelo)
+    agente._paginas_pdf = c.generador("extracción PDF", agente._paginas_pdf)
+    agente._ocr_paginas_sin_texto = c.funcion("OCR PDF escaneados", agente._ocr_paginas_sin_texto)
+    agente._iterar_chunks = c.generador("chunking", agente._iterar_chunks)
+    agente._iterar_puntos = c.generador("lotes de embeddings", agente._iterar_puntos)
+    planificador = agente.planificador_embeddings
+    planificador.embeber = c.funcion("embeddings", planificador.embeber)
+    for nombre in ("_upsert_lote", "_cerrar_documentos", "_registrar_fusiones", "_reconciliar_carpeta"):
+        setattr(agente, nombre, c.funcion("Qdrant y manifiesto", getattr(agente, nombre)))
+
+    revisar = DeduplicadorChunks.revisar
+    DeduplicadorChunks.revisar = lambda self, *a, **k: c.funcion("deduplicación", revisar)(self, *a, **k)
+
+    en_segundo_plano = agente_extraccion.en_segundo_plano
+    agente_extraccion.en_segundo_plano = lambda iterable, tam_cola: c.iterador(
+        _ESPERA, en_segundo_plano(iterable, tam_cola)
+    )
+
+
+# ---------------------------------------------------------
+#  CORPUS SINTÉTICO
+# ---------------------------------------------------------
+def _crear_corpus(carpeta: str, args: argparse.Namespace) -> Dict[str, float]:
+    for i in range(args.pdfs):
+        generar_pdf(os.path.join(carpeta, f"pdf_{i:04d}.pdf"), args.paginas, args.caracteres, semilla=i)
+    for i in range(args.escaneados):
+        generar_pdf_escaneado(
+            os.path.join(carpeta, f"escaneado_{i:04d}.pdf"), args.paginas_escaneadas, semilla=i
+        )
+    for i in range(args.imagenes):
+        with open(os.path.join(carpeta, f"foto_{i:04d}.jpg"), "wb") as f:
+            f.write(foto_apuntes(i, args.ancho_imagen, args.ancho_imagen * 3 // 4, px_letra=32))
+    for i in range(args.textos):
+        with open(os.path.join(carpeta, f"texto_{i:04d}.txt"), "w", encoding="utf-8") as f:
+            f.write(texto_pagina(i, args.kb_texto * 1024, semilla=10_000 + i))
+
+    nombres = os.listdir(carpeta)
+    return {
+        "archivos": len(nombres),
+        "mb": sum(os.path.getsize(os.path.join(carpeta, n)) for n in nombres) / (1024 * 1024),
+    }
+
+
+# ---------------------------------------------------------
+#  MEDIDA
+# ---------------------------------------------------------
+def _pico_rss_mb() -> float:
+    # ru_maxrss está en KB en Linux
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+
+
+def _medir(carpeta: str, args: argparse.Namespace) -> Dict[str, Any]:
+    """
+    Se ejecuta en un proceso propio: ingesta `carpeta` con los sustitutos
+    locales y devuelve las métricas.
+    """
+    with tempfile.TemporaryDirectory() as trabajo, ServidorVisionFalso(
+        latencia_peticion=args.latencia_vision,
+    ) as servidor:
+        client = QdrantClient(path=args.qdrant_ruta) if args.qdrant_ruta else QdrantClient(":memory:")
+        embeddings = EmbeddingsFalsos(latencia_peticion=args.latencia_embeddings)
+        agente = AgenteExtraccion(
+            client=client,
+            embeddings_model=embeddings,
+            vision_client=servidor.crear_cliente(),
+            manifiesto=ManifiestoIngesta("bench", ruta=os.path.join(trabajo, "manifiesto.json")),
+            ingesta_config=IngestaConfig(procesos_pdf=args.procesos),
+            # Caché de OCR vacía y propia: no se usa ni se ensucia la de data/
+            cache_ocr=CacheDisco(os.path.join(trabajo, "cache_ocr.sqlite3"), 64 * 1024 * 1024),
+        )
+        cronometro = _Cronometro()
+        _instrumentar(agente, cronometro)
+
+        salida = contextlib.nullcontext() if args.verboso else contextlib.redirect_stdout(io.StringIO())
+        rss_base = _pico_rss_mb()
+        inicio = time.perf_counter()
+        with salida:
+            chunks = agente.ingestar_documentos(carpeta)
+        segundos = time.perf_counter() - inicio
+        rss_pico = _pico_rss_mb()
+
+        puntos = client.count(VectorConfig().collection_name, exact=True).count
+        if agente._pool_pdf is not None:
+            agente._pool_pdf.shutdown()
+        peticiones_vision = servidor.peticiones
+
+    estadisticas = agente.ultimas_estadisticas
+    return {
+        "segundos": segundos,
+        "archivos_por_segundo": estadisticas.documentos / segundos,
+        "chunks": chunks,
+        "chunks_por_segundo": chunks / segundos,
+        "puntos_en_qdrant": puntos,
+        "pico_rss_mb": rss_pico,
+        "aumento_rss_mb": rss_pico - rss_base,
+        "peticiones_vision": peticiones_vision,
+        "peticiones_embeddings": embeddings.peticiones,
+        "estadisticas": estadisticas.como_dict(),
+        "etapas": dict(cronometro.segundos),
+    }
+
+
+def _comparar(nombre: str, actual: float, base: Optional[float], mayor_es_mejor: bool) -> str:
+    if not base:
+        return ""
+    cambio = 100 * (actual / base - 1)
+    mejor = cambio > 0 if mayor_es_mejor else cambio < 0
+    return f"  ({cambio:+.1f}% {'mejor' if mejor else 'peor'} que la base)" if abs(cambio) >= 0.05 else ""
+
+
+def _informe(r: Dict[str, Any], base: Optional[Dict[str, Any]]) -> None:
+    b = base or {}
+    print(
+        f"[BENCH] Corpus: {r['corpus']['archivos']} archivos, {r['corpus']['mb']:.1f} MB; "
+        f"{r['estadisticas']['paginas']} páginas ({r['estadisticas']['paginas_ocr']} con OCR)"
+    )
+    filas = [
+        ("segundos", r["segundos"], b.get("segundos"), False, ".2f"),
+        ("archivos/s", r["archivos_por_segundo"], b.get("archivos_por_segundo"), True, ".1f"),
+        ("chunks/s", r["chunks_por_segundo"], b.get("chunks_por_segundo"), True, ".0f"),
+        ("pico RSS (MB)", r["pico_rss_mb"], b.get("pico_rss_mb"), False, ".0f"),
+        ("aumento RSS (MB)", r["aumento_rss_mb"], b.get("aumento_rss_mb"), False, ".0f"),
+    ]
+    for nombre, valor, valor_base, mayor_es_mejor, formato in filas:
+        print(f"{nombre:<22} {valor:>10{formato}}{_comparar(nombre, valor, valor_base, mayor_es_mejor)}")
+    print(
+        f"{'chunks':<22} {r['chunks']:>10} (en Qdrant: {r['puntos_en_qdrant']}; "
+        f"peticiones Vision {r['peticiones_vision']}, embeddings {r['peticiones_embeddings']})"
+    )
+
+    print(f"\n{'etapa':<22} {'s':>10} {'% del total':>12}")
+    etapas_base = b.get("etapas", {})
+    for etapa, segundos in sorted(r["etapas"].items(), key=lambda e: -e[1]):
+        print(
+            f"{etapa:<22} {segundos:>10.2f} {100 * segundos / r['segundos']:>11.0f}%"
+            f"{_comparar(etapa, segundos, etapas_base.get(etapa), False)}"
+        )
+
+    if r["puntos_en_qdrant"] != r["chunks"]:
+        print(f"[WARN] Puntos en Qdrant ({r['puntos_en_qdrant']}) distintos de los chunks ({r['chunks']})")
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Benchmark de extremo a extremo de la ingesta, sin red.")
+    parser.add_argument("--pdfs", type=int, default=20, help="PDFs de texto.")
+    parser.add_argument("--paginas", type=int, default=50, help="Páginas por PDF de texto.")
+    parser.add_argument("--caracteres", type=int, default=1800, help="Caracteres por página.")
+    parser.add_argument("--escaneados", type=int, default=2, help="PDFs escaneados (sin texto).")
+    parser.add_argument("--paginas-escaneadas", type=int, default=10)
+    parser.add_argument("--imagenes", type=int, default=20, help="Fotos JPEG.")
+    parser.add_argument("--ancho-imagen", type=int, default=1600, help="Ancho de las fotos (px).")
+    parser.add_argument("--textos", type=int, default=50, help="Archivos .txt.")
+    parser.add_argument("--kb-texto", type=int, default=20, help="Tamaño de cada .txt (KB).")
+    parser.add_argument("--procesos", type=int, default=1, help="Procesos para extraer PDFs.")
+    parser.add_argument("--latencia-vision", type=float, default=0.05, help="Por petición (s).")
+    parser.add_argument("--latencia-embeddings", type=float, default=0.0, help="Por petición (s).")
+    parser.add_argument("--qdrant-ruta", default="", help="Qdrant local en disco (por defecto en memoria).")
+    parser.add_argument("--guardar", default="", help="Guardar el resultado en este JSON.")
+    parser.add_argument("--comparar", default="", help="JSON de una ejecución anterior.")
+    parser.add_argument("--verboso", action="store_true", help="Mostrar el log de la ingesta.")
+    args = parser.parse_args()
+
+    base = None
+    if args.comparar:
+        with open(args.comparar, encoding="utf-8") as f:
+            base = json.load(f)
+
+    # Corpus e ingesta en procesos distintos: en Linux el pico de RSS
+    # (ru_maxrss) se hereda del proceso padre, así que este no debe crecer.
+    # ProcessPoolExecutor y no multiprocessing.Pool: sus procesos no son
+    # daemon, así que la ingesta puede crear su pool de PDFs (--procesos > 1).
+    contexto = multiprocessing.get_context("spawn")
+    with tempfile.TemporaryDirectory() as carpeta:
+        with ProcessPoolExecutor(1, mp_context=contexto) as pool:
+            corpus = pool.submit(_crear_corpus, carpeta, args).result()
+        with ProcessPoolExecutor(1, mp_context=contexto) as pool:
+            resultado = pool.submit(_medir, carpeta, args).result()
+    resultado["corpus"] = corpus
+
+    _informe(resultado, base)
+
+    if args.guardar:
+        with open(args.guardar, "w", encoding="utf-8") as f:
+            json.dump({**resultado, "argumentos": vars(args)}, f, ensure_ascii=False, indent=2)
+        print(f"[BENCH] Resultado guardado en {args.guardar}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,134 @@
+"""
+bench_ocr.py
+
+Compara el OCR de imágenes en serie (una petición por imagen, como antes)
+con el OCR concurrente de extraer_textos_imagenes_vision, contra el
+servidor Vision falso local (sin credenciales ni coste). Por último repite
+el OCR concurrente con una caché de OCR vacía y, de nuevo, ya llena.
+
+Uso:
+    python -m src.benchmarks.bench_ocr --imagenes 200 --latencia 0.2 --concurrencia 8 --lote 4
+"""
+
+import argparse
+import os
+import tempfile
+import time
+from typing import Callable, List
+
+from src.benchmarks.vision_falso import ServidorVisionFalso
+from src.cache_disco import CacheDisco
+from src.ocr_vision import extraer_texto_imagen_vision, extraer_textos_imagenes_vision
+
+
+def _crear_imagenes(carpeta: str, n: int, kb: int) -> List[str]:
+    """
+    Archivos .png sintéticos (el servidor falso no decodifica la imagen).
+    """
+    rutas = []
+    for i in range(n):
+        ruta = os.path.join(carpeta, f"imagen_{i:04d}.png")
+        with open(ruta, "wb") as f:
+            f.write(os.urandom(kb * 1024))
+        rutas.append(ruta)
+    return rutas
+
+
+def _medir(
+    nombre: str,
+    servidor: ServidorVisionFalso,
+    rutas: List[str],
+    funcion: Callable[[], int],
+) -> None:
+    servidor.reiniciar_contadores()
+    inicio = time.perf_counter()
+    con_texto = funcion()
+    segundos = time.perf_counter() - inicio
+
+    print(
+        f"{nombre:<28} {segundos:8.2f} s  {len(rutas) / segundos:8.1f} img/s  "
+        f"{servidor.peticiones:6d} peticiones  "
+        f"{servidor.bytes_recibidos / (1024 * 1024):8.1f} MB  "
+        f"({con_texto}/{len(rutas)} con texto)"
+    )
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Benchmark del OCR con Vision falso.")
+    parser.add_argument("--imagenes", type=int, default=200)
+    parser.add_argument("--kb", type=int, default=200, help="Tamaño de cada imagen (KB).")
+    parser.add_argument("--latencia", type=float, default=0.2, help="Latencia fija por petición (s).")
+    parser.add_argument("--concurrencia", type=int, default=8)
+    parser.add_argument("--lote", type=int, default=4, help="Imágenes por petición.")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as carpeta, ServidorVisionFalso(
+        latencia_peticion=args.latencia,
+    ) as servidor:
+        rutas = _crear_imagenes(carpeta, args.imagenes, args.kb)
+        client = servidor.crear_cliente()
+
+        print(
+            f"[BENCH] {args.imagenes} imágenes de {args.kb} KB, "
+            f"latencia por petición {args.latencia}s"
+        )
+
+        _medir(
+            "serie (1 por petición)",
+            servidor,
+            rutas,
+            lambda: sum(
+                1 for r in rutas if extraer_texto_imagen_vision(r, client=client)
+            ),
+        )
+        _medir(
+            f"concurrente x{args.concurrencia}",
+            servidor,
+            rutas,
+            lambda: sum(
+                1
+                for _, texto in extraer_textos_imagenes_vision(
+                    rutas, client=client, max_concurrencia=args.concurrencia, imagenes_por_lote=1
+                )
+                if texto
+            ),
+        )
+        _medir(
+            f"concurrente x{args.concurrencia}, lote {args.lote}",
+            servidor,
+            rutas,
+            lambda: sum(
+                1
+                for _, texto in extraer_textos_imagenes_vision(
+                    rutas,
+                    client=client,
+                    max_concurrencia=args.concurrencia,
+                    imagenes_por_lote=args.lote,
+                )
+                if texto
+            ),
+        )
+
+        cache = CacheDisco(os.path.join(carpeta, "cache_ocr.sqlite3"), 64 * 1024 * 1024)
+        for pasada in ("vacía", "llena"):
+            _medir(
+                f"caché {pasada}",
+                servidor,
+                rutas,
+                lambda: sum(
+                    1
+                    for _, texto in extraer_textos_imagenes_vision(
+                        rutas,
+                        client=client,
+                        max_concurrencia=args.concurrencia,
+                        imagenes_por_lote=args.lote,
+                        cache=cache,
+                    )
+                    if texto
+                ),
+            )
+        print(f"[BENCH] Caché de OCR: {cache.estadisticas()}")
+
+
+if __name__ == "__main__":
+    main()
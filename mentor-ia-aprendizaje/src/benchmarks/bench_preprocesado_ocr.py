@@ -0,0 +1,182 @@
+"""
+bench_preprocesado_ocr.py
+
+Compara enviar a Vision las imágenes tal cual con enviarlas preprocesadas
+(preprocesar_imagen: grises, lado mayor acotado, JPEG sin EXIF).
+
+Las imágenes son fotos sintéticas de apuntes como las de un móvil: 4032x3024,
+papel con iluminación irregular y ruido de sensor, texto negro, EXIF de
+cámara y JPEG de calidad 92. Para cada modo mide:
+- bytes enviados por imagen,
+- ms por imagen contra el servidor Vision falso (con latencia por MB, que es
+  lo que se ahorra al subir menos), en serie y con peticiones concurrentes
+  como en la ingesta,
+- ms de preprocesado por imagen,
+- altura de las letras en la imagen enviada (Vision lee bien por encima de
+  ~20 px) y error medio en niveles de gris frente a reducir la original sin
+  recomprimir, como medida de lo que se pierde.
+
+El servidor falso no lee la imagen: que el texto extraído sea el mismo solo
+se puede comprobar con Vision real (--vision-real, necesita credenciales),
+que compara los textos de ambos modos con difflib.
+
+Uso:
+    python -m src.benchmarks.bench_preprocesado_ocr --imagenes 20 --latencia-mb 0.08
+"""
+
+import argparse
+import difflib
+import io
+import os
+import tempfile
+import time
+from typing import Dict, List, Optional
+
+import numpy as np
+from PIL import Image
+
+from src.benchmarks.imagenes_sinteticas import foto_apuntes
+from src.benchmarks.vision_falso import ServidorVisionFalso
+from src.ocr_vision import (
+    PreprocesadoOcrConfig,
+    crear_cliente_vision,
+    extraer_texto_imagen_vision,
+    extraer_textos_imagenes_vision,
+    preprocesar_imagen,
+)
+
+
+def _crear_imagenes(carpeta: str, n: int, ancho: int, alto: int, px_letra: int) -> List[str]:
+    rutas = []
+    for i in range(n):
+        ruta = os.path.join(carpeta, f"foto_{i:03d}.jpg")
+        with open(ruta, "wb") as f:
+            f.write(foto_apuntes(i, ancho, alto, px_letra))
+        rutas.append(ruta)
+    return rutas
+
+
+def _error_medio(original: bytes, procesada: bytes) -> float:
+    """
+    Diferencia media (0-255) entre la imagen enviada y la original pasada a
+    grises y reducida al mismo tamaño sin recomprimir.
+    """
+    enviada = Image.open(io.BytesIO(procesada)).convert("L")
+    referencia = Image.open(io.BytesIO(original)).convert("L").resize(
+        enviada.size, Image.Resampling.LANCZOS
+    )
+    return float(np.mean(np.abs(np.asarray(enviada, np.float32) - np.asarray(referencia, np.float32))))
+
+
+def _medir(
+    nombre: str,
+    rutas: List[str],
+    client,
+    preprocesado: Optional[PreprocesadoOcrConfig],
+    px_letra: int,
+    concurrencia: int,
+) -> Dict[str, float]:
+    originales = []
+    for ruta in rutas:
+        with open(ruta, "rb") as f:
+            originales.append(f.read())
+
+    inicio = time.perf_counter()
+    enviadas = [
+        preprocesar_imagen(c, preprocesado) if preprocesado is not None else c for c in originales
+    ]
+    ms_preprocesado = 1000 * (time.perf_counter() - inicio) / len(rutas)
+
+    inicio = time.perf_counter()
+    textos = [
+        extraer_texto_imagen_vision(r, client=client, preprocesado=preprocesado) for r in rutas
+    ]
+    ms_imagen = 1000 * (time.perf_counter() - inicio) / len(rutas)
+
+    inicio = time.perf_counter()
+    for _ in extraer_textos_imagenes_vision(
+        rutas,
+        client=client,
+        max_concurrencia=concurrencia,
+        imagenes_por_lote=1,
+        preprocesado=preprocesado,
+    ):
+        pass
+    ms_concurrente = 1000 * (time.perf_counter() - inicio) / len(rutas)
+
+    with Image.open(io.BytesIO(originales[0])) as original, Image.open(io.BytesIO(enviadas[0])) as enviada:
+        escala = max(enviada.size) / max(original.size)
+        tamano = f"{enviada.width}x{enviada.height}"
+    kb = sum(len(e) for e in enviadas) / len(enviadas) / 1024
+
+    print(
+        f"{nombre:<14} {tamano:>10} {kb:>9.0f} {ms_imagen:>9.1f} {ms_concurrente:>9.1f} "
+        f"{ms_preprocesado:>9.1f} "
+        f"{px_letra * escala:>9.0f} {_error_medio(originales[0], enviadas[0]):>9.2f}"
+    )
+    return {"kb": kb, "ms": ms_imagen, "ms_concurrente": ms_concurrente, "textos": textos}
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Benchmark del preprocesado de imágenes para OCR.")
+    parser.add_argument("--imagenes", type=int, default=20)
+    parser.add_argument("--ancho", type=int, default=4032)
+    parser.add_argument("--alto", type=int, default=3024)
+    parser.add_argument("--px-letra", type=int, default=64, help="Tamaño de letra en la foto (px).")
+    parser.add_argument("--lado-max", type=int, default=PreprocesadoOcrConfig.lado_max)
+    parser.add_argument("--calidad", type=int, default=PreprocesadoOcrConfig.calidad_jpeg)
+    parser.add_argument("--latencia", type=float, default=0.1, help="Latencia fija por petición (s).")
+    parser.add_argument(
+        "--latencia-mb", type=float, default=0.08, help="Latencia por MB enviado (s); 0.08 ≈ 100 Mbit/s."
+    )
+    parser.add_argument("--concurrencia", type=int, default=8)
+    parser.add_argument(
+        "--vision-real",
+        action="store_true",
+        help="Usar Google Vision real (credenciales del .env) y comparar los textos de ambos modos.",
+    )
+    args = parser.parse_args()
+
+    config = PreprocesadoOcrConfig(activo=True, lado_max=args.lado_max, calidad_jpeg=args.calidad)
+
+    with tempfile.TemporaryDirectory() as carpeta, ServidorVisionFalso(
+        latencia_peticion=args.latencia,
+        latencia_por_mb=args.latencia_mb,
+    ) as servidor:
+        rutas = _crear_imagenes(carpeta, args.imagenes, args.ancho, args.alto, args.px_letra)
+        client = crear_cliente_vision() if args.vision_real else servidor.crear_cliente()
+
+        print(
+            f"[BENCH] {args.imagenes} fotos {args.ancho}x{args.alto} (letra de {args.px_letra} px), "
+            f"Vision {'real' if args.vision_real else 'falso'}; "
+            f"preprocesado gris {args.lado_max} px, JPEG q{args.calidad}"
+        )
+        print(
+            f"{'modo':<14} {'tamaño':>10} {'KB/img':>9} {'ms/img':>9} "
+            f"{f'x{args.concurrencia}':>9} {'ms prep.':>9} "
+            f"{'px letra':>9} {'error gris':>9}"
+        )
+        original = _medir("original", rutas, client, None, args.px_letra, args.concurrencia)
+        procesada = _medir(
+            "preprocesada", rutas, client, config, args.px_letra, args.concurrencia
+        )
+
+    print(
+        f"[BENCH] Bytes enviados: {100 * (procesada['kb'] / original['kb'] - 1):+.0f}%, "
+        f"tiempo por imagen: {100 * (procesada['ms'] / original['ms'] - 1):+.0f}% en serie, "
+        f"{100 * (procesada['ms_concurrente'] / original['ms_concurrente'] - 1):+.0f}% "
+        f"concurrente"
+    )
+    if args.vision_real:
+        similitudes = [
+            difflib.SequenceMatcher(None, a or "", b or "").ratio()
+            for a, b in zip(original["textos"], procesada["textos"])
+        ]
+        print(
+            f"[BENCH] Similitud de texto original/preprocesada: "
+            f"media {np.mean(similitudes):.3f}, mínima {min(similitudes):.3f}"
+        )
+
+
+if __name__ == "__main__":
+    main()
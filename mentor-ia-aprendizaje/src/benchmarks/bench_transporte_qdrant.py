@@ -0,0 +1,211 @@
+"""
+bench_transporte_qdrant.py
+
+Compara los transportes del cliente de Qdrant contra un servidor real
+(local por defecto, p. ej. `docker run -p 6333:6333 -p 6334:6334 qdrant/qdrant`):
+
+- REST síncrono (QdrantClient, lo que se usaba siempre),
+- gRPC síncrono (QDRANT_PREFER_GRPC=1),
+- REST y gRPC asíncronos (AsyncQdrantClient, endpoints async def).
+
+Para cada uno mide:
+- upsert masivo: puntos/s con lotes de --lote puntos y --concurrencia
+  lotes en vuelo (hilos en los síncronos, tareas en los asíncronos),
+- búsqueda de un top-k: latencia p50 / p99 de una consulta cada vez, y
+  consultas/s con --concurrencia en vuelo.
+
+Cada transporte escribe en una colección temporal propia que se borra al
+terminar. El payload imita al de la ingesta (texto de ~1 KB y metadatos).
+
+Uso:
+    python -m src.benchmarks.bench_transporte_qdrant --puntos 20000 --consultas 1000
+    python -m src.benchmarks.bench_transporte_qdrant --url https://xxx.cloud.qdrant.io --api-key ...
+"""
+
+import argparse
+import asyncio
+import sys
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Dict, List
+
+import numpy as np
+from qdrant_client import AsyncQdrantClient, QdrantClient
+from qdrant_client.models import Distance, PointStruct, VectorParams
+
+from src.benchmarks.pdf_sintetico import texto_pagina
+from src.embeddings import ConexionQdrantConfig, crear_cliente_qdrant, crear_cliente_qdrant_async
+from src.similitud import buscar_similares, buscar_similares_async
+
+
+def _percentil(valores: List[float], p: float) -> float:
+    valores = sorted(valores)
+    return valores[min(len(valores) - 1, int(p * len(valores)))]
+
+
+def _datos(args: argparse.Namespace) -> Dict[str, Any]:
+    rng = np.random.default_rng(0)
+    vectores = rng.standard_normal((args.puntos, args.dimension), dtype=np.float32)
+    consultas = rng.standard_normal((args.consultas, args.dimension), dtype=np.float32)
+    textos = [texto_pagina(i, 1000) for i in range(1, 51)]
+    puntos = [
+        PointStruct(
+            id=str(uuid.UUID(int=i + 1)),
+            vector=vectores[i].tolist(),
+            payload={
+                "texto": textos[i % len(textos)],
+                "source_path": f"data/ejemplos/documento_{i // 200:03d}.pdf",
+                "nombre_archivo": f"documento_{i // 200:03d}.pdf",
+                "tipo_fuente": "pdf",
+                "chunk_index": i % 200,
+            },
+        )
+        for i in range(args.puntos)
+    ]
+    lotes = [puntos[i : i + args.lote] for i in range(0, len(puntos), args.lote)]
+    return {"lotes": lotes, "consultas": [c.tolist() for c in consultas]}
+
+
+def _resultado(puntos: int, s_upsert: float, latencias: List[float], consultas: int, s_busqueda: float):
+    return {
+        "upsert_puntos_s": puntos / s_upsert,
+        "p50_ms": 1000 * _percentil(latencias, 0.5),
+        "p99_ms": 1000 * _percentil(latencias, 0.99),
+        "consultas_s": consultas / s_busqueda,
+    }
+
+
+# ---------------------------------------------------------
+#  SÍNCRONO
+# ---------------------------------------------------------
+def _medir_sincrono(client: QdrantClient, coleccion: str, datos: Dict[str, Any], args) -> Dict[str, float]:
+    client.create_collection(coleccion, VectorParams(size=args.dimension, distance=Distance.COSINE))
+    try:
+        with ThreadPoolExecutor(args.concurrencia) as pool:
+            inicio = time.perf_counter()
+            list(pool.map(lambda lote: client.upsert(coleccion, lote, wait=True), datos["lotes"]))
+            s_upsert = time.perf_counter() - inicio
+
+            buscar = lambda q: buscar_similares(client, coleccion, q, top_k=args.top_k)  # noqa: E731
+            buscar(datos["consultas"][0])  # calentamiento
+            latencias = []
+            for q in datos["consultas"]:
+                inicio = time.perf_counter()
+                buscar(q)
+                latencias.append(time.perf_counter() - inicio)
+
+            inicio = time.perf_counter()
+            list(pool.map(buscar, datos["consultas"]))
+            s_busqueda = time.perf_counter() - inicio
+    finally:
+        client.delete_collection(coleccion)
+    return _resultado(args.puntos, s_upsert, latencias, len(datos["consultas"]), s_busqueda)
+
+
+# ---------------------------------------------------------
+#  ASÍNCRONO
+# ---------------------------------------------------------
+async def _medir_asincrono(
+    client: AsyncQdrantClient, coleccion: str, datos: Dict[str, Any], args
+) -> Dict[str, float]:
+    await client.create_collection(coleccion, VectorParams(size=args.dimension, distance=Distance.COSINE))
+    semaforo = asyncio.Semaphore(args.concurrencia)
+
+    async def limitado(corrutina):
+        async with semaforo:
+            return await corrutina
+
+    try:
+        inicio = time.perf_counter()
+        await asyncio.gather(
+            *(limitado(client.upsert(coleccion, lote, wait=True)) for lote in datos["lotes"])
+        )
+        s_upsert = time.perf_counter() - inicio
+
+        buscar = lambda q: buscar_similares_async(client, coleccion, q, top_k=args.top_k)  # noqa: E731
+        await buscar(datos["consultas"][0])  # calentamiento
+        latencias = []
+        for q in datos["consultas"]:
+            inicio = time.perf_counter()
+            await buscar(q)
+            latencias.append(time.perf_counter() - inicio)
+
+        inicio = time.perf_counter()
+        await asyncio.gather(*(limitado(buscar(q)) for q in datos["consultas"]))
+        s_busqueda = time.perf_counter() - inicio
+    finally:
+        await client.delete_collection(coleccion)
+        await client.close()
+    return _resultado(args.puntos, s_upsert, latencias, len(datos["consultas"]), s_busqueda)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Benchmark de REST / gRPC / async contra Qdrant.")
+    parser.add_argument("--url", default="http://localhost:6333")
+    parser.add_argument("--api-key", default=None)
+    parser.add_argument("--grpc-port", type=int, default=6334)
+    parser.add_argument("--puntos", type=int, default=20000)
+    parser.add_argument("--dimension", type=int, default=768)
+    parser.add_argument("--lote", type=int, default=128, help="Puntos por upsert (como la ingesta).")
+    parser.add_argument("--consultas", type=int, default=1000)
+    parser.add_argument("--top-k", type=int, default=5)
+    parser.add_argument("--concurrencia", type=int, default=8)
+    args = parser.parse_args()
+
+    datos = _datos(args)
+    print(
+        f"[BENCH] Qdrant en {args.url}: {args.puntos} puntos de {args.dimension} dims "
+        f"(lotes de {args.lote}), {args.consultas} consultas top-{args.top_k}, "
+        f"concurrencia {args.concurrencia}"
+    )
+    print(f"{'transporte':<12} {'upsert pts/s':>13} {'p50 ms':>8} {'p99 ms':>8} {'consultas/s':>12}")
+
+    resultados = {}
+    for nombre, grpc, asincrono in (
+        ("REST", False, False),
+        ("gRPC", True, False),
+        ("async REST", False, True),
+        ("async gRPC", True, True),
+    ):
+        conexion = ConexionQdrantConfig(
+            url=args.url, api_key=args.api_key, prefer_grpc=grpc, grpc_port=args.grpc_port
+        )
+        # Como la app: una conexión HTTP por petición en vuelo, o los canales
+        # gRPC por defecto (cada uno multiplexa muchas peticiones)
+        pool = None if grpc else args.concurrencia
+        coleccion = f"bench_transporte_{uuid.uuid4().hex[:8]}"
+        try:
+            if asincrono:
+                client = crear_cliente_qdrant_async(pool, conexion)
+                r = asyncio.run(_medir_asincrono(client, coleccion, datos, args))
+            else:
+                client = crear_cliente_qdrant(pool, conexion)
+                r = _medir_sincrono(client, coleccion, datos, args)
+                client.close()
+        except Exception as e:
+            print(f"[ERROR] {nombre}: no se pudo medir contra {args.url}: {e}")
+            if nombre == "REST":
+                sys.exit(1)  # sin servidor no tiene sentido probar el resto
+            continue
+
+        resultados[nombre] = r
+        print(
+            f"{nombre:<12} {r['upsert_puntos_s']:>13.0f} {r['p50_ms']:>8.2f} {r['p99_ms']:>8.2f} "
+            f"{r['consultas_s']:>12.0f}"
+        )
+
+    base = resultados.get("REST")
+    if base:
+        for nombre, r in resultados.items():
+            if nombre == "REST":
+                continue
+            print(
+                f"[BENCH] {nombre} frente a REST: upsert {100 * (r['upsert_puntos_s'] / base['upsert_puntos_s'] - 1):+.0f}%, "
+                f"p50 {100 * (r['p50_ms'] / base['p50_ms'] - 1):+.0f}%, "
+                f"consultas/s {100 * (r['consultas_s'] / base['consultas_s'] - 1):+.0f}%"
+            )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,53 @@
+"""
+embeddings_falsos.py
+
+Modelo de embeddings determinista para benchmarks: sin red, sin cuota.
+
+Cada texto se convierte en un vector normalizado derivado de su xxhash,
+así que el mismo texto da siempre el mismo vector. Opcionalmente simula
+la latencia de la API (fija por petición y por texto).
+"""
+
+import time
+from typing import List
+
+import numpy as np
+import xxhash
+from langchain_core.embeddings import Embeddings
+
+
+class EmbeddingsFalsos(Embeddings):
+    def __init__(
+        self,
+        dimension: int = 768,
+        latencia_peticion: float = 0.0,
+        latencia_por_texto: float = 0.0,
+    ) -> None:
+        self.dimension = dimension
+        self.latencia_peticion = latencia_peticion
+        self.latencia_por_texto = latencia_por_texto
+        self.peticiones = 0
+        self.textos = 0
+
+    def _vector(self, texto: str) -> List[float]:
+        rng = np.random.default_rng(xxhash.xxh3_64_intdigest(texto.encode("utf-8")))
+        vector = rng.standard_normal(self.dimension).astype(np.float32)
+        vector /= np.linalg.norm(vector)
+        return vector.tolist()
+
+    def _esperar(self, n_textos: int) -> None:
+        espera = self.latencia_peticion + self.latencia_por_texto * n_textos
+        if espera > 0:
+            time.sleep(espera)
+
+    def embed_documents(self, texts: List[str]) -> List[List[float]]:
+        self.peticiones += 1
+        self.textos += len(texts)
+        self._esperar(len(texts))
+        return [self._vector(t) for t in texts]
+
+    def embed_query(self, text: str) -> List[float]:
+        self.peticiones += 1
+        self.textos += 1
+        self._esperar(1)
+        return self._vector(text)
@@ -0,0 +1,101 @@
+"""
+imagenes_sinteticas.py
+
+Imágenes sintéticas para los benchmarks de OCR e ingesta: fotos de
+apuntes como las de un móvil y PDFs escaneados (una imagen por página,
+sin capa de texto).
+
+El servidor Vision falso no lee las imágenes, pero el preprocesado y la
+extracción de imágenes de pypdf sí las decodifican, así que tienen que
+ser imágenes reales con un tamaño y un ruido creíbles.
+"""
+
+import io
+from typing import Iterator
+
+import numpy as np
+from PIL import Image, ImageDraw, ImageFont
+
+_FUENTE = "/usr/share/fonts/truetype/dejavu/DejaVuSans.ttf"
+_FRASES = [
+    "Tema {i}. La derivada de una función mide su tasa de cambio instantánea.",
+    "Ejercicio: calcula el límite cuando x tiende a cero de sen(x) / x.",
+    "La fotosíntesis transforma energía luminosa en energía química.",
+    "En 1492 la expedición de Colón llegó a las islas del Caribe.",
+    "Un algoritmo voraz elige en cada paso la opción localmente óptima.",
+    "El ácido desoxirribonucleico contiene la información genética.",
+]
+
+
+def _fuente(px_letra: int) -> ImageFont.ImageFont:
+    try:
+        return ImageFont.truetype(_FUENTE, px_letra)
+    except OSError:
+        return ImageFont.load_default(px_letra)
+
+
+def hoja_apuntes(indice: int, ancho: int, alto: int, px_letra: int) -> Image.Image:
+    """
+    Hoja de apuntes fotografiada: papel con viñeteado (iluminación
+    irregular), ruido de sensor y líneas de texto negro. Determinista
+    según `indice`.
+    """
+    rng = np.random.default_rng(indice)
+
+    y, x = np.mgrid[0:alto, 0:ancho].astype(np.float32)
+    distancia = ((x / ancho - 0.5) ** 2 + (y / alto - 0.5) ** 2) ** 0.5
+    papel = 235 - 60 * distancia
+    fondo = papel[..., None] * np.array([1.0, 0.97, 0.9], dtype=np.float32)
+    fondo += rng.normal(0, 6, size=(alto, ancho, 3)).astype(np.float32)
+    imagen = Image.fromarray(np.clip(fondo, 0, 255).astype(np.uint8), "RGB")
+
+    dibujo = ImageDraw.Draw(imagen)
+    fuente = _fuente(px_letra)
+    margen = ancho // 12
+    linea = int(px_letra * 1.6)
+    for n, y_linea in enumerate(range(margen, alto - margen, linea)):
+        frase = _FRASES[(indice + n) % len(_FRASES)].format(i=indice)
+        dibujo.text((margen, y_linea), frase, fill=(25, 25, 35), font=fuente)
+    return imagen
+
+
+def foto_apuntes(indice: int, ancho: int = 4032, alto: int = 3024, px_letra: int = 64) -> bytes:
+    """
+    Foto de una hoja de apuntes en JPEG de calidad 92 con EXIF de cámara.
+    """
+    exif = Image.Exif()
+    exif[0x010F] = "Fabricante"  # Make
+    exif[0x0110] = "Movil de pruebas"  # Model
+    exif[0x0112] = 1  # Orientation
+    exif[0x0132] = "2024:10:01 10:00:00"  # DateTime
+    salida = io.BytesIO()
+    hoja_apuntes(indice, ancho, alto, px_letra).save(
+        salida, format="JPEG", quality=92, exif=exif
+    )
+    return salida.getvalue()
+
+
+def generar_pdf_escaneado(
+    ruta: str,
+    n_paginas: int,
+    semilla: int = 0,
+    ancho: int = 1240,
+    alto: int = 1754,
+) -> None:
+    """
+    PDF de `n_paginas` páginas escaneadas (A4 a 150 ppp por defecto): cada
+    página es solo una imagen JPEG en grises, sin texto extraíble.
+    """
+    paginas: Iterator[Image.Image] = (
+        hoja_apuntes(semilla * 1_000_003 + i, ancho, alto, px_letra=28).convert("L")
+        for i in range(n_paginas)
+    )
+    primera = next(paginas)
+    primera.save(
+        ruta,
+        format="PDF",
+        save_all=True,
+        append_images=list(paginas),
+        resolution=150,
+        quality=80,
+    )
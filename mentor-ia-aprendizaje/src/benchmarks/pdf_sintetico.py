@@ -0,0 +1,114 @@
+"""
+pdf_sintetico.py
+
+Generador de PDFs de texto sintéticos para los benchmarks de ingesta.
+
+Escribe el PDF objeto a objeto directamente en disco (sin dependencias
+extra), así que se pueden generar documentos de miles de páginas sin
+tenerlos en memoria. pypdf extrae el texto de cada página tal cual.
+"""
+
+import random
+from typing import Iterable, List
+
+_PALABRAS = (
+    "aprendizaje repaso memoria concepto tema unidad ejercicio ejemplo "
+    "definición teorema función variable sistema proceso modelo análisis "
+    "resultado método problema solución estudio lectura capítulo sección "
+    "historia ciencia datos red energía célula mercado lenguaje cálculo"
+).split()
+
+_CARACTERES_POR_LINEA = 90
+
+
+def texto_pagina(numero: int, caracteres: int, semilla: int = 0) -> str:
+    """
+    Texto pseudoaleatorio y determinista de unos `caracteres` caracteres,
+    con frases cortas y el número de página al principio.
+    """
+    rng = random.Random(semilla * 1_000_003 + numero)
+    partes: List[str] = [f"Página {numero}."]
+    longitud = len(partes[0])
+    while longitud < caracteres:
+        frase = " ".join(rng.choice(_PALABRAS) for _ in range(rng.randint(6, 14)))
+        frase = frase.capitalize() + "."
+        partes.append(frase)
+        longitud += len(frase) + 1
+    return " ".join(partes)
+
+
+def _escapar(linea: str) -> str:
+    return linea.replace("\\", "\\\\").replace("(", "\\(").replace(")", "\\)")
+
+
+def escribir_pdf(ruta: str, paginas: Iterable[str], n_paginas: int) -> None:
+    """
+    Escribe un PDF con una página por texto de `paginas` (se consume de uno
+    en uno). `n_paginas` debe coincidir con el número de textos.
+
+    Objetos: 1 catálogo, 2 árbol de páginas, 3 fuente y, por cada página,
+    el objeto página y su contenido.
+    """
+    offsets: List[int] = []
+
+    with open(ruta, "wb") as f:
+        def objeto(cuerpo: bytes) -> None:
+            offsets.append(f.tell())
+            f.write(f"{len(offsets)} 0 obj\n".encode() + cuerpo + b"\nendobj\n")
+
+        f.write(b"%PDF-1.4\n")
+        kids = " ".join(f"{4 + 2 * i} 0 R" for i in range(n_paginas))
+        objeto(b"<< /Type /Catalog /Pages 2 0 R >>")
+        objeto(f"<< /Type /Pages /Kids [{kids}] /Count {n_paginas} >>".encode())
+        objeto(b"<< /Type /Font /Subtype /Type1 /BaseFont /Helvetica >>")
+
+        escritas = 0
+        for texto in paginas:
+            lineas = [
+                texto[j : j + _CARACTERES_POR_LINEA]
+                for j in range(0, len(texto), _CARACTERES_POR_LINEA)
+            ] or [""]
+            ops = ["BT /F1 9 Tf 30 810 Td 11 TL"]
+            ops.extend(f"({_escapar(linea)}) Tj T*" for linea in lineas)
+            ops.append("ET")
+            contenido = "\n".join(ops).encode("latin-1", "replace")
+
+            objeto(
+                f"<< /Type /Page /Parent 2 0 R /MediaBox [0 0 612 842] "
+                f"/Resources << /Font << /F1 3 0 R >> >> "
+                f"/Contents {len(offsets) + 2} 0 R >>".encode()
+            )
+            objeto(
+                b"<< /Length %d >>\nstream\n" % len(contenido)
+                + contenido
+                + b"\nendstream"
+            )
+            escritas += 1
+
+        if escritas != n_paginas:
+            raise ValueError(f"Se esperaban {n_paginas} páginas y se escribieron {escritas}")
+
+        inicio_xref = f.tell()
+        f.write(f"xref\n0 {len(offsets) + 1}\n0000000000 65535 f \n".encode())
+        for offset in offsets:
+            f.write(f"{offset:010d} 00000 n \n".encode())
+        f.write(
+            f"trailer\n<< /Size {len(offsets) + 1} /Root 1 0 R >>\n"
+            f"startxref\n{inicio_xref}\n%%EOF\n".encode()
+        )
+
+
+def generar_pdf(
+    ruta: str,
+    n_paginas: int,
+    caracteres_por_pagina: int = 1800,
+    semilla: int = 0,
+) -> None:
+    """
+    PDF sintético de `n_paginas` páginas de texto.
+    """
+    escribir_pdf(
+        ruta,
+        (texto_pagina(i, caracteres_por_pagina, semilla) for i in range(1, n_paginas + 1)),
+        n_paginas,
+    )
@@ -0,0 +1,76 @@
+"""
+vectores_sinteticos.py
+
+Embeddings sintéticos para los benchmarks de búsqueda (cuantización,
+HNSW) y el top-k exacto con el que se calcula el recall.
+
+Los vectores se agrupan en temas > documentos > chunks, con una media
+común y escalas distintas por dimensión: los embeddings de texto reales no
+están centrados ni son isótropos, y los vecinos de un chunk suelen ser
+chunks de su mismo documento.
+"""
+
+from typing import List, Tuple
+
+import numpy as np
+
+
+def normalizar(x: np.ndarray) -> np.ndarray:
+    return x / np.linalg.norm(x, axis=1, keepdims=True)
+
+
+def vectores_sinteticos(
+    n_puntos: int,
+    n_consultas: int,
+    dimension: int = 768,
+    temas: int = 200,
+    semilla: int = 0,
+) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Devuelve (puntos, consultas) float32 normalizados; las consultas salen
+    de la misma distribución que los puntos.
+    """
+    rng = np.random.default_rng(semilla)
+    centros = rng.standard_normal((temas, dimension), dtype=np.float32)
+    n_documentos = max(1, n_puntos // 20)
+    documentos = centros[rng.integers(0, temas, n_documentos)] + 0.7 * rng.standard_normal(
+        (n_documentos, dimension), dtype=np.float32
+    )
+    media = rng.standard_normal(dimension, dtype=np.float32) * 0.8
+    escala = rng.uniform(0.3, 1.5, dimension).astype(np.float32)
+
+    def muestras(n: int) -> np.ndarray:
+        x = documentos[rng.integers(0, n_documentos, n)] + 0.6 * rng.standard_normal(
+            (n, dimension), dtype=np.float32
+        )
+        return normalizar((x + media) * escala)
+
+    return muestras(n_puntos), muestras(n_consultas)
+
+
+def cargar_vectores(ruta: str, n_consultas: int, semilla: int = 0) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    (puntos, consultas) de un .npy de embeddings reales (N x dimensión):
+    se barajan y las n_consultas primeras hacen de consultas.
+    """
+    todos = normalizar(np.load(ruta).astype(np.float32))
+    np.random.default_rng(semilla).shuffle(todos)
+    return todos[n_consultas:], todos[:n_consultas]
+
+
+def top_k(puntuaciones: np.ndarray, k: int) -> np.ndarray:
+    """
+    Índices de las k puntuaciones más altas de cada fila, de mayor a menor.
+    """
+    candidatos = np.argpartition(-puntuaciones, k - 1, axis=1)[:, :k]
+    orden = np.argsort(-np.take_along_axis(puntuaciones, candidatos, axis=1), axis=1)
+    return np.take_along_axis(candidatos, orden, axis=1)
+
+
+def recall(encontrados: List[List[int]], exactos: np.ndarray) -> float:
+    """
+    Fracción de los top-k exactos que aparecen en los encontrados.
+    """
+    k = exactos.shape[1]
+    aciertos = sum(len(set(e) & set(x.tolist())) for e, x in zip(encontrados, exactos))
+    return aciertos / (k * len(exactos))
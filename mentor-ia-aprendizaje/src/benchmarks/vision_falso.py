@@ -0,0 +1,128 @@
+"""
+vision_falso.py
+
+Servidor gRPC local que imita el servicio ImageAnnotator de Google Vision,
+para medir el OCR de la ingesta sin credenciales ni coste.
+
+- Responde a BatchAnnotateImages (lo que usan tanto document_text_detection
+  como batch_annotate_images) con un texto derivado de los bytes recibidos.
+- Simula la latencia de red/servicio: una parte fija por petición y otra
+  por imagen y por MB recibido.
+- Cuenta peticiones, imágenes y bytes recibidos.
+
+Uso:
+    with ServidorVisionFalso(latencia_peticion=0.2) as servidor:
+        client = servidor.crear_cliente()
+        ...
+"""
+
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Optional
+
+import grpc
+from google.cloud import vision
+from google.cloud.vision_v1.services.image_annotator.transports import (
+    ImageAnnotatorGrpcTransport,
+)
+from google.cloud.vision_v1.types import image_annotator
+
+from src.huellas import hash_bytes
+
+
+class ServidorVisionFalso:
+    def __init__(
+        self,
+        latencia_peticion: float = 0.2,
+        latencia_por_imagen: float = 0.02,
+        latencia_por_mb: float = 0.05,
+        hilos: int = 32,
+    ) -> None:
+        self.latencia_peticion = latencia_peticion
+        self.latencia_por_imagen = latencia_por_imagen
+        self.latencia_por_mb = latencia_por_mb
+        self.hilos = hilos
+
+        self.peticiones = 0
+        self.imagenes = 0
+        self.bytes_recibidos = 0
+        self._lock = threading.Lock()
+        self._servidor: Optional[grpc.Server] = None
+        self.puerto: Optional[int] = None
+
+    # ---------------------------------------------------------
+    #  SERVICIO
+    # ---------------------------------------------------------
+    def _batch_annotate_images(
+        self,
+        request: image_annotator.BatchAnnotateImagesRequest,
+        context: grpc.ServicerContext,
+    ) -> image_annotator.BatchAnnotateImagesResponse:
+        n_bytes = sum(len(r.image.content) for r in request.requests)
+        with self._lock:
+            self.peticiones += 1
+            self.imagenes += len(request.requests)
+            self.bytes_recibidos += n_bytes
+
+        time.sleep(
+            self.latencia_peticion
+            + self.latencia_por_imagen * len(request.requests)
+            + self.latencia_por_mb * n_bytes / (1024 * 1024)
+        )
+
+        respuestas = []
+        for r in request.requests:
+            texto = f"Texto OCR falso {hash_bytes(r.image.content)}"
+            respuestas.append(
+                image_annotator.AnnotateImageResponse(
+                    full_text_annotation={"text": texto},
+                )
+            )
+        return image_annotator.BatchAnnotateImagesResponse(responses=respuestas)
+
+    # ---------------------------------------------------------
+    #  CICLO DE VIDA
+    # ---------------------------------------------------------
+    def iniciar(self) -> "ServidorVisionFalso":
+        self._servidor = grpc.server(ThreadPoolExecutor(max_workers=self.hilos))
+        handler = grpc.method_handlers_generic_handler(
+            "google.cloud.vision.v1.ImageAnnotator",
+            {
+                "BatchAnnotateImages": grpc.unary_unary_rpc_method_handler(
+                    self._batch_annotate_images,
+                    request_deserializer=image_annotator.BatchAnnotateImagesRequest.deserialize,
+                    response_serializer=image_annotator.BatchAnnotateImagesResponse.serialize,
+                ),
+            },
+        )
+        self._servidor.add_generic_rpc_handlers((handler,))
+        self.puerto = self._servidor.add_insecure_port("127.0.0.1:0")
+        self._servidor.start()
+        return self
+
+    def detener(self) -> None:
+        if self._servidor is not None:
+            self._servidor.stop(grace=None)
+            self._servidor = None
+
+    def __enter__(self) -> "ServidorVisionFalso":
+        return self.iniciar()
+
+    def __exit__(self, *exc) -> None:
+        self.detener()
+
+    def reiniciar_contadores(self) -> None:
+        with self._lock:
+            self.peticiones = 0
+            self.imagenes = 0
+            self.bytes_recibidos = 0
+
+    def crear_cliente(self) -> vision.ImageAnnotatorClient:
+        """
+        Cliente de Vision real (el mismo que usa la app) apuntando a este servidor.
+        """
+        canal = grpc.insecure_channel(f"127.0.0.1:{self.puerto}")
+        return vision.ImageAnnotatorClient(
+            transport=ImageAnnotatorGrpcTransport(channel=canal),
+        )
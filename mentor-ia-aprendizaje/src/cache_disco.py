@@ -0,0 +1,161 @@
+"""
+cache_disco.py
+
+Caché clave → bytes persistente en disco (SQLite), con tamaño máximo y
+expulsión LRU, y contadores de aciertos / fallos.
+
+La usan las capas que llaman a APIs de pago (embeddings, OCR) para no
+volver a pagar por un contenido que ya procesaron.
+"""
+
+import os
+import sqlite3
+import threading
+import time
+from typing import Dict, Iterable, List, Optional, Tuple
+
+_ESQUEMA = """
+CREATE TABLE IF NOT EXISTS cache (
+    clave TEXT PRIMARY KEY,
+    valor BLOB NOT NULL,
+    tam INTEGER NOT NULL,
+    usado_en REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS cache_usado_en ON cache (usado_en);
+"""
+
+# Al superar el máximo se expulsa hasta quedar en esta fracción, para no
+# expulsar en cada escritura
+_FRACCION_TRAS_EXPULSAR = 0.9
+
+# SQLite limita el número de parámetros por consulta
+_MAX_PARAMETROS = 500
+
+
+class CacheDisco:
+    def __init__(self, ruta: str, max_bytes: int) -> None:
+        self.ruta = ruta
+        self.max_bytes = max_bytes
+        self.aciertos = 0
+        self.fallos = 0
+
+        carpeta = os.path.dirname(ruta)
+        if carpeta:
+            os.makedirs(carpeta, exist_ok=True)
+
+        self._conn = sqlite3.connect(ruta, check_same_thread=False, timeout=30)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._lock = threading.Lock()
+        with self._lock, self._conn:
+            self._conn.executescript(_ESQUEMA)
+            self._bytes = self._conn.execute(
+                "SELECT COALESCE(SUM(tam), 0) FROM cache"
+            ).fetchone()[0]
+
+    # ---------------------------------------------------------
+    #  LECTURA
+    # ---------------------------------------------------------
+    def obtener(self, clave: str) -> Optional[bytes]:
+        return self.obtener_varios([clave]).get(clave)
+
+    def obtener_varios(self, claves: Iterable[str]) -> Dict[str, bytes]:
+        """
+        Devuelve {clave: valor} de las claves presentes y marca su uso (LRU).
+        """
+        claves = list(dict.fromkeys(claves))
+        encontrados: Dict[str, bytes] = {}
+        ahora = time.time()
+
+        with self._lock, self._conn:
+            for i in range(0, len(claves), _MAX_PARAMETROS):
+                parte = claves[i : i + _MAX_PARAMETROS]
+                marcas = ",".join("?" * len(parte))
+                filas = self._conn.execute(
+                    f"SELECT clave, valor FROM cache WHERE clave IN ({marcas})", parte
+                ).fetchall()
+                encontrados.update(filas)
+
+            if encontrados:
+                self._conn.executemany(
+                    "UPDATE cache SET usado_en = ? WHERE clave = ?",
+                    [(ahora, c) for c in encontrados],
+                )
+
+            self.aciertos += len(encontrados)
+            self.fallos += len(claves) - len(encontrados)
+
+        return encontrados
+
+    # ---------------------------------------------------------
+    #  ESCRITURA
+    # ---------------------------------------------------------
+    def guardar(self, clave: str, valor: bytes) -> None:
+        self.guardar_varios([(clave, valor)])
+
+    def guardar_varios(self, items: Iterable[Tuple[str, bytes]]) -> None:
+        items = [(c, v) for c, v in items if len(v) <= self.max_bytes]
+        if not items:
+            return
+        ahora = time.time()
+
+        with self._lock, self._conn:
+            claves = [c for c, _ in items]
+            anteriores = 0
+            for i in range(0, len(claves), _MAX_PARAMETROS):
+                parte = claves[i : i + _MAX_PARAMETROS]
+                marcas = ",".join("?" * len(parte))
+                anteriores += self._conn.execute(
+                    f"SELECT COALESCE(SUM(tam), 0) FROM cache WHERE clave IN ({marcas})",
+                    parte,
+                ).fetchone()[0]
+
+            self._conn.executemany(
+                "INSERT OR REPLACE INTO cache (clave, valor, tam, usado_en) "
+                "VALUES (?, ?, ?, ?)",
+                [(c, v, len(v), ahora) for c, v in items],
+            )
+            self._bytes += sum(len(v) for _, v in items) - anteriores
+
+            if self._bytes > self.max_bytes:
+                self._expulsar()
+
+    def _expulsar(self) -> None:
+        """
+        Borra las entradas usadas hace más tiempo hasta bajar del límite.
+        Se llama con el lock tomado y dentro de una transacción.
+        """
+        objetivo = int(self.max_bytes * _FRACCION_TRAS_EXPULSAR)
+        expulsadas: List[str] = []
+        liberados = 0
+
+        cursor = self._conn.execute("SELECT clave, tam FROM cache ORDER BY usado_en")
+        for clave, tam in cursor:
+            if self._bytes - liberados <= objetivo:
+                break
+            expulsadas.append(clave)
+            liberados += tam
+        cursor.close()
+
+        self._conn.executemany(
+            "DELETE FROM cache WHERE clave = ?", [(c,) for c in expulsadas]
+        )
+        self._bytes -= liberados
+
+    # ---------------------------------------------------------
+    #  ESTADÍSTICAS
+    # ---------------------------------------------------------
+    def estadisticas(self) -> Dict[str, int]:
+        with self._lock:
+            entradas = self._conn.execute("SELECT COUNT(*) FROM cache").fetchone()[0]
+            return {
+                "aciertos": self.aciertos,
+                "fallos": self.fallos,
+                "entradas": entradas,
+                "bytes": self._bytes,
+            }
+
+    def reiniciar_contadores(self) -> None:
+        with self._lock:
+            self.aciertos = 0
+            self.fallos = 0
@@ -3,33 +3,216 @@ chunking.py
 
 Lógica para dividir el texto en chunks manejables
 para el modelo de embeddings / RAG.
+
+Los chunks se forman con frases completas (no se corta una frase salvo que
+no quepa entera, ni una palabra salvo que tampoco quepa: una URL o una
+cadena sin espacios más larga que el chunk) y respetan los párrafos: si un párrafo
+termina con el chunk casi lleno, el chunk se cierra ahí. El tamaño se mide
+en tokens estimados y el solapamiento entre chunks consecutivos son las
+últimas frases del anterior, hasta el presupuesto de solapamiento.
+
+Todo se hace en una sola pasada lineal sobre el texto: los espacios se
+normalizan una vez por párrafo, los tokens de cada frase se cuentan una vez
+(sin volver a partirla) y el texto de cada chunk se une una sola vez.
+
+- chunk_text(): un texto suelto → lista de chunks.
+- chunkear_paginas(): páginas (número, texto) en streaming →
+  (chunk, página inicial, página final); lo usa AgenteExtraccion.
 """
 
-from typing import List
+import re
+import warnings
+from typing import Iterable, Iterator, List, Optional, Tuple
+
+# Párrafos: separados por al menos una línea en blanco
+_PARRAFO = re.compile(r"\n[ \t\r\f\v]*\n\s*")
+# Fin de frase: . ! ? … (y comillas / paréntesis de cierre) seguidos del
+# espacio (ya normalizado a uno solo). Se captura el signo para devolverlo a
+# su frase tras el split; en "..." o "?!" los anteriores ya quedan en la frase.
+_FIN_FRASE = re.compile(r"([.!?…][\"'»”’)\]]*) ")
+
+# Caracteres por token, además de un token por palabra (aprox. para español con SentencePiece)
+_CARACTERES_POR_TOKEN = 8
+# Caracteres por token estimado en texto corriente (para convertir los
+# tamaños en caracteres de los parámetros antiguos de chunk_text)
+_CARACTERES_POR_TOKEN_MEDIO = 4
+# Si un párrafo termina con el chunk lleno al menos en esta fracción, se cierra
+_LLENADO_CIERRE_PARRAFO = 0.75
+
+# (texto de la frase, tokens, página, ¿termina párrafo?)
+_Frase = Tuple[str, int, int, bool]
+
+
+def estimar_tokens(texto: str) -> int:
+    """
+    Estimación rápida de tokens: uno por palabra más uno por cada
+    8 caracteres (las palabras largas y los signos suman piezas).
+    """
+    return len(texto.split()) + len(texto) // _CARACTERES_POR_TOKEN
+
+
+def _coste(frase: str) -> int:
+    """
+    Tokens que suma una frase (con los espacios ya normalizados) a un chunk:
+    como estimar_tokens, pero contando su separador y redondeando hacia
+    arriba, para que la suma de los costes de las frases de un chunk nunca
+    quede por debajo de estimar_tokens(chunk).
+    """
+    return frase.count(" ") + 1 + (len(frase) + 1 + _CARACTERES_POR_TOKEN) // _CARACTERES_POR_TOKEN
 
 
 def chunk_text(
     text: str,
-    chunk_size: int = 800,
-    chunk_overlap: int = 200,
+    max_tokens: int = 256,
+    overlap_tokens: int = 32,
+    *,
+    chunk_size: Optional[int] = None,
+    chunk_overlap: Optional[int] = None,
 ) -> List[str]:
     """
-    Divide un texto largo en trozos con solapamiento.
+    Divide un texto largo en chunks de frases completas.
+
+    max_tokens: tokens estimados máximos por chunk.
+    overlap_tokens: tokens máximos de frases repetidas entre chunks consecutivos.
 
-    chunk_size: número aproximado de caracteres por chunk.
-    chunk_overlap: caracteres que se repiten entre chunks consecutivos.
+    chunk_size / chunk_overlap (obsoletos): los tamaños en caracteres de la
+    versión anterior, como argumentos con nombre; se convierten a tokens
+    (unos 4 caracteres por token). Pasados por posición se interpretan ya
+    como tokens.
     """
+    if chunk_size is not None or chunk_overlap is not None:
+        warnings.warn(
+            "chunk_text(chunk_size=..., chunk_overlap=...) está obsoleto: "
+            "usa max_tokens y overlap_tokens.",
+            DeprecationWarning,
+            stacklevel=2,
+        )
+        if chunk_size is not None:
+            max_tokens = max(1, chunk_size // _CARACTERES_POR_TOKEN_MEDIO)
+        if chunk_overlap is not None:
+            overlap_tokens = chunk_overlap // _CARACTERES_POR_TOKEN_MEDIO
+
     if not text:
         return []
+    return [chunk for chunk, _, _ in chunkear_paginas([(1, text)], max_tokens, overlap_tokens)]
+
+
+def chunkear_paginas(
+    paginas: Iterable[Tuple[int, str]],
+    max_tokens: int = 256,
+    overlap_tokens: int = 32,
+) -> Iterator[Tuple[str, int, int]]:
+    """
+    Como chunk_text, pero recorre un documento página a página (pares
+    (número, texto)) sin tenerlo entero en memoria. Cada página empieza
+    párrafo nuevo.
 
-    chunks: List[str] = []
-    start = 0
-    text_length = len(text)
+    Genera (chunk, pagina_inicio, pagina_fin), con estimar_tokens(chunk)
+    <= max_tokens. Solo guarda las frases del chunk en curso.
+    """
+    max_tokens = max(1, max_tokens)
+    overlap_tokens = min(max(0, overlap_tokens), max_tokens // 2)
+    cierre_parrafo = max_tokens * _LLENADO_CIERRE_PARRAFO
+
+    actual: List[_Frase] = []
+    tokens = 0
+    nuevas = 0  # frases del chunk en curso que no vienen del solapamiento
+
+    for frase in _frases(paginas, max_tokens):
+        n = frase[1]
+        if actual and tokens + n > max_tokens:
+            yield _unir(actual)
+            actual, tokens = _solapamiento(actual, overlap_tokens)
+            nuevas = 0
+            if tokens + n > max_tokens:
+                actual, tokens = [], 0
+
+        actual.append(frase)
+        tokens += n
+        nuevas += 1
+
+        if frase[3] and tokens >= cierre_parrafo:
+            yield _unir(actual)
+            actual, tokens = _solapamiento(actual, overlap_tokens)
+            nuevas = 0
+
+    if nuevas:
+        yield _unir(actual)
+
+
+# ---------------------------------------------------------
+#  INTERNOS
+# ---------------------------------------------------------
+def _frases(paginas: Iterable[Tuple[int, str]], max_tokens: int) -> Iterator[_Frase]:
+    """
+    Frases de cada página con su coste en tokens (_coste), normalizando los
+    espacios. Las frases de más de max_tokens se parten (_partir_frase).
+    """
+    for numero, texto in paginas:
+        for parrafo in _PARRAFO.split(texto):
+            parrafo = " ".join(parrafo.split())
+            if not parrafo:
+                continue
+            # split alterna [frase, signo, frase, signo, ..., resto]
+            partes = _FIN_FRASE.split(parrafo)
+            frases = [a + b for a, b in zip(partes[::2], partes[1::2])]
+            if partes[-1]:
+                frases.append(partes[-1])
+            ultima = len(frases) - 1
+            for i, frase in enumerate(frases):
+                n = _coste(frase)
+                if n <= max_tokens:
+                    yield frase, n, numero, i == ultima
+                else:
+                    yield from _partir_frase(frase, max_tokens, numero, i == ultima)
+
+
+def _partir_frase(frase: str, max_tokens: int, numero: int, fin_parrafo: bool) -> Iterator[_Frase]:
+    """
+    Trozos de una frase de más de max_tokens que caben en max_tokens: por
+    palabras, y las palabras que no caben solas, por caracteres.
+    """
+    # Caracteres de la palabra más larga que cabe sola (_coste <= max_tokens)
+    max_caracteres = max(1, _CARACTERES_POR_TOKEN * max_tokens - _CARACTERES_POR_TOKEN - 2)
+    palabras: List[str] = []
+    caracteres = -1  # sin el espacio de la primera palabra
+    for palabra in frase.split(" "):
+        trozos = (
+            [palabra[i : i + max_caracteres] for i in range(0, len(palabra), max_caracteres)]
+            if len(palabra) > max_caracteres
+            else [palabra]
+        )
+        for trozo in trozos:
+            # Coste del trozo en curso si se le añade esta palabra (ver _coste)
+            longitud = caracteres + 1 + len(trozo)
+            n = len(palabras) + 1 + (longitud + 1 + _CARACTERES_POR_TOKEN) // _CARACTERES_POR_TOKEN
+            if palabras and n > max_tokens:
+                texto = " ".join(palabras)
+                yield texto, _coste(texto), numero, False
+                palabras, caracteres = [], -1
+            palabras.append(trozo)
+            caracteres += len(trozo) + 1
+    if palabras:
+        texto = " ".join(palabras)
+        yield texto, _coste(texto), numero, fin_parrafo
+
+
+def _solapamiento(frases: List[_Frase], overlap_tokens: int) -> Tuple[List[_Frase], int]:
+    """
+    Últimas frases completas de `frases` que caben en overlap_tokens.
+    """
+    tokens = 0
+    desde = len(frases)
+    while desde > 0 and tokens + frases[desde - 1][1] <= overlap_tokens:
+        desde -= 1
+        tokens += frases[desde][1]
+    return frases[desde:], tokens
 
-    while start < text_length:
-        end = start + chunk_size
-        chunk = text[start:end]
-        chunks.append(chunk)
-        start += chunk_size - chunk_overlap
 
-    return chunks
+def _unir(frases: List[_Frase]) -> Tuple[str, int, int]:
+    partes: List[str] = []
+    for texto, _, _, fin_parrafo in frases:
+        partes.append(texto)
+        partes.append("\n\n" if fin_parrafo else " ")
+    partes.pop()
+    return "".join(partes), frases[0][2], frases[-1][2]
@@ -0,0 +1,197 @@
+"""
+deduplicacion_chunks.py
+
+Detección de chunks duplicados y casi duplicados antes de generar embeddings.
+
+- Duplicado exacto: misma huella xxhash del texto.
+- Casi duplicado: firma MinHash (numpy) sobre shingles de palabras e índice
+  LSH por bandas; un candidato cuenta como duplicado si su similitud de
+  Jaccard estimada supera el umbral.
+
+Sirve para el mismo material subido dos veces (PDF y captura de las mismas
+diapositivas) y para encabezados / pies repetidos: el chunk redundante no se
+embebe ni se sube, y la ruta de su archivo se anota en el chunk que se conserva.
+
+Los casi duplicados se buscan entre los chunks que se procesan juntos en una
+ingesta. Los duplicados exactos, además, contra los ya indexados en ingestas
+anteriores que se precargan (precargar) desde las huellas del manifiesto.
+"""
+
+import re
+from typing import Any, Dict, List, Optional, Set
+
+import numpy as np
+import xxhash
+
+_PALABRA = re.compile(r"\w+", re.UNICODE)
+
+# Semilla fija: las firmas deben ser comparables entre ejecuciones
+_SEMILLA = 20240611
+
+
+class DeduplicadorChunks:
+    def __init__(
+        self,
+        umbral: float = 0.85,
+        num_permutaciones: int = 64,
+        bandas: int = 16,
+        tam_shingle: int = 5,
+    ) -> None:
+        if num_permutaciones % bandas:
+            raise ValueError("num_permutaciones debe ser múltiplo de bandas")
+
+        self.umbral = umbral
+        self.bandas = bandas
+        self.filas = num_permutaciones // bandas
+        self.tam_shingle = tam_shingle
+
+        rng = np.random.default_rng(_SEMILLA)
+        self._xor = rng.integers(0, 2**64, size=num_permutaciones, dtype=np.uint64)
+        # Multiplicadores impares: la multiplicación módulo 2^64 es una biyección
+        self._mult = rng.integers(0, 2**64, size=num_permutaciones, dtype=np.uint64) | np.uint64(1)
+
+        # Representantes: huella → id, id → firma, id → ruta
+        self._exactos: Dict[int, Any] = {}
+        self._firmas: Dict[Any, np.ndarray] = {}
+        self._rutas: Dict[Any, str] = {}
+        # Clave de banda → id (o lista de ids si varios comparten la banda).
+        # Se guarda el id suelto en el caso habitual para no crear una lista
+        # por banda y chunk: con documentos enormes es la mayor parte de la memoria.
+        self._lsh: Dict[int, Any] = {}
+
+        # Representantes de ingestas anteriores (solo por huella exacta)
+        self._precargados: Set[Any] = set()
+
+        # id del representante → rutas de otros archivos fusionadas en él
+        self.fusiones: Dict[Any, Set[str]] = {}
+
+        self.chunks = 0
+        self.exactos = 0
+        self.casi_duplicados = 0
+
+    # ---------------------------------------------------------
+    #  API
+    # ---------------------------------------------------------
+    def revisar(self, punto_id: Any, texto: str, ruta: str) -> Optional[Any]:
+        """
+        Devuelve el id del chunk ya visto del que `texto` es duplicado (y anota
+        la fusión), o None si es nuevo (y queda registrado como representante).
+        """
+        self.chunks += 1
+
+        huella = xxhash.xxh3_128_intdigest(texto.encode("utf-8"))
+        representante = self._exactos.get(huella)
+        if representante is not None:
+            self.exactos += 1
+            self._fusionar(representante, ruta)
+            return representante
+
+        firma = self._firma(texto)
+        claves_bandas = self._claves_bandas(firma)
+
+        representante = self._buscar_similar(firma, claves_bandas)
+        if representante is not None:
+            self.casi_duplicados += 1
+            self._fusionar(representante, ruta)
+            return representante
+
+        self._exactos[huella] = punto_id
+        self._firmas[punto_id] = firma
+        self._rutas[punto_id] = ruta
+        for clave in claves_bandas:
+            actual = self._lsh.get(clave)
+            if actual is None:
+                self._lsh[clave] = punto_id
+            elif isinstance(actual, list):
+                actual.append(punto_id)
+            else:
+                self._lsh[clave] = [actual, punto_id]
+        return None
+
+    def precargar(self, huella: str, punto_id: Any, ruta: str) -> None:
+        """
+        Registra un chunk ya indexado (huella xxh3-128 en hex, como
+        src.huellas.hash_texto_128) como representante de duplicados exactos.
+        """
+        clave = int(huella, 16)
+        if clave not in self._exactos:
+            self._exactos[clave] = punto_id
+            self._rutas[punto_id] = ruta
+            self._precargados.add(punto_id)
+
+    def es_precargado(self, punto_id: Any) -> bool:
+        """
+        Si el representante `punto_id` es de una ingesta anterior.
+        """
+        return punto_id in self._precargados
+
+    def ruta(self, punto_id: Any) -> str:
+        """
+        Archivo del chunk representante `punto_id`.
+        """
+        return self._rutas[punto_id]
+
+    def estadisticas(self) -> Dict[str, int]:
+        return {
+            "chunks": self.chunks,
+            "exactos": self.exactos,
+            "casi_duplicados": self.casi_duplicados,
+            "embeddings_ahorrados": self.exactos + self.casi_duplicados,
+        }
+
+    # ---------------------------------------------------------
+    #  MINHASH / LSH
+    # ---------------------------------------------------------
+    def _shingles(self, texto: str) -> np.ndarray:
+        palabras = _PALABRA.findall(texto.lower())
+        k = self.tam_shingle
+        if len(palabras) <= k:
+            grupos = [" ".join(palabras)]
+        else:
+            grupos = [" ".join(palabras[i : i + k]) for i in range(len(palabras) - k + 1)]
+        return np.fromiter(
+            (xxhash.xxh3_64_intdigest(g.encode("utf-8")) for g in set(grupos)),
+            dtype=np.uint64,
+        )
+
+    def _firma(self, texto: str) -> np.ndarray:
+        """
+        Firma MinHash: para cada permutación h_i(x) = (x XOR a_i) * b_i mod 2^64,
+        el mínimo sobre los shingles del texto.
+        """
+        shingles = self._shingles(texto)
+        with np.errstate(over="ignore"):
+            valores = (shingles[:, None] ^ self._xor[None, :]) * self._mult[None, :]
+        return valores.min(axis=0)
+
+    def _claves_bandas(self, firma: np.ndarray) -> List[int]:
+        # La semilla es el nº de banda: la misma porción en bandas distintas no coincide
+        return [
+            xxhash.xxh3_64_intdigest(
+                firma[b * self.filas : (b + 1) * self.filas].tobytes(), seed=b
+            )
+            for b in range(self.bandas)
+        ]
+
+    def _buscar_similar(
+        self,
+        firma: np.ndarray,
+        claves_bandas: List[int],
+    ) -> Optional[Any]:
+        vistos: Set[Any] = set()
+        for clave in claves_bandas:
+            actual = self._lsh.get(clave)
+            if actual is None:
+                continue
+            for candidato in actual if isinstance(actual, list) else (actual,):
+                if candidato in vistos:
+                    continue
+                vistos.add(candidato)
+                similitud = float(np.mean(self._firmas[candidato] == firma))
+                if similitud >= self.umbral:
+                    return candidato
+        return None
+
+    def _fusionar(self, representante: Any, ruta: str) -> None:
+        if ruta != self._rutas[representante]:
+            self.fusiones.setdefault(representante, set()).add(ruta)
@@ -0,0 +1,190 @@
+"""
+deduplicar_coleccion.py
+
+Comando de mantenimiento para colecciones creadas antes de los ids
+deterministas: cada ingesta asignaba un id aleatorio, así que re-ingestar
+una carpeta duplicaba todos sus chunks.
+
+Agrupa los puntos por (source_path, chunk_index, hash del texto), deja
+uno solo por grupo con su id determinista (generar_id_punto) y borra
+el resto. Basta con ejecutarlo una vez por colección:
+
+    python -m src.deduplicar_coleccion [--coleccion NOMBRE] [--dry-run]
+"""
+
+import argparse
+from typing import Any, Dict, List, Optional
+
+from qdrant_client import QdrantClient
+from qdrant_client.models import PointIdsList, PointStruct
+
+from src.almacen_textos import AlmacenTextos, completar_textos
+from src.embeddings import VectorConfig, crear_cliente_qdrant
+from src.huellas import generar_id_punto
+from src.manifiesto import ManifiestoIngesta
+from src.recursos import obtener_almacen_textos
+
+
+def deduplicar_coleccion(
+    client: QdrantClient,
+    collection_name: str,
+    dry_run: bool = False,
+    manifiesto: Optional[ManifiestoIngesta] = None,
+    tam_lote: int = 256,
+    almacen: Optional[AlmacenTextos] = None,
+) -> Dict[str, int]:
+    """
+    Colapsa los chunks duplicados de la colección.
+
+    Los puntos sin "texto" en el payload (ALMACEN_TEXTOS=1) lo toman de
+    `almacen`; al re-escribirlos, su texto pasa al id canónico.
+
+    Devuelve un resumen con los puntos leídos, los grupos únicos,
+    los puntos re-escritos con su id determinista y los duplicados borrados.
+    """
+    # 1) Recorrer la colección (sin vectores) agrupando por id canónico
+    grupos: Dict[str, List[Any]] = {}
+    ruta_por_grupo: Dict[str, str] = {}
+    puntos_leidos = 0
+    sin_clave = 0
+
+    offset = None
+    while True:
+        puntos, offset = client.scroll(
+            collection_name=collection_name,
+            limit=tam_lote,
+            offset=offset,
+            with_payload=True,
+            with_vectors=False,
+        )
+        completar_textos(puntos, almacen)
+        for p in puntos:
+            puntos_leidos += 1
+            payload = p.payload or {}
+            source_path = payload.get("source_path")
+            chunk_index = payload.get("chunk_index")
+            texto = (
+                payload.get("text")
+                or payload.get("texto")
+                or payload.get("content")
+            )
+            if source_path is None or chunk_index is None or texto is None:
+                sin_clave += 1
+                continue
+
+            canonico = generar_id_punto(source_path, chunk_index, texto)
+            grupos.setdefault(canonico, []).append(p.id)
+            ruta_por_grupo[canonico] = source_path
+
+        if offset is None:
+            break
+
+    # 2) Decidir qué re-escribir y qué borrar
+    a_reescribir: Dict[Any, str] = {}  # id existente -> id canónico
+    a_borrar: List[Any] = []
+    for canonico, ids in grupos.items():
+        ids_str = [str(i) for i in ids]
+        if canonico not in ids_str:
+            a_reescribir[ids[0]] = canonico
+        a_borrar.extend(i for i in ids if str(i) != canonico)
+
+    resumen = {
+        "puntos_leidos": puntos_leidos,
+        "grupos_unicos": len(grupos),
+        "puntos_sin_clave": sin_clave,
+        "puntos_reescritos": len(a_reescribir),
+        "duplicados_borrados": len(a_borrar) - len(a_reescribir),
+    }
+
+    if dry_run:
+        return resumen
+
+    # 3) Copiar un representante de cada grupo a su id canónico
+    origenes = list(a_reescribir.keys())
+    for i in range(0, len(origenes), tam_lote):
+        registros = client.retrieve(
+            collection_name=collection_name,
+            ids=origenes[i : i + tam_lote],
+            with_payload=True,
+            with_vectors=True,
+        )
+        client.upsert(
+            collection_name=collection_name,
+            points=[
+                PointStruct(
+                    id=a_reescribir[r.id],
+                    vector=r.vector,
+                    payload=r.payload,
+                )
+                for r in registros
+            ],
+        )
+        if almacen is not None:
+            sin_texto = [r for r in registros if "texto" not in (r.payload or {})]
+            textos = almacen.obtener_varios(r.id for r in sin_texto)
+            almacen.guardar_varios(
+                (a_reescribir[r.id], r.payload["source_path"], textos[str(r.id)])
+                for r in sin_texto
+                if str(r.id) in textos
+            )
+
+    # 4) Borrar los ids sobrantes (incluidos los originales ya copiados)
+    for i in range(0, len(a_borrar), tam_lote):
+        client.delete(
+            collection_name=collection_name,
+            points_selector=PointIdsList(points=a_borrar[i : i + tam_lote]),
+        )
+    if almacen is not None:
+        almacen.borrar(a_borrar)
+
+    # 5) El manifiesto debe apuntar a los ids que quedaron en la colección
+    if manifiesto is not None:
+        ids_por_ruta: Dict[str, List[str]] = {}
+        for canonico, ruta in ruta_por_grupo.items():
+            ids_por_ruta.setdefault(ruta, []).append(canonico)
+        for ruta, ids in ids_por_ruta.items():
+            manifiesto.actualizar_chunk_ids(ruta, ids)
+        manifiesto.guardar()
+
+    return resumen
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(
+        description="Elimina chunks duplicados de la colección de Qdrant.",
+    )
+    parser.add_argument(
+        "--coleccion",
+        default=None,
+        help="Nombre de la colección (por defecto QDRANT_COLLECTION).",
+    )
+    parser.add_argument(
+        "--dry-run",
+        action="store_true",
+        help="Solo muestra cuántos duplicados hay, sin modificar nada.",
+    )
+    args = parser.parse_args()
+
+    coleccion = args.coleccion or VectorConfig().collection_name
+    client = crear_cliente_qdrant()
+    manifiesto = ManifiestoIngesta(coleccion)
+
+    print(f"[DEDUP] Revisando la colección: {coleccion}")
+    resumen = deduplicar_coleccion(
+        client,
+        coleccion,
+        dry_run=args.dry_run,
+        manifiesto=manifiesto,
+        almacen=obtener_almacen_textos(),
+    )
+    for clave, valor in resumen.items():
+        print(f"[DEDUP]  -> {clave}: {valor}")
+
+    if args.dry_run:
+        print("[DEDUP] Modo --dry-run: no se modificó la colección.")
+    else:
+        print("[OK] Deduplicación terminada.")
+
+
+if __name__ == "__main__":
+    main()
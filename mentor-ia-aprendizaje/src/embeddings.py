@@ -2,46 +2,224 @@
 embeddings.py
 
 Generación de embeddings con Gemini y conexión con la base de datos vectorial (Qdrant).
+
+Los embeddings pasan por una caché en disco (EmbeddingsConCache): un texto
+que ya se embebió con el mismo modelo no vuelve a llamar a la API.
+
+La colección puede guardar además los vectores cuantizados (QDRANT_CUANTIZACION):
+int8 ("escalar", 4 veces menos memoria) o 1 bit por dimensión ("binaria", 32
+veces menos). Con los cuantizados en RAM y los originales en disco, la
+búsqueda recorre los cuantizados y reordena los mejores candidatos con los
+originales (sobremuestreo + reevaluación), perdiendo muy poco recall.
 """
 
 import os
+import warnings
 from dataclasses import dataclass
-from typing import List
+from typing import Any, Dict, List, Optional
 
+import numpy as np
 from dotenv import load_dotenv
-from qdrant_client import QdrantClient
-from qdrant_client.models import Distance, VectorParams
+from qdrant_client import AsyncQdrantClient, QdrantClient
+from qdrant_client.models import (
+    BinaryQuantization,
+    BinaryQuantizationConfig,
+    CollectionParamsDiff,
+    Disabled,
+    Distance,
+    Filter,
+    HnswConfigDiff,
+    OptimizersConfigDiff,
+    PayloadSchemaType,
+    QuantizationConfig,
+    QuantizationSearchParams,
+    ScalarQuantization,
+    ScalarQuantizationConfig,
+    ScalarType,
+    SearchParams,
+    VectorParams,
+    VectorParamsDiff,
+)
 
+from langchain_core.embeddings import Embeddings
 from langchain_google_genai import GoogleGenerativeAIEmbeddings
 
+from src.cache_disco import CacheDisco
+from src.huellas import hash_texto_128
+
 # Cargar variables de entorno desde .env
 load_dotenv()
 
+MODELO_EMBEDDINGS = "models/text-embedding-004"
+
+
+CUANTIZACIONES = ("ninguna", "escalar", "binaria")
+
+# Campos del payload indexados: los filtros, borrados y recuentos por
+# documento usan el índice en lugar de recorrer toda la colección
+INDICES_PAYLOAD: Dict[str, PayloadSchemaType] = {
+    "source_path": PayloadSchemaType.KEYWORD,
+    "nombre_archivo": PayloadSchemaType.KEYWORD,
+    "tipo_fuente": PayloadSchemaType.KEYWORD,
+    "chunk_index": PayloadSchemaType.INTEGER,
+    # Archivos con chunks fusionados en el punto (ver AgenteExtraccion._registrar_fusiones)
+    "fuentes_fusionadas": PayloadSchemaType.KEYWORD,
+}
+
+# Valores distintos máximos que devuelve contar_por_valor (p. ej. documentos)
+MAX_VALORES_FACETA = 100_000
+
 
 @dataclass
 class VectorConfig:
     collection_name: str = os.getenv("QDRANT_COLLECTION", "mentor_ia_aprendizaje")
     vector_size: int = 768  # tamaño típico para muchos modelos; Gemini ajusta internamente
     distance: Distance = Distance.COSINE
+    # "ninguna", "escalar" (int8) o "binaria" (1 bit por dimensión)
+    cuantizacion: str = os.getenv("QDRANT_CUANTIZACION", "ninguna")
+    # Vectores cuantizados siempre en RAM (1/0) y originales en disco (1/0)
+    cuantizacion_en_ram: bool = os.getenv("QDRANT_CUANTIZACION_EN_RAM", "1") == "1"
+    vectores_en_disco: bool = os.getenv("QDRANT_VECTORES_EN_DISCO", "0") == "1"
+    # Al buscar: candidatos por resultado que se sacan de los cuantizados y si
+    # se reordenan con los vectores originales (1/0)
+    sobremuestreo: float = float(os.getenv("QDRANT_SOBREMUESTREO", "2.0"))
+    reevaluar: bool = os.getenv("QDRANT_REEVALUAR", "1") == "1"
+    # HNSW: vecinos por nodo (m) y candidatos al construir el grafo
+    # (0 = los de Qdrant, 16 y 100), y el grafo en disco (1/0)
+    hnsw_m: int = int(os.getenv("QDRANT_HNSW_M", "0"))
+    hnsw_ef_construct: int = int(os.getenv("QDRANT_HNSW_EF_CONSTRUCT", "0"))
+    hnsw_en_disco: bool = os.getenv("QDRANT_HNSW_EN_DISCO", "0") == "1"
+    # Candidatos que explora cada búsqueda (0 = los de Qdrant): más = más recall y latencia
+    hnsw_ef: int = int(os.getenv("QDRANT_HNSW_EF", "0"))
+    # Optimizador: KB de vectores a partir de los que un segmento se indexa con
+    # HNSW (por debajo se busca por fuerza bruta) y nº de segmentos (0 = los de Qdrant)
+    umbral_indexado_kb: int = int(os.getenv("QDRANT_UMBRAL_INDEXADO_KB", "0"))
+    segmentos: int = int(os.getenv("QDRANT_SEGMENTOS", "0"))
+    # Payload en disco (1) o en RAM (0)
+    payload_en_disco: bool = os.getenv("QDRANT_PAYLOAD_EN_DISCO", "1") == "1"
+
+    def config_cuantizacion(self) -> Optional[QuantizationConfig]:
+        if self.cuantizacion not in CUANTIZACIONES:
+            raise ValueError(
+                f"QDRANT_CUANTIZACION debe ser una de {', '.join(CUANTIZACIONES)}: {self.cuantizacion!r}"
+            )
+        if self.cuantizacion == "escalar":
+            return ScalarQuantization(
+                scalar=ScalarQuantizationConfig(
+                    type=ScalarType.INT8,
+                    quantile=0.99,  # ignora el 1% de valores extremos al fijar el rango
+                    always_ram=self.cuantizacion_en_ram,
+                )
+            )
+        if self.cuantizacion == "binaria":
+            return BinaryQuantization(
+                binary=BinaryQuantizationConfig(always_ram=self.cuantizacion_en_ram)
+            )
+        return None
+
+    def config_hnsw(self) -> HnswConfigDiff:
+        return HnswConfigDiff(
+            m=self.hnsw_m or None,
+            ef_construct=self.hnsw_ef_construct or None,
+            on_disk=self.hnsw_en_disco,
+        )
+
+    def config_optimizadores(self) -> OptimizersConfigDiff:
+        return OptimizersConfigDiff(
+            indexing_threshold=self.umbral_indexado_kb or None,
+            default_segment_number=self.segmentos or None,
+        )
+
+    def parametros_busqueda(self) -> Optional[SearchParams]:
+        """
+        Parámetros de búsqueda para buscar_similares (None si todo va con
+        los valores por defecto de Qdrant).
+        """
+        cuantizacion = None
+        if self.config_cuantizacion() is not None:
+            cuantizacion = QuantizationSearchParams(
+                rescore=self.reevaluar,
+                oversampling=self.sobremuestreo,
+            )
+        if cuantizacion is None and not self.hnsw_ef:
+            return None
+        return SearchParams(hnsw_ef=self.hnsw_ef or None, quantization=cuantizacion)
+
+
+@dataclass
+class ConexionQdrantConfig:
+    url: Optional[str] = os.getenv("QDRANT_URL")
+    api_key: Optional[str] = os.getenv("QDRANT_API_KEY")
+    # gRPC (HTTP/2, varias peticiones en vuelo por conexión) en lugar de REST (1/0)
+    prefer_grpc: bool = os.getenv("QDRANT_PREFER_GRPC", "0") == "1"
+    grpc_port: int = int(os.getenv("QDRANT_GRPC_PORT", "6334"))
 
+    def argumentos(self) -> Dict[str, Any]:
+        if not self.url:
+            raise ValueError("Falta QDRANT_URL en el archivo .env")
+        return {
+            "url": self.url,
+            "api_key": self.api_key,
+            "prefer_grpc": self.prefer_grpc,
+            "grpc_port": self.grpc_port,
+        }
 
-def crear_cliente_qdrant() -> QdrantClient:
+
+def crear_cliente_qdrant(
+    pool_size: Optional[int] = None,
+    conexion: Optional[ConexionQdrantConfig] = None,
+) -> QdrantClient:
     """
     Crea un cliente de Qdrant apuntando a Qdrant Cloud (o local, si cambias la URL).
 
     Usa:
     - QDRANT_URL
     - QDRANT_API_KEY
+    - QDRANT_PREFER_GRPC y QDRANT_GRPC_PORT (gRPC en lugar de REST)
     desde .env
+
+    pool_size: conexiones HTTP (o canales gRPC) máximas (None = por defecto).
+    La app usa un solo cliente compartido: src.recursos.obtener_cliente_qdrant().
     """
-    url = os.getenv("QDRANT_URL")
-    api_key = os.getenv("QDRANT_API_KEY")
+    conexion = conexion or ConexionQdrantConfig()
+    client = QdrantClient(**conexion.argumentos(), pool_size=pool_size)
+    return client
 
-    if not url:
-        raise ValueError("Falta QDRANT_URL en el archivo .env")
 
-    client = QdrantClient(url=url, api_key=api_key)
-    return client
+def crear_cliente_qdrant_async(
+    pool_size: Optional[int] = None,
+    conexion: Optional[ConexionQdrantConfig] = None,
+) -> AsyncQdrantClient:
+    """
+    Como crear_cliente_qdrant, pero asíncrono: para endpoints `async def`,
+    que esperan a Qdrant sin ocupar un hilo del pool de FastAPI.
+
+    El cliente queda ligado al bucle de eventos donde se usa por primera vez.
+    """
+    conexion = conexion or ConexionQdrantConfig()
+    return AsyncQdrantClient(**conexion.argumentos(), pool_size=pool_size)
+
+
+def _resumen_cuantizacion(cuantizacion: Optional[QuantizationConfig]) -> Optional[tuple]:
+    # Qdrant devuelve la config con valores por defecto rellenados: se
+    # comparan solo los campos que fija VectorConfig
+    if isinstance(cuantizacion, ScalarQuantization):
+        return ("escalar", cuantizacion.scalar.always_ram)
+    if isinstance(cuantizacion, BinaryQuantization):
+        return ("binaria", cuantizacion.binary.always_ram)
+    return None
+
+
+def _difiere(actual: Any, deseado: Any) -> bool:
+    # Solo cuentan los campos que fija `deseado` (los None quedan como estén);
+    # un booleano que Qdrant devuelve como None está en su valor por defecto, False
+    for campo, valor in deseado.model_dump(exclude_none=True).items():
+        valor_actual = getattr(actual, campo, None)
+        if isinstance(valor, bool):
+            valor_actual = bool(valor_actual)
+        if valor_actual != valor:
+            return True
+    return False
 
 
 def asegurar_coleccion(
@@ -49,24 +227,164 @@ def asegurar_coleccion(
     config: VectorConfig,
 ) -> None:
     """
-    Crea la colección en Qdrant si no existe.
+    Crea la colección en Qdrant si no existe. Si ya existe, le aplica la
+    cuantización, HNSW, optimizador y almacenamiento de `config` que
+    difieran (Qdrant reconstruye índices y cuantiza en segundo plano).
+
+    En ambos casos crea los índices de payload que falten (INDICES_PAYLOAD).
     """
     existing = [c.name for c in client.get_collections().collections]
-    if config.collection_name in existing:
+    if config.collection_name not in existing:
+        client.create_collection(
+            collection_name=config.collection_name,
+            vectors_config=VectorParams(
+                size=config.vector_size,
+                distance=config.distance,
+                on_disk=config.vectores_en_disco,
+            ),
+            quantization_config=config.config_cuantizacion(),
+            hnsw_config=config.config_hnsw(),
+            optimizers_config=config.config_optimizadores(),
+            on_disk_payload=config.payload_en_disco,
+        )
+    else:
+        _actualizar_coleccion(client, config)
+    _asegurar_indices_payload(client, config.collection_name)
+
+
+def _actualizar_coleccion(client: QdrantClient, config: VectorConfig) -> None:
+    cuantizacion = config.config_cuantizacion()
+    actual = client.get_collection(config.collection_name).config
+    cambios: Dict[str, Any] = {}
+    en_disco = bool(getattr(actual.params.vectors, "on_disk", None))
+    if (
+        _resumen_cuantizacion(actual.quantization_config) != _resumen_cuantizacion(cuantizacion)
+        or en_disco != config.vectores_en_disco
+    ):
+        cambios["vectors_config"] = {"": VectorParamsDiff(on_disk=config.vectores_en_disco)}
+        cambios["quantization_config"] = (
+            cuantizacion if cuantizacion is not None else Disabled.DISABLED
+        )
+    if _difiere(actual.hnsw_config, config.config_hnsw()):
+        cambios["hnsw_config"] = config.config_hnsw()
+    if _difiere(actual.optimizer_config, config.config_optimizadores()):
+        cambios["optimizers_config"] = config.config_optimizadores()
+    payload_en_disco = actual.params.on_disk_payload
+    if payload_en_disco is not None and payload_en_disco != config.payload_en_disco:
+        cambios["collection_params"] = CollectionParamsDiff(on_disk_payload=config.payload_en_disco)
+    if not cambios:
+        return
+
+    print(f"[QDRANT] Actualizando {config.collection_name}: {', '.join(cambios)}")
+    client.update_collection(collection_name=config.collection_name, **cambios)
+
+
+def _asegurar_indices_payload(client: QdrantClient, collection_name: str) -> None:
+    """
+    Crea los índices de payload que falten. En una colección que ya tiene
+    puntos (migración), Qdrant indexa los existentes antes de responder:
+    solo tarda la primera vez.
+    """
+    existentes = client.get_collection(collection_name).payload_schema or {}
+    faltan = [campo for campo in INDICES_PAYLOAD if campo not in existentes]
+    if not faltan:
         return
 
-    client.recreate_collection(
-        collection_name=config.collection_name,
-        vectors_config=VectorParams(
-            size=config.vector_size,
-            distance=config.distance,
-        ),
+    print(f"[QDRANT] Creando índices de payload en {collection_name}: {', '.join(faltan)}")
+    for campo in faltan:
+        with warnings.catch_warnings():
+            # El Qdrant en memoria (benchmarks) no usa índices y avisa cada vez
+            warnings.filterwarnings("ignore", message="Payload indexes have no effect")
+            client.create_payload_index(collection_name, campo, field_schema=INDICES_PAYLOAD[campo])
+
+
+def contar_por_valor(
+    client: QdrantClient,
+    collection_name: str,
+    campo: str,
+    filtro: Optional[Filter] = None,
+) -> Dict[str, int]:
+    """
+    Puntos por cada valor de `campo` (facet de Qdrant): con el índice de
+    payload es una sola consulta que no recorre los puntos.
+    """
+    respuesta = client.facet(
+        collection_name=collection_name,
+        key=campo,
+        facet_filter=filtro,
+        limit=MAX_VALORES_FACETA,
+        exact=True,
     )
+    return {hit.value: hit.count for hit in respuesta.hits}
+
+
+@dataclass
+class CacheEmbeddingsConfig:
+    ruta: str = os.getenv("EMBEDDINGS_CACHE", "data/.cache_embeddings.sqlite3")
+    # Tamaño máximo en MB (0 = sin caché)
+    max_mb: int = int(os.getenv("EMBEDDINGS_CACHE_MB", "512"))
+
+
+class EmbeddingsConCache(Embeddings):
+    """
+    Envuelve un modelo de embeddings y guarda cada vector (float32) en una
+    CacheDisco con clave (modelo, tipo, xxhash del texto).
+
+    Documentos y consultas se guardan por separado porque Gemini los embebe
+    con task types distintos.
+    """
+
+    def __init__(self, modelo: Embeddings, nombre_modelo: str, cache: CacheDisco) -> None:
+        self.modelo = modelo
+        self.nombre_modelo = nombre_modelo
+        self.cache = cache
+
+    def _clave(self, tipo: str, texto: str) -> str:
+        return f"{self.nombre_modelo}:{tipo}:{hash_texto_128(texto)}"
+
+    @staticmethod
+    def _a_bytes(vector: List[float]) -> bytes:
+        return np.asarray(vector, dtype=np.float32).tobytes()
+
+    @staticmethod
+    def _a_vector(datos: bytes) -> List[float]:
+        return np.frombuffer(datos, dtype=np.float32).tolist()
+
+    def embed_documents(self, texts: List[str]) -> List[List[float]]:
+        claves = [self._clave("documento", t) for t in texts]
+        vectores: Dict[str, List[float]] = {
+            c: self._a_vector(v) for c, v in self.cache.obtener_varios(claves).items()
+        }
 
+        # Textos que faltan, sin repetir los que aparecen varias veces en el lote
+        faltan = {c: t for c, t in zip(claves, texts) if c not in vectores}
+        if faltan:
+            nuevos = self.modelo.embed_documents(list(faltan.values()))
+            self.cache.guardar_varios(
+                (c, self._a_bytes(v)) for c, v in zip(faltan, nuevos)
+            )
+            vectores.update(zip(faltan, nuevos))
 
-def crear_modelo_embeddings() -> GoogleGenerativeAIEmbeddings:
+        return [vectores[c] for c in claves]
+
+    def embed_query(self, text: str) -> List[float]:
+        clave = self._clave("consulta", text)
+        datos = self.cache.obtener(clave)
+        if datos is not None:
+            return self._a_vector(datos)
+
+        vector = self.modelo.embed_query(text)
+        self.cache.guardar(clave, self._a_bytes(vector))
+        return vector
+
+    def estadisticas(self) -> Dict[str, int]:
+        return self.cache.estadisticas()
+
+
+def crear_modelo_embeddings() -> Embeddings:
     """
-    Crea el modelo de embeddings usando Gemini vía LangChain.
+    Crea el modelo de embeddings usando Gemini vía LangChain, detrás de la
+    caché en disco (EMBEDDINGS_CACHE, EMBEDDINGS_CACHE_MB; 0 MB la desactiva).
 
     Usa GOOGLE_API_KEY desde .env (nombre esperado por langchain-google-genai).
     """
@@ -75,16 +393,22 @@ def crear_modelo_embeddings() -> GoogleGenerativeAIEmbeddings:
         raise ValueError("Falta GOOGLE_API_KEY o GEMINI_API_KEY en el archivo .env")
 
     embeddings = GoogleGenerativeAIEmbeddings(
-        model="models/text-embedding-004",
+        model=MODELO_EMBEDDINGS,
         google_api_key=api_key,  # <-- clave explícita, así NO intenta ADC
     )
-    return embeddings
+
+    cache_config = CacheEmbeddingsConfig()
+    if cache_config.max_mb <= 0:
+        return embeddings
+
+    cache = CacheDisco(cache_config.ruta, cache_config.max_mb * 1024 * 1024)
+    return EmbeddingsConCache(embeddings, MODELO_EMBEDDINGS, cache)
 
 
 
 def generar_embeddings(
     texts: List[str],
-    embeddings_model: GoogleGenerativeAIEmbeddings,
+    embeddings_model: Embeddings,
 ) -> List[List[float]]:
     """
     Genera embeddings para una lista de textos usando el modelo indicado.
@@ -0,0 +1,84 @@
+"""
+extraccion_pdf.py
+
+Extracción de texto de PDFs con pypdf pensada para ejecutarse en un
+pool de procesos: cada tarea abre el PDF y extrae un rango de páginas.
+De las páginas escaneadas (sin capa de texto) se extraen sus imágenes
+para pasarlas por OCR.
+
+Este módulo solo importa pypdf para que los procesos hijos arranquen rápido.
+"""
+
+import os
+import threading
+from typing import List, Optional, Tuple
+
+from pypdf import PdfReader
+
+# Último PDF abierto por cada hilo (en los procesos del pool, uno por proceso).
+# Las tareas de un mismo PDF reutilizan el lector: abrirlo en cada tarea obliga
+# a analizar el archivo entero cada vez y, con miles de páginas, la extracción
+# se vuelve cuadrática.
+_cache = threading.local()
+
+# Imágenes con algún lado menor (px) no se envían a OCR: iconos, logos, viñetas
+_LADO_MIN_IMAGEN = 200
+
+
+def _abrir_pdf(ruta: str) -> PdfReader:
+    st = os.stat(ruta)
+    clave: Tuple[str, int, int] = (ruta, st.st_mtime_ns, st.st_size)
+    if getattr(_cache, "clave", None) != clave:
+        _cache.lector = None  # soltar el PDF anterior antes de abrir el nuevo
+        _cache.lector = PdfReader(ruta)
+        _cache.clave = clave
+    return _cache.lector
+
+
+def contar_paginas_pdf(ruta: str) -> int:
+    """
+    Número de páginas del PDF.
+    """
+    return len(PdfReader(ruta).pages)
+
+
+def extraer_paginas_pdf(
+    ruta: str,
+    inicio: int = 0,
+    fin: Optional[int] = None,
+) -> List[str]:
+    """
+    Extrae el texto de las páginas [inicio, fin) del PDF (fin=None: hasta el final).
+
+    Devuelve una cadena por página ("" si la página no tiene texto).
+    """
+    reader = _abrir_pdf(ruta)
+    total = len(reader.pages)
+    fin = total if fin is None else min(fin, total)
+    return [reader.pages[i].extract_text() or "" for i in range(inicio, fin)]
+
+
+def extraer_imagenes_paginas_pdf(ruta: str, indices: List[int]) -> List[List[bytes]]:
+    """
+    Imágenes incrustadas en las páginas `indices` (desde 0) del PDF, ya
+    codificadas (JPEG tal cual está en el PDF, el resto como PNG), en el
+    orden en que aparecen en cada página.
+
+    Devuelve una lista de imágenes por página. Se omiten las pequeñas
+    (_LADO_MIN_IMAGEN) y las que pypdf no sabe decodificar (p. ej. JBIG2
+    sin jbig2dec).
+    """
+    reader = _abrir_pdf(ruta)
+    resultado: List[List[bytes]] = []
+    for i in indices:
+        imagenes: List[bytes] = []
+        lista = reader.pages[i].images
+        for clave in lista.keys():
+            try:
+                imagen = lista[clave]
+                if min(imagen.image.size) >= _LADO_MIN_IMAGEN:
+                    imagenes.append(imagen.data)
+            except Exception as e:
+                print(f"[WARN] No se pudo extraer una imagen de la página {i + 1} de {ruta}: {e}")
+        resultado.append(imagenes)
+    return resultado
@@ -0,0 +1,71 @@
+"""
+huellas.py
+
+Huellas (hashes) rápidas de contenido con xxhash.
+
+Se usan para:
+- saber si un archivo cambió entre ingestas sin tener que volver a
+  extraer su texto ni generar sus embeddings,
+- derivar ids deterministas para los puntos de Qdrant.
+"""
+
+import uuid
+
+import xxhash
+
+# Tamaño de bloque para leer archivos grandes sin cargarlos enteros en memoria
+TAMANO_BLOQUE = 1024 * 1024
+
+
+def hash_bytes(datos: bytes) -> str:
+    """
+    Devuelve la huella xxh3-64 (hex) de un bloque de bytes.
+    """
+    return xxhash.xxh3_64_hexdigest(datos)
+
+
+def hash_bytes_128(datos: bytes) -> str:
+    """
+    Devuelve la huella xxh3-128 (hex) de un bloque de bytes.
+    Para claves de caché, donde una colisión devolvería un resultado ajeno.
+    """
+    return xxhash.xxh3_128_hexdigest(datos)
+
+
+def hash_texto(texto: str) -> str:
+    """
+    Devuelve la huella xxh3-64 (hex) de un texto codificado en UTF-8.
+    """
+    return xxhash.xxh3_64_hexdigest(texto.encode("utf-8"))
+
+
+def hash_texto_128(texto: str) -> str:
+    """
+    Devuelve la huella xxh3-128 (hex) de un texto codificado en UTF-8.
+    Para claves de caché, donde una colisión devolvería un resultado ajeno.
+    """
+    return xxhash.xxh3_128_hexdigest(texto.encode("utf-8"))
+
+
+def hash_archivo(ruta: str) -> str:
+    """
+    Devuelve la huella xxh3-64 (hex) del contenido de un archivo,
+    leyéndolo por bloques.
+    """
+    h = xxhash.xxh3_64()
+    with open(ruta, "rb") as f:
+        for bloque in iter(lambda: f.read(TAMANO_BLOQUE), b""):
+            h.update(bloque)
+    return h.hexdigest()
+
+
+def generar_id_punto(source_path: str, chunk_index: int, texto: str) -> str:
+    """
+    Id determinista (UUID) de un chunk a partir de su archivo de origen,
+    su posición y su contenido.
+
+    Volver a ingestar el mismo chunk produce el mismo id, así que el upsert
+    sobrescribe el punto en lugar de duplicarlo.
+    """
+    clave = f"{source_path}\x00{chunk_index}\x00{hash_texto(texto)}"
+    return str(uuid.UUID(hex=xxhash.xxh3_128_hexdigest(clave.encode("utf-8"))))
@@ -0,0 +1,256 @@
+"""
+manifiesto.py
+
+Manifiesto persistente de la ingesta.
+
+Guarda, por cada archivo ingestado:
+- tamaño y mtime (para detectar cambios con un solo stat),
+- huella xxhash del contenido (para confirmar el cambio),
+- ids de los chunks que se subieron a Qdrant y la huella xxh3-128 de su
+  texto (para detectar duplicados exactos entre ingestas),
+- archivos cuyos chunks duplicados se omitieron por los de este (solo
+  existen en Qdrant a través de él).
+
+Así AgenteExtraccion solo vuelve a leer, hacer OCR, generar embeddings
+y subir a Qdrant los archivos nuevos o modificados.
+"""
+
+import json
+import os
+import tempfile
+import threading
+from dataclasses import asdict, dataclass, field
+from typing import Any, Dict, Iterable, List, Optional, Set, Tuple
+
+from src.huellas import hash_archivo
+
+RUTA_MANIFIESTO_DEFECTO = "data/.manifiesto_ingesta.json"
+
+
+@dataclass
+class EntradaManifiesto:
+    size: int
+    mtime_ns: int
+    hash: str
+    chunk_ids: List[Any] = field(default_factory=list)
+    fusionadas: List[str] = field(default_factory=list)
+    # Huellas del texto de cada chunk, en el orden de chunk_ids
+    huellas: List[str] = field(default_factory=list)
+
+
+class ManifiestoIngesta:
+    def __init__(
+        self,
+        coleccion: str,
+        ruta: Optional[str] = None,
+    ) -> None:
+        self.coleccion = coleccion
+        self.ruta = ruta or os.getenv("INGESTA_MANIFIESTO", RUTA_MANIFIESTO_DEFECTO)
+        self._entradas: Dict[str, EntradaManifiesto] = {}
+        self._lock = threading.Lock()
+        self.cargar()
+
+    # ---------------------------------------------------------
+    #  PERSISTENCIA
+    # ---------------------------------------------------------
+    def cargar(self) -> None:
+        """
+        Carga el manifiesto desde disco. Si no existe, está corrupto
+        o pertenece a otra colección, se empieza vacío.
+        """
+        self._entradas = {}
+        if not os.path.exists(self.ruta):
+            return
+
+        try:
+            with open(self.ruta, "r", encoding="utf-8") as f:
+                datos = json.load(f)
+        except (OSError, ValueError) as e:
+            print(f"[WARN] No se pudo leer el manifiesto {self.ruta}: {e}")
+            return
+
+        if datos.get("coleccion") != self.coleccion:
+            print(
+                f"[INGESTA] El manifiesto es de otra colección "
+                f"({datos.get('coleccion')}), se ignora."
+            )
+            return
+
+        for ruta, entrada in (datos.get("archivos") or {}).items():
+            self._entradas[ruta] = EntradaManifiesto(**entrada)
+
+    def guardar(self) -> None:
+        """
+        Escribe el manifiesto de forma atómica (archivo temporal propio +
+        replace). El lock se mantiene hasta el replace: dos guardados a la
+        vez no se mezclan ni dejan en disco el más antiguo.
+        """
+        carpeta = os.path.dirname(self.ruta)
+        if carpeta:
+            os.makedirs(carpeta, exist_ok=True)
+
+        with self._lock:
+            datos = {
+                "coleccion": self.coleccion,
+                "archivos": {r: asdict(e) for r, e in self._entradas.items()},
+            }
+            tmp = tempfile.NamedTemporaryFile(
+                "w",
+                encoding="utf-8",
+                dir=carpeta or ".",
+                prefix=os.path.basename(self.ruta),
+                suffix=".tmp",
+                delete=False,
+            )
+            try:
+                with tmp:
+                    json.dump(datos, tmp, ensure_ascii=False)
+                os.replace(tmp.name, self.ruta)
+            except BaseException:
+                os.remove(tmp.name)
+                raise
+
+    # ---------------------------------------------------------
+    #  CONSULTAS
+    # ---------------------------------------------------------
+    def revisar(self, ruta: str, forzar: bool = False) -> Optional[EntradaManifiesto]:
+        """
+        Comprueba si el archivo cambió desde la última ingesta.
+
+        Devuelve None si no cambió; si es nuevo o cambió (o forzar=True),
+        devuelve la entrada nueva (sin chunk_ids) para registrarla tras la ingesta.
+
+        Un archivo borrado entre el listado y esta revisión también devuelve
+        None: no hay nada que ingestar, y la próxima reconciliación de la
+        carpeta lo quita de la colección.
+        """
+        try:
+            st = os.stat(ruta)
+        except FileNotFoundError:
+            print(f"[INGESTA] {ruta} ya no existe, se omite.")
+            return None
+
+        with self._lock:
+            anterior = None if forzar else self._entradas.get(ruta)
+
+        if (
+            anterior is not None
+            and anterior.size == st.st_size
+            and anterior.mtime_ns == st.st_mtime_ns
+        ):
+            return None
+
+        try:
+            huella = hash_archivo(ruta)
+        except FileNotFoundError:
+            print(f"[INGESTA] {ruta} ya no existe, se omite.")
+            return None
+        if anterior is not None and anterior.hash == huella:
+            # Mismo contenido con otro mtime (copia, touch...): solo actualizamos el stat
+            with self._lock:
+                anterior.size = st.st_size
+                anterior.mtime_ns = st.st_mtime_ns
+            return None
+
+        return EntradaManifiesto(size=st.st_size, mtime_ns=st.st_mtime_ns, hash=huella)
+
+    def rutas(self) -> List[str]:
+        """
+        Archivos registrados en el manifiesto.
+        """
+        with self._lock:
+            return list(self._entradas)
+
+    def fusionadas(self, ruta: str) -> List[str]:
+        """
+        Archivos con chunks duplicados fusionados en los de `ruta`.
+        """
+        with self._lock:
+            entrada = self._entradas.get(ruta)
+            return list(entrada.fusionadas) if entrada else []
+
+    def chunk_ids(self, ruta: str) -> List[Any]:
+        """
+        Ids de los chunks subidos en la última ingesta del archivo.
+        """
+        with self._lock:
+            entrada = self._entradas.get(ruta)
+            return list(entrada.chunk_ids) if entrada else []
+
+    def huellas_chunks(self, excluir: Set[str]) -> List[Tuple[str, Any, str]]:
+        """
+        (huella, chunk id, ruta) de los chunks de los archivos registrados,
+        salvo los de `excluir` y los invalidados (se van a sustituir).
+        """
+        with self._lock:
+            return [
+                (huella, chunk_id, ruta)
+                for ruta, entrada in self._entradas.items()
+                if ruta not in excluir and entrada.size >= 0
+                for huella, chunk_id in zip(entrada.huellas, entrada.chunk_ids)
+            ]
+
+    # ---------------------------------------------------------
+    #  ACTUALIZACIÓN
+    # ---------------------------------------------------------
+    def registrar(
+        self,
+        ruta: str,
+        entrada: EntradaManifiesto,
+        chunk_ids: List[Any],
+        huellas: Optional[List[str]] = None,
+    ) -> None:
+        entrada.chunk_ids = list(chunk_ids)
+        entrada.huellas = list(huellas or [])
+        with self._lock:
+            self._entradas[ruta] = entrada
+
+    def actualizar_chunk_ids(self, ruta: str, chunk_ids: List[Any]) -> None:
+        """
+        Sustituye los chunk ids de un archivo ya registrado (sin tocar su huella).
+        Las huellas de sus chunks se descartan: ya no siguen el orden de los ids.
+        """
+        with self._lock:
+            entrada = self._entradas.get(ruta)
+            if entrada is not None:
+                entrada.chunk_ids = list(chunk_ids)
+                entrada.huellas = []
+
+    def anotar_fusionadas(self, ruta: str, rutas: Iterable[str]) -> None:
+        """
+        Añade `rutas` a los archivos fusionados en los chunks de `ruta`.
+        """
+        with self._lock:
+            entrada = self._entradas.get(ruta)
+            if entrada is not None:
+                entrada.fusionadas = sorted(set(entrada.fusionadas) | set(rutas))
+
+    def quitar_fusionadas(self, rutas: Iterable[str]) -> List[str]:
+        """
+        Quita `rutas` de los archivos fusionados de todas las entradas.
+        Devuelve las que aparecían en alguna.
+        """
+        quitar = set(rutas)
+        quitadas: Set[str] = set()
+        with self._lock:
+            for entrada in self._entradas.values():
+                comunes = quitar.intersection(entrada.fusionadas)
+                if comunes:
+                    quitadas |= comunes
+                    entrada.fusionadas = [r for r in entrada.fusionadas if r not in quitar]
+        return sorted(quitadas)
+
+    def invalidar(self, ruta: str) -> None:
+        """
+        Marca el archivo como modificado: la próxima ingesta lo vuelve a
+        procesar entero, y sus chunk ids se conservan para sustituirlos.
+        """
+        with self._lock:
+            entrada = self._entradas.get(ruta)
+            if entrada is not None:
+                entrada.size = -1
+                entrada.hash = ""
+
+    def eliminar(self, ruta: str) -> None:
+        with self._lock:
+            self._entradas.pop(ruta, None)
@@ -7,20 +7,142 @@ Helpers para trabajar con Google Cloud Vision:
   de Google Cloud Vision (desde archivo local o desde variable de entorno).
 - extraer_texto_imagen_vision(): dado un path de imagen, devuelve el texto
   detectado usando Vision (document_text_detection).
+- extraer_textos_imagenes_vision(): OCR de muchas imágenes a la vez, con
+  varias peticiones en vuelo (acotadas) y varias imágenes por petición
+  (batch_annotate_images).
+- extraer_textos_contenidos_vision(): lo mismo con imágenes ya en memoria
+  (p. ej. las extraídas de las páginas escaneadas de un PDF).
+- crear_cache_ocr(): caché en disco de los textos ya extraídos, por
+  xxhash de los bytes de la imagen y tipo de detección; con ella, la misma
+  imagen no vuelve a enviarse a Vision (la compartida por el proceso se
+  pide a src.recursos.obtener_cache_ocr).
+- preprocesar_imagen(): reduce, pasa a grises y recomprime la imagen antes
+  de enviarla (las fotos de móvil pesan varios MB y Vision no necesita tanto).
 """
 
+import io
 import os
 import json
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass
 from pathlib import Path
+from typing import Iterator, List, Optional, Tuple, Union
 
 from dotenv import load_dotenv
 # from google.cloud import vision_v1 as vision <- NO FUNCIONA EN RAILWAY
 from google.cloud import vision #NUEVO
 from google.oauth2 import service_account
+from PIL import Image, ImageOps
+
+from src.cache_disco import CacheDisco
+from src.huellas import hash_bytes_128
+from src.pipeline_ingesta import mapa_ordenado
 
 # Cargar variables desde .env (solo tiene efecto en local)
 load_dotenv()
 
+# Límite de imágenes por petición de batch_annotate_images en la API síncrona
+MAX_IMAGENES_POR_PETICION = 16
+
+# Detección que se pide a Vision (forma parte de la clave de caché)
+TIPO_DETECCION = vision.Feature.Type.DOCUMENT_TEXT_DETECTION
+
+
+@dataclass
+class CacheOcrConfig:
+    ruta: str = os.getenv("OCR_CACHE", "data/.cache_ocr.sqlite3")
+    # Tamaño máximo en MB (0 = sin caché)
+    max_mb: int = int(os.getenv("OCR_CACHE_MB", "64"))
+
+
+def crear_cache_ocr(config: Optional[CacheOcrConfig] = None) -> Optional[CacheDisco]:
+    """
+    Caché de OCR en disco (OCR_CACHE, OCR_CACHE_MB; 0 MB la desactiva y
+    devuelve None).
+    """
+    config = config or CacheOcrConfig()
+    if config.max_mb <= 0:
+        return None
+    return CacheDisco(config.ruta, config.max_mb * 1024 * 1024)
+
+
+# Al decodificar JPEG reducido, el lado mayor puede quedar hasta en este
+# factor de lado_max sin redimensionar después
+_MARGEN_DRAFT = 0.75
+
+
+@dataclass
+class PreprocesadoOcrConfig:
+    # Reducir, pasar a grises y recomprimir las imágenes antes de enviarlas a Vision (1/0)
+    activo: bool = os.getenv("OCR_PREPROCESAR", "1") == "1"
+    # Lado mayor máximo (px) de la imagen enviada
+    lado_max: int = int(os.getenv("OCR_LADO_MAX", "2048"))
+    # Calidad JPEG de la imagen enviada
+    calidad_jpeg: int = int(os.getenv("OCR_CALIDAD_JPEG", "85"))
+
+    def etiqueta(self) -> str:
+        """
+        Identifica el preprocesado en la clave de caché: el texto de Vision
+        depende de la imagen que se envía, no solo de la original.
+        """
+        return f"gris{self.lado_max}q{self.calidad_jpeg}" if self.activo else "original"
+
+
+def preprocesar_imagen(contenido: bytes, config: PreprocesadoOcrConfig) -> bytes:
+    """
+    Prepara una imagen para Vision: aplica la orientación EXIF, deja el
+    lado mayor en config.lado_max como máximo, pasa a escala de grises y recomprime en
+    JPEG sin metadatos (EXIF, perfiles de color, miniaturas).
+
+    Devuelve el original si el preprocesado está desactivado, si la imagen
+    no se puede decodificar o si el resultado no ocupa menos.
+    """
+    if not config.activo:
+        return contenido
+
+    try:
+        with Image.open(io.BytesIO(contenido)) as imagen:
+            escala = config.lado_max / max(imagen.size)
+            if escala < 1:
+                # JPEG: decodificar ya reducido (1/2, 1/4, 1/8) ahorra casi todo el
+                # coste y, si queda entre el 75 % y el 100 % de lado_max, evita
+                # además redimensionar (una foto de 4032 px se decodifica a 2016)
+                escala *= _MARGEN_DRAFT
+                imagen.draft("L", (int(imagen.width * escala), int(imagen.height * escala)))
+
+            ImageOps.exif_transpose(imagen, in_place=True)
+            if imagen.mode in ("RGBA", "LA", "PA") or "transparency" in imagen.info:
+                # Lo transparente, a blanco (en gris quedaría negro y taparía el texto)
+                fondo = Image.new("RGBA", imagen.size, "white")
+                fondo.alpha_composite(imagen.convert("RGBA"))
+                imagen = fondo
+            imagen = imagen.convert("L")
+            imagen.thumbnail((config.lado_max, config.lado_max), Image.Resampling.BICUBIC)
+
+            salida = io.BytesIO()
+            # Sin optimize: ahorra ~5 % de bytes pero cuesta tanto como la codificación
+            imagen.save(salida, format="JPEG", quality=config.calidad_jpeg)
+    except Exception as e:
+        print(f"[VISION][WARN] No se pudo preprocesar la imagen, se envía la original: {e}")
+        return contenido
+
+    procesada = salida.getvalue()
+    return procesada if len(procesada) < len(contenido) else contenido
+
+
+def _clave_cache(contenido: bytes, preprocesado: Optional[PreprocesadoOcrConfig]) -> str:
+    etiqueta = preprocesado.etiqueta() if preprocesado is not None else "original"
+    return f"vision:{TIPO_DETECCION.name}:{etiqueta}:{hash_bytes_128(contenido)}"
+
+
+def _imagen_vision(
+    contenido: bytes,
+    preprocesado: Optional[PreprocesadoOcrConfig],
+) -> vision.Image:
+    if preprocesado is not None:
+        contenido = preprocesar_imagen(contenido, preprocesado)
+    return vision.Image(content=contenido)
+
 
 def crear_cliente_vision() -> vision.ImageAnnotatorClient:
     """
@@ -69,10 +191,16 @@ def crear_cliente_vision() -> vision.ImageAnnotatorClient:
 def extraer_texto_imagen_vision(
     ruta_imagen: str,
     client: vision.ImageAnnotatorClient | None = None,
+    cache: Optional[CacheDisco] = None,
+    preprocesado: Optional[PreprocesadoOcrConfig] = None,
 ) -> str:
     """
     Extrae texto usando Google Vision (document_text_detection)
     a partir de una ruta local de imagen.
+
+    Con `cache`, una imagen con los mismos bytes que otra ya procesada
+    devuelve el texto guardado sin llamar a Vision. Con `preprocesado`, la
+    imagen se reduce y recomprime antes de enviarla (preprocesar_imagen).
     """
     from google.api_core.exceptions import GoogleAPIError
 
@@ -87,20 +215,19 @@ def extraer_texto_imagen_vision(
         with ruta.open("rb") as f:
             content = f.read()
 
-        image = vision.Image(content=content)
-        response = client.document_text_detection(image=image)
-
-        if response.error.message:
-            print(f"[VISION][ERROR] {response.error.message}")
-            return ""
+        clave = _clave_cache(content, preprocesado)
+        if cache is not None:
+            guardado = cache.obtener(clave)
+            if guardado is not None:
+                return guardado.decode("utf-8")
 
-        if response.full_text_annotation and response.full_text_annotation.text:
-            return response.full_text_annotation.text.strip()
+        response = client.document_text_detection(image=_imagen_vision(content, preprocesado))
 
-        if response.text_annotations:
-            return response.text_annotations[0].description.strip()
-
-        return ""
+        texto = _texto_de_respuesta(response)
+        # Los errores de Vision no se guardan: se reintentan la próxima vez
+        if texto is not None and cache is not None:
+            cache.guardar(clave, texto.encode("utf-8"))
+        return texto or ""
 
     except GoogleAPIError as e:
         print(f"[VISION][EXCEPTION] Error llamando a Vision API: {e}")
@@ -109,3 +236,159 @@ def extraer_texto_imagen_vision(
     except Exception as e:
         print(f"[VISION][EXCEPTION] Error inesperado: {e}")
         return ""
+
+
+
+def _texto_de_respuesta(response: vision.AnnotateImageResponse) -> Optional[str]:
+    """
+    Texto de una respuesta de Vision; None si Vision devolvió un error.
+    """
+    if response.error.message:
+        print(f"[VISION][ERROR] {response.error.message}")
+        return None
+
+    if response.full_text_annotation and response.full_text_annotation.text:
+        return response.full_text_annotation.text.strip()
+
+    if response.text_annotations:
+        return response.text_annotations[0].description.strip()
+
+    return ""
+
+
+def _ocr_lote(
+    client: vision.ImageAnnotatorClient,
+    imagenes: List[Union[str, bytes]],
+    cache: Optional[CacheDisco] = None,
+    preprocesado: Optional[PreprocesadoOcrConfig] = None,
+) -> List[Optional[str]]:
+    """
+    Una sola petición batch_annotate_images para todas las imágenes del lote
+    (rutas o bytes; solo las que no estén en `cache`; si están todas,
+    ninguna petición).
+    """
+    contenidos = []
+    for imagen in imagenes:
+        if isinstance(imagen, bytes):
+            contenidos.append(imagen)
+            continue
+        with open(imagen, "rb") as f:
+            contenidos.append(f.read())
+
+    claves = [_clave_cache(c, preprocesado) for c in contenidos] if cache is not None else []
+    guardados = cache.obtener_varios(claves) if cache is not None else {}
+
+    textos: List[Optional[str]] = [None] * len(imagenes)
+    pendientes: List[int] = []
+    for i in range(len(imagenes)):
+        if cache is not None and claves[i] in guardados:
+            textos[i] = guardados[claves[i]].decode("utf-8")
+        else:
+            pendientes.append(i)
+
+    if not pendientes:
+        return textos
+
+    solicitudes = [
+        vision.AnnotateImageRequest(
+            image=_imagen_vision(contenidos[i], preprocesado),
+            features=[vision.Feature(type_=TIPO_DETECCION)],
+        )
+        for i in pendientes
+    ]
+    respuesta = client.batch_annotate_images(requests=solicitudes)
+
+    nuevos = []
+    for i, r in zip(pendientes, respuesta.responses):
+        textos[i] = _texto_de_respuesta(r)
+        if textos[i] is not None and cache is not None:
+            nuevos.append((claves[i], textos[i].encode("utf-8")))
+    if nuevos:
+        cache.guardar_varios(nuevos)
+    return textos
+
+
+def extraer_textos_imagenes_vision(
+    rutas: List[str],
+    client: vision.ImageAnnotatorClient | None = None,
+    max_concurrencia: int = 4,
+    imagenes_por_lote: int = 4,
+    cache: Optional[CacheDisco] = None,
+    preprocesado: Optional[PreprocesadoOcrConfig] = None,
+) -> Iterator[Tuple[str, Optional[str]]]:
+    """
+    OCR de varias imágenes con Google Vision.
+
+    - Agrupa las imágenes en peticiones de `imagenes_por_lote` (máx. 16).
+    - Mantiene como mucho `max_concurrencia` peticiones en vuelo (hilos).
+    - Con `cache`, las imágenes ya procesadas no se envían a Vision.
+    - Con `preprocesado`, cada imagen se reduce y recomprime antes de
+      enviarla (en los hilos de las peticiones).
+
+    Genera (ruta, texto) en el orden de `rutas`. texto=None si Vision falló
+    para esa imagen (a diferencia de extraer_texto_imagen_vision, que devuelve ""),
+    para que quien llama pueda reintentarla más adelante.
+    """
+    return _ocr_en_paralelo(
+        rutas, client, max_concurrencia, imagenes_por_lote, cache, preprocesado
+    )
+
+
+def extraer_textos_contenidos_vision(
+    contenidos: List[bytes],
+    client: vision.ImageAnnotatorClient | None = None,
+    max_concurrencia: int = 4,
+    imagenes_por_lote: int = 4,
+    cache: Optional[CacheDisco] = None,
+    preprocesado: Optional[PreprocesadoOcrConfig] = None,
+) -> List[Optional[str]]:
+    """
+    Como extraer_textos_imagenes_vision, pero con los bytes de cada imagen
+    en lugar de su ruta. Devuelve un texto (o None si Vision falló) por
+    imagen, en el mismo orden.
+    """
+    return [
+        texto
+        for _, texto in _ocr_en_paralelo(
+            contenidos, client, max_concurrencia, imagenes_por_lote, cache, preprocesado
+        )
+    ]
+
+
+def _ocr_en_paralelo(
+    imagenes: List[Union[str, bytes]],
+    client: vision.ImageAnnotatorClient | None,
+    max_concurrencia: int,
+    imagenes_por_lote: int,
+    cache: Optional[CacheDisco],
+    preprocesado: Optional[PreprocesadoOcrConfig],
+) -> Iterator[Tuple[Union[str, bytes], Optional[str]]]:
+    from google.api_core.exceptions import GoogleAPIError
+
+    if not imagenes:
+        return
+
+    if client is None:
+        client = crear_cliente_vision()
+
+    tam_lote = max(1, min(imagenes_por_lote, MAX_IMAGENES_POR_PETICION))
+    lotes = [imagenes[i : i + tam_lote] for i in range(0, len(imagenes), tam_lote)]
+
+    with ThreadPoolExecutor(max_workers=max(1, max_concurrencia)) as pool:
+        futuros = mapa_ordenado(
+            pool,
+            _ocr_lote,
+            ((client, lote, cache, preprocesado) for lote in lotes),
+            en_vuelo=max_concurrencia,
+        )
+        for lote, futuro in zip(lotes, futuros):
+            try:
+                textos = futuro.result()
+            except GoogleAPIError as e:
+                print(f"[VISION][EXCEPTION] Error llamando a Vision API: {e}")
+                textos = [None] * len(lote)
+            except Exception as e:
+                print(f"[VISION][EXCEPTION] Error inesperado: {e}")
+                textos = [None] * len(lote)
+
+            yield from zip(lote, textos)
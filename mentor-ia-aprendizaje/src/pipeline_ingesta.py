@@ -0,0 +1,199 @@
+"""
+pipeline_ingesta.py
+
+Piezas para la ingesta en streaming de AgenteExtraccion:
+
+- IngestaConfig: tamaños de lote y de cola y presupuestos por documento
+  (configurables por .env).
+- EstadisticasIngesta: documentos, páginas (y cuántas con OCR), chunks y
+  bytes procesados.
+- en_segundo_plano(): ejecuta una etapa (generador) en un hilo y la
+  conecta con la siguiente mediante una cola acotada.
+- mapa_ordenado(): reparte tareas en un pool (hilos o procesos) con un
+  máximo de tareas en vuelo y devuelve los resultados en orden.
+- ProgresoIngesta / IngestaCancelada: avisos de progreso por archivo y
+  etapa, y cancelación de una ingesta en curso.
+
+Con esto la ingesta es una cadena leer → chunkear → embeddings → upsert
+en la que cada etapa solo tiene en memoria unos pocos elementos, sin
+importar el tamaño de la carpeta.
+"""
+
+import os
+import queue
+import threading
+from collections import deque
+from concurrent.futures import Executor, Future
+from dataclasses import asdict, dataclass
+from typing import Any, Callable, Deque, Dict, Iterable, Iterator, Tuple, TypeVar
+
+T = TypeVar("T")
+
+
+@dataclass
+class IngestaConfig:
+    # Tokens estimados por chunk y tokens de frases repetidas entre chunks consecutivos
+    tokens_por_chunk: int = int(os.getenv("INGESTA_TOKENS_POR_CHUNK", "256"))
+    solapamiento_tokens: int = int(os.getenv("INGESTA_SOLAPAMIENTO_TOKENS", "32"))
+    # Chunks por llamada a embed_documents al empezar (luego se adapta) y máximo
+    lote_embeddings: int = int(os.getenv("INGESTA_LOTE_EMBEDDINGS", "64"))
+    lote_embeddings_max: int = int(os.getenv("INGESTA_LOTE_EMBEDDINGS_MAX", "100"))
+    # Latencia (s) por petición de embeddings por encima de la cual se reduce el lote
+    latencia_objetivo_embeddings: float = float(
+        os.getenv("INGESTA_LATENCIA_OBJETIVO_EMBEDDINGS", "2.0")
+    )
+    # Intentos por petición de embeddings ante 429 / timeouts / 5xx
+    intentos_embeddings: int = int(os.getenv("INGESTA_INTENTOS_EMBEDDINGS", "6"))
+    # Puntos por llamada a client.upsert
+    lote_upsert: int = int(os.getenv("INGESTA_LOTE_UPSERT", "128"))
+    # Elementos máximos en cada cola entre etapas
+    tam_cola: int = int(os.getenv("INGESTA_TAM_COLA", "4"))
+    # Omitir chunks duplicados o casi duplicados (MinHash) y umbral de similitud
+    deduplicar: bool = os.getenv("INGESTA_DEDUPLICAR", "1") == "1"
+    umbral_duplicados: float = float(os.getenv("INGESTA_UMBRAL_DUPLICADOS", "0.85"))
+    # Procesos para extraer texto de PDFs (1 = sin pool, en el propio proceso)
+    procesos_pdf: int = int(os.getenv("INGESTA_PROCESOS_PDF", str(os.cpu_count() or 1)))
+    # Páginas por tarea al repartir un PDF grande entre procesos
+    paginas_por_tarea: int = int(os.getenv("INGESTA_PAGINAS_POR_TAREA", "8"))
+    # Peticiones a Vision en vuelo a la vez, e imágenes por petición (máx. 16)
+    concurrencia_ocr: int = int(os.getenv("INGESTA_CONCURRENCIA_OCR", "4"))
+    imagenes_por_lote_ocr: int = int(os.getenv("INGESTA_IMAGENES_POR_LOTE_OCR", "4"))
+    # OCR con Vision de las páginas de PDF sin capa de texto (escaneadas), a partir
+    # de sus imágenes; las páginas con texto nunca se envían a Vision
+    ocr_pdf: bool = os.getenv("INGESTA_OCR_PDF", "1") == "1"
+    # Presupuestos por documento (0 = sin límite): al superarlos se avisa,
+    # se cuenta como recortado y se ingesta solo hasta ahí
+    max_chunks_documento: int = int(os.getenv("INGESTA_MAX_CHUNKS_DOCUMENTO", "0"))
+    max_paginas_documento: int = int(os.getenv("INGESTA_MAX_PAGINAS_DOCUMENTO", "0"))
+
+
+@dataclass
+class EstadisticasIngesta:
+    documentos: int = 0
+    documentos_recortados: int = 0
+    paginas: int = 0
+    paginas_ocr: int = 0
+    chunks: int = 0
+    bytes_archivos: int = 0
+    bytes_texto: int = 0
+    segundos: float = 0.0
+
+    def como_dict(self) -> Dict[str, Any]:
+        datos: Dict[str, Any] = asdict(self)
+        datos["segundos"] = round(self.segundos, 2)
+        if self.segundos > 0:
+            datos["chunks_por_segundo"] = round(self.chunks / self.segundos, 1)
+            datos["mb_texto_por_segundo"] = round(
+                self.bytes_texto / (1024 * 1024) / self.segundos, 2
+            )
+        return datos
+
+
+# Etapas por las que pasa cada archivo, en orden
+ETAPAS = ("extraido", "chunkeado", "embebido", "subido")
+
+
+class IngestaCancelada(Exception):
+    """
+    Se lanza dentro de la ingesta cuando se pidió cancelarla.
+    """
+
+
+class ProgresoIngesta:
+    """
+    Recibe los avances de la ingesta. Esta implementación no hace nada;
+    GestorTrabajos la extiende para guardar el progreso y pedir la cancelación.
+    """
+
+    def etapa(self, ruta: str, etapa: str) -> None:
+        """
+        El archivo `ruta` completó `etapa` (una de ETAPAS).
+        """
+
+    def cancelado(self) -> bool:
+        return False
+
+
+class _ErrorEtapa:
+    def __init__(self, error: BaseException) -> None:
+        self.error = error
+
+
+_FIN = object()
+
+
+def en_segundo_plano(iterable: Iterable[T], tam_cola: int) -> Iterator[T]:
+    """
+    Consume `iterable` en un hilo aparte y entrega sus elementos a través
+    de una cola de tamaño `tam_cola`.
+
+    - Si la etapa productora lanza una excepción, se relanza en el consumidor.
+    - Si el consumidor deja de iterar (error, cancelación), el productor se
+      detiene en cuanto intenta poner el siguiente elemento.
+    """
+    cola: "queue.Queue[object]" = queue.Queue(maxsize=max(1, tam_cola))
+    detener = threading.Event()
+
+    def poner(item: object) -> bool:
+        while not detener.is_set():
+            try:
+                cola.put(item, timeout=0.1)
+                return True
+            except queue.Full:
+                continue
+        return False
+
+    def productor() -> None:
+        try:
+            for item in iterable:
+                if not poner(item):
+                    break
+            else:
+                poner(_FIN)
+        except BaseException as e:  # se relanza en el hilo consumidor
+            poner(_ErrorEtapa(e))
+        finally:
+            cerrar = getattr(iterable, "close", None)
+            if cerrar is not None:
+                cerrar()
+
+    hilo = threading.Thread(target=productor, daemon=True)
+    hilo.start()
+
+    try:
+        while True:
+            item = cola.get()
+            if item is _FIN:
+                return
+            if isinstance(item, _ErrorEtapa):
+                raise item.error
+            yield item  # type: ignore[misc]
+    finally:
+        detener.set()
+
+
+
+def mapa_ordenado(
+    executor: Executor,
+    funcion: Callable[..., T],
+    tareas: Iterable[Tuple[Any, ...]],
+    en_vuelo: int,
+) -> Iterator["Future[T]"]:
+    """
+    Envía `funcion(*args)` al executor por cada tupla de `tareas`, con como
+    mucho `en_vuelo` tareas pendientes, y devuelve los futures en el mismo
+    orden en que se enviaron (el consumidor llama a .result()).
+
+    Si el consumidor deja de iterar, se cancelan las tareas aún no iniciadas.
+    """
+    pendientes: Deque["Future[T]"] = deque()
+    try:
+        for args in tareas:
+            pendientes.append(executor.submit(funcion, *args))
+            if len(pendientes) >= max(1, en_vuelo):
+                yield pendientes.popleft()
+        while pendientes:
+            yield pendientes.popleft()
+    finally:
+        for futuro in pendientes:
+            futuro.cancel()
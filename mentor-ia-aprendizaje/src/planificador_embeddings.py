@@ -0,0 +1,171 @@
+"""
+planificador_embeddings.py
+
+Llamadas a embed_documents con tamaño de lote adaptativo y reintentos.
+
+- El lote crece poco a poco mientras las peticiones respondan por debajo de
+  la latencia objetivo, y se reduce si van lentas o a la mitad si la API
+  limita (429) o se agota el tiempo (AIMD, como el control de congestión de TCP).
+- Los errores transitorios se reintentan con backoff exponencial con jitter
+  (tenacity); los demás se propagan al momento.
+- Lleva la cuenta de chunks, tiempo y reintentos para informar de chunks/s.
+"""
+
+import time
+from typing import Dict, List
+
+from langchain_core.embeddings import Embeddings
+from tenacity import (
+    RetryCallState,
+    Retrying,
+    retry_if_exception,
+    stop_after_attempt,
+    wait_random_exponential,
+)
+
+# Textos que caben en una petición batchEmbedContents de Gemini
+MAX_TEXTOS_POR_PETICION = 100
+
+# Errores de google.api_core que indican un fallo transitorio
+_ERRORES_TRANSITORIOS = {
+    "ResourceExhausted",
+    "TooManyRequests",
+    "ServiceUnavailable",
+    "DeadlineExceeded",
+    "InternalServerError",
+    "GatewayTimeout",
+}
+_CODIGOS_TRANSITORIOS = {429, 500, 503, 504}
+_PISTAS_TRANSITORIAS = ("429", "resource_exhausted", "rate limit", "quota", "timeout", "timed out")
+
+
+def es_error_transitorio(error: BaseException) -> bool:
+    """
+    True si el error (o alguno de su cadena de causas) es un límite de tasa,
+    un timeout o un error 5xx que merece reintentarse.
+
+    langchain-google-genai envuelve los errores de la API en
+    GoogleGenerativeAIError, así que se revisa la cadena completa.
+    """
+    vistos = set()
+    actual = error
+    while actual is not None and id(actual) not in vistos:
+        vistos.add(id(actual))
+
+        if isinstance(actual, (TimeoutError, ConnectionError)):
+            return True
+        if type(actual).__name__ in _ERRORES_TRANSITORIOS:
+            return True
+        if getattr(actual, "code", None) in _CODIGOS_TRANSITORIOS:
+            return True
+        mensaje = str(actual).lower()
+        if any(pista in mensaje for pista in _PISTAS_TRANSITORIAS):
+            return True
+
+        actual = actual.__cause__ or actual.__context__
+    return False
+
+
+class PlanificadorEmbeddings:
+    def __init__(
+        self,
+        modelo: Embeddings,
+        lote_inicial: int = 64,
+        lote_min: int = 8,
+        lote_max: int = MAX_TEXTOS_POR_PETICION,
+        latencia_objetivo: float = 2.0,
+        max_intentos: int = 6,
+        espera_max: float = 60.0,
+    ) -> None:
+        self.modelo = modelo
+        self.lote_min = max(1, lote_min)
+        self.lote_max = max(self.lote_min, lote_max)
+        self.lote = min(max(lote_inicial, self.lote_min), self.lote_max)
+        self.latencia_objetivo = latencia_objetivo
+        self.max_intentos = max_intentos
+        self.espera_max = espera_max
+        # Incremento aditivo del lote tras una petición rápida
+        self._paso = max(1, self.lote_min // 2)
+        self.reiniciar_estadisticas()
+
+    # ---------------------------------------------------------
+    #  API
+    # ---------------------------------------------------------
+    def embeber(self, textos: List[str]) -> List[List[float]]:
+        """
+        Devuelve los embeddings de `textos`, en orden, partiéndolos en
+        peticiones del tamaño de lote actual.
+        """
+        inicio = time.perf_counter()
+        vectores: List[List[float]] = []
+
+        i = 0
+        while i < len(textos):
+            for intento in Retrying(
+                retry=retry_if_exception(es_error_transitorio),
+                wait=wait_random_exponential(multiplier=1, max=self.espera_max),
+                stop=stop_after_attempt(self.max_intentos),
+                before_sleep=self._avisar_reintento,
+                reraise=True,
+            ):
+                with intento:
+                    # El lote se recalcula en cada intento: tras un 429 ya es menor
+                    parte = textos[i : i + self.lote]
+                    nuevos = self._llamar(parte)
+            vectores.extend(nuevos)
+            i += len(parte)
+
+        self.chunks += len(textos)
+        self.segundos += time.perf_counter() - inicio
+        return vectores
+
+    def estadisticas(self) -> Dict[str, float]:
+        return {
+            "chunks": self.chunks,
+            "peticiones": self.peticiones,
+            "reintentos": self.reintentos,
+            "segundos": round(self.segundos, 2),
+            "chunks_por_segundo": round(self.chunks_por_segundo(), 1),
+            "lote": self.lote,
+        }
+
+    def chunks_por_segundo(self) -> float:
+        return self.chunks / self.segundos if self.segundos > 0 else 0.0
+
+    def reiniciar_estadisticas(self) -> None:
+        self.chunks = 0
+        self.peticiones = 0
+        self.reintentos = 0
+        self.segundos = 0.0
+
+    # ---------------------------------------------------------
+    #  INTERNOS
+    # ---------------------------------------------------------
+    def _llamar(self, textos: List[str]) -> List[List[float]]:
+        t0 = time.perf_counter()
+        self.peticiones += 1
+        try:
+            vectores = self.modelo.embed_documents(textos)
+        except Exception as e:
+            if es_error_transitorio(e):
+                # Reducción multiplicativa ante límite de tasa o timeout
+                self.lote = max(self.lote_min, self.lote // 2)
+            raise
+        latencia = time.perf_counter() - t0
+
+        if latencia <= self.latencia_objetivo:
+            if len(textos) >= self.lote:
+                self.lote = min(self.lote_max, self.lote + self._paso)
+        else:
+            self.lote = max(self.lote_min, int(self.lote * 0.8))
+        return vectores
+
+    def _avisar_reintento(self, estado: RetryCallState) -> None:
+        self.reintentos += 1
+        error = estado.outcome.exception() if estado.outcome else None
+        espera = estado.next_action.sleep if estado.next_action else 0
+        print(
+            f"[WARN] Embeddings: error transitorio ({type(error).__name__}), "
+            f"reintento {estado.attempt_number}/{self.max_intentos - 1} en {espera:.1f} s "
+            f"con lote {self.lote}."
+        )
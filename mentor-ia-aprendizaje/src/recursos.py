@@ -0,0 +1,145 @@
+"""
+recursos.py
+
+Registro de los clientes caros de crear, compartidos por todo el proceso:
+un cliente de Qdrant (y uno asíncrono para los endpoints async), un modelo
+de embeddings, un cliente de Vision, la caché de OCR, el almacén de textos
+de los chunks y un LLM por configuración (modelo, temperatura).
+
+Los agentes y los endpoints de app.py los piden aquí en lugar de crear
+los suyos: se abren menos conexiones TCP/TLS (y Qdrant reutiliza las de
+su pool), la caché de embeddings se abre una sola vez y el arranque no
+repite la comprobación de versión de Qdrant por cada agente.
+
+Todos son seguros para usarse desde varios hilos a la vez (httpx, gRPC,
+los clientes de Google y las bases SQLite con su lock lo son), que es como
+los usan FastAPI y la ingesta.
+"""
+
+import os
+import threading
+from dataclasses import dataclass
+from typing import Any, Callable, Dict, Hashable, Optional, Tuple
+
+from dotenv import load_dotenv
+from google.cloud import vision
+from langchain_core.embeddings import Embeddings
+from langchain_google_genai import ChatGoogleGenerativeAI
+from qdrant_client import AsyncQdrantClient, QdrantClient
+
+from src.embeddings import (
+    MODELO_EMBEDDINGS,
+    ConexionQdrantConfig,
+    crear_cliente_qdrant,
+    crear_cliente_qdrant_async,
+    crear_modelo_embeddings,
+)
+from src.almacen_textos import AlmacenTextos, AlmacenTextosConfig, crear_almacen_textos
+from src.cache_disco import CacheDisco
+from src.ocr_vision import CacheOcrConfig, crear_cache_ocr, crear_cliente_vision
+
+load_dotenv()
+
+MODELO_LLM = "gemini-flash-latest"
+
+
+@dataclass
+class RecursosConfig:
+    # Conexiones HTTP máximas del cliente de Qdrant compartido (0 = las de httpx por defecto)
+    qdrant_pool: int = int(os.getenv("QDRANT_POOL_SIZE", "16"))
+    # Canales gRPC del cliente de Qdrant con QDRANT_PREFER_GRPC=1 (0 = los de qdrant-client
+    # por defecto): cada canal multiplexa muchas peticiones en una conexión HTTP/2
+    qdrant_pool_grpc: int = int(os.getenv("QDRANT_GRPC_POOL_SIZE", "0"))
+
+    def pool_qdrant(self, conexion: ConexionQdrantConfig) -> Optional[int]:
+        """
+        pool_size para crear_cliente_qdrant según el transporte (None = por defecto).
+        """
+        return (self.qdrant_pool_grpc if conexion.prefer_grpc else self.qdrant_pool) or None
+
+
+_recursos: Dict[Tuple[Hashable, ...], Any] = {}
+_recursos_lock = threading.Lock()
+
+
+def _obtener(clave: Tuple[Hashable, ...], crear: Callable[[], Any]) -> Any:
+    with _recursos_lock:
+        if clave not in _recursos:
+            _recursos[clave] = crear()
+        return _recursos[clave]
+
+
+def obtener_cliente_qdrant() -> QdrantClient:
+    """
+    Cliente de Qdrant compartido (QDRANT_URL, QDRANT_API_KEY, REST o gRPC
+    según QDRANT_PREFER_GRPC), con un pool de hasta QDRANT_POOL_SIZE conexiones
+    HTTP o QDRANT_GRPC_POOL_SIZE canales gRPC.
+    """
+    conexion = ConexionQdrantConfig()
+    pool = RecursosConfig().pool_qdrant(conexion)
+    clave = ("qdrant", conexion.url, conexion.api_key, conexion.prefer_grpc, pool)
+    return _obtener(clave, lambda: crear_cliente_qdrant(pool, conexion))
+
+
+def obtener_cliente_qdrant_async() -> AsyncQdrantClient:
+    """
+    Cliente asíncrono de Qdrant compartido por los endpoints `async def` de
+    la app. Solo debe usarse desde el bucle de eventos de la app (uvicorn).
+    """
+    conexion = ConexionQdrantConfig()
+    pool = RecursosConfig().pool_qdrant(conexion)
+    clave = ("qdrant_async", conexion.url, conexion.api_key, conexion.prefer_grpc, pool)
+    return _obtener(clave, lambda: crear_cliente_qdrant_async(pool, conexion))
+
+
+def obtener_modelo_embeddings() -> Embeddings:
+    """
+    Modelo de embeddings compartido, con su caché en disco.
+    """
+    return _obtener(("embeddings", MODELO_EMBEDDINGS), crear_modelo_embeddings)
+
+
+def obtener_cliente_vision() -> vision.ImageAnnotatorClient:
+    """
+    Cliente de Google Vision compartido (un solo canal gRPC).
+    """
+    return _obtener(("vision",), crear_cliente_vision)
+
+
+def obtener_cache_ocr() -> Optional[CacheDisco]:
+    """
+    Caché de OCR compartida (OCR_CACHE, OCR_CACHE_MB), o None si está
+    desactivada (OCR_CACHE_MB=0).
+    """
+    config = CacheOcrConfig()
+    return _obtener(("cache_ocr", config.ruta, config.max_mb), lambda: crear_cache_ocr(config))
+
+
+def obtener_almacen_textos() -> Optional[AlmacenTextos]:
+    """
+    Almacén de textos de los chunks compartido (ALMACEN_TEXTOS_RUTA), o None
+    si está desactivado (ALMACEN_TEXTOS=0): el texto va en el payload.
+    """
+    config = AlmacenTextosConfig()
+    clave = ("almacen_textos", config.activo, config.ruta, config.nivel_zstd)
+    return _obtener(clave, lambda: crear_almacen_textos(config))
+
+
+def obtener_llm(modelo: str = MODELO_LLM, temperatura: float = 0.7) -> ChatGoogleGenerativeAI:
+    """
+    LLM de Gemini compartido por todos los que piden el mismo modelo y la
+    misma temperatura.
+    """
+
+    def crear() -> ChatGoogleGenerativeAI:
+        api_key = os.getenv("GOOGLE_API_KEY") or os.getenv("GEMINI_API_KEY")
+        if not api_key:
+            raise ValueError("Falta GOOGLE_API_KEY o GEMINI_API_KEY en el archivo .env")
+        return ChatGoogleGenerativeAI(
+            model=modelo,
+            google_api_key=api_key,
+            temperature=temperatura,
+        )
+
+    return _obtener(("llm", modelo, temperatura), crear)
+
@@ -68,9 +68,11 @@ Funciones para realizar búsquedas por similitud en la base vectorial.
 
 # src/similitud.py
 
-from typing import List
-from qdrant_client import QdrantClient
-from qdrant_client.models import ScoredPoint
+from typing import List, Optional
+from qdrant_client import AsyncQdrantClient, QdrantClient
+from qdrant_client.models import ScoredPoint, SearchParams
+
+from src.almacen_textos import AlmacenTextos, completar_textos
 
 
 def buscar_similares(
@@ -78,10 +80,18 @@ def buscar_similares(
     collection_name: str,
     query_vector: List[float],
     top_k: int = 5,
+    almacen_textos: Optional[AlmacenTextos] = None,
+    search_params: Optional[SearchParams] = None,
 ) -> List[ScoredPoint]:
     """
     Realiza una búsqueda de los vectores más similares a query_vector
     en la colección indicada usando la API moderna de Qdrant (query_points).
+
+    Con `almacen_textos`, el texto de los puntos que no lo llevan en el
+    payload se trae del almacén (una consulta para los top_k).
+
+    `search_params` (VectorConfig.parametros_busqueda()) fija el
+    sobremuestreo y la reevaluación si la colección está cuantizada.
     """
 
     # En Qdrant moderno la forma recomendada de búsqueda es query_points
@@ -89,9 +99,40 @@ def buscar_similares(
         collection_name=collection_name,
         query=query_vector,   # vector denso
         limit=top_k,
+        search_params=search_params,
         with_payload=True,
         with_vectors=False,
     )
 
     # response es un QueryResponse; los resultados están en .points
+    completar_textos(response.points, almacen_textos)
+    return response.points
+
+
+
+async def buscar_similares_async(
+    client: AsyncQdrantClient,
+    collection_name: str,
+    query_vector: List[float],
+    top_k: int = 5,
+    almacen_textos: Optional[AlmacenTextos] = None,
+    search_params: Optional[SearchParams] = None,
+) -> List[ScoredPoint]:
+    """
+    Como buscar_similares, pero con el cliente asíncrono: para los endpoints
+    `async def`, la espera a Qdrant no ocupa un hilo del pool de FastAPI.
+
+    El almacén de textos es un SQLite local (una consulta para los top_k),
+    así que se consulta sin salir del bucle de eventos.
+    """
+    response = await client.query_points(
+        collection_name=collection_name,
+        query=query_vector,
+        limit=top_k,
+        search_params=search_params,
+        with_payload=True,
+        with_vectors=False,
+    )
+
+    completar_textos(response.points, almacen_textos)
     return response.points
@@ -0,0 +1,157 @@
+# tests/test_agente_extraccion.py
+
+import contextlib
+import io
+import os
+import tempfile
+
+from qdrant_client import QdrantClient
+
+from src.agentes.agente_extraccion import AgenteExtraccion
+from src.benchmarks.embeddings_falsos import EmbeddingsFalsos
+from src.cache_disco import CacheDisco
+from src.embeddings import contar_por_valor
+from src.manifiesto import ManifiestoIngesta
+from src.pipeline_ingesta import IngestaConfig
+
+TEXTO = " ".join(
+    f"Frase número {i} de los apuntes, con texto suficiente para varios chunks." for i in range(80)
+)
+
+
+def _crear_agente(carpeta):
+    return AgenteExtraccion(
+        client=QdrantClient(":memory:"),
+        embeddings_model=EmbeddingsFalsos(),
+        vision_client=object(),
+        manifiesto=ManifiestoIngesta("documentos", os.path.join(carpeta, "manifiesto.json")),
+        ingesta_config=IngestaConfig(tokens_por_chunk=64, solapamiento_tokens=0, procesos_pdf=1),
+        cache_ocr=CacheDisco(os.path.join(carpeta, "ocr.sqlite3"), 1024 * 1024),
+    )
+
+
+def _escribir(ruta, texto):
+    with open(ruta, "w", encoding="utf-8") as f:
+        f.write(texto)
+
+
+def _silencio(funcion, *args):
+    with contextlib.redirect_stdout(io.StringIO()):
+        return funcion(*args)
+
+
+def _conteos(agente, campo):
+    return contar_por_valor(agente.client, agente.vector_config.collection_name, campo)
+
+
+def test_subida_identica_no_reembebe():
+    with tempfile.TemporaryDirectory() as carpeta:
+        agente = _crear_agente(carpeta)
+        original = os.path.join(carpeta, "original.txt")
+        copia = os.path.join(carpeta, "copia.txt")
+        _escribir(original, TEXTO)
+        _escribir(copia, TEXTO)
+
+        chunks = _silencio(agente.ingestar_archivo, original)
+        assert chunks > 1
+        textos_embebidos = agente.embeddings_model.textos
+
+        # Cada subida es una ingesta aparte: la copia se compara con lo ya indexado
+        assert _silencio(agente.ingestar_archivo, copia) == 0
+        assert agente.embeddings_model.textos == textos_embebidos
+        assert agente.manifiesto.fusionadas(original) == [copia]
+        assert _conteos(agente, "source_path") == {original: chunks}
+        # Sin puntos propios, sigue apareciendo como indexada a través del original
+        assert _conteos(agente, "fuentes_fusionadas") == {copia: chunks}
+
+        # Al borrar el original, la copia se reingesta con sus propios chunks
+        _silencio(agente.eliminar_documento, original)
+        assert _conteos(agente, "source_path") == {copia: chunks}
+        assert _conteos(agente, "fuentes_fusionadas") == {}
+        assert agente.manifiesto.rutas() == [copia]
+
+
+def _carpeta_docs(carpeta, nombres):
+    docs = os.path.join(carpeta, "docs")
+    os.makedirs(docs)
+    for i, nombre in enumerate(nombres):
+        # Textos distintos: sin chunks duplicados entre ellos
+        _escribir(os.path.join(docs, nombre), TEXTO.replace("Frase", f"Frase {nombre}"))
+    return docs
+
+
+def test_extension_en_mayusculas():
+    with tempfile.TemporaryDirectory() as carpeta:
+        agente = _crear_agente(carpeta)
+        docs = _carpeta_docs(carpeta, ["Notas.TXT", "Resumen.Md", "otro.txt", "imagen.gif"])
+        notas = os.path.join(docs, "Notas.TXT")
+
+        # La subida indexa el archivo con la extensión tal cual
+        _silencio(agente.ingestar_archivo, notas)
+        assert agente.tiene_chunks(notas)
+
+        # Las ingestas de la carpeta no lo dan por borrado
+        for _ in range(2):
+            _silencio(agente.ingestar_documentos, docs)
+            assert agente.tiene_chunks(notas)
+        assert sorted(agente.manifiesto.rutas()) == sorted(
+            os.path.join(docs, n) for n in ("Notas.TXT", "Resumen.Md", "otro.txt")
+        )
+
+
+def test_reconcilia_archivos_borrados():
+    with tempfile.TemporaryDirectory() as carpeta:
+        agente = _crear_agente(carpeta)
+        docs = _carpeta_docs(carpeta, ["a.txt", "b.txt"])
+        a, b = os.path.join(docs, "a.txt"), os.path.join(docs, "b.txt")
+
+        _silencio(agente.ingestar_documentos, docs)
+        chunks_a = _conteos(agente, "source_path")[a]
+        textos_embebidos = agente.embeddings_model.textos
+
+        os.remove(b)
+        assert _silencio(agente.ingestar_documentos, docs) == 0
+        assert _conteos(agente, "source_path") == {a: chunks_a}
+        assert agente.manifiesto.rutas() == [a]
+        # El archivo sin cambios no se vuelve a embeber
+        assert agente.embeddings_model.textos == textos_embebidos
+
+        # Con el manifiesto perdido, los borrados se encuentran en la colección
+        _escribir(b, TEXTO)
+        _silencio(agente.ingestar_documentos, docs)
+        agente.manifiesto = ManifiestoIngesta("documentos", os.path.join(carpeta, "nuevo.json"))
+        os.remove(b)
+        _silencio(agente.ingestar_documentos, docs)
+        assert _conteos(agente, "source_path") == {a: chunks_a}
+
+
+def test_eliminar_y_sincronizar():
+    with tempfile.TemporaryDirectory() as carpeta:
+        agente = _crear_agente(carpeta)
+        docs = _carpeta_docs(carpeta, ["a.txt", "b.txt"])
+        a, b = os.path.join(docs, "a.txt"), os.path.join(docs, "b.txt")
+        _silencio(agente.ingestar_documentos, docs)
+        chunks_a = _conteos(agente, "source_path")[a]
+
+        # eliminar_documento no toca el archivo en disco
+        assert _silencio(agente.eliminar_documento, a) == chunks_a
+        assert not agente.tiene_chunks(a) and os.path.exists(a)
+        assert agente.manifiesto.rutas() == [b]
+
+        # La vigilancia: las rutas que ya no existen se borran, las demás se ingestan
+        os.remove(b)
+        assert _silencio(agente.sincronizar_archivos, [a, b]) == chunks_a
+        assert _conteos(agente, "source_path") == {a: chunks_a}
+        assert agente.manifiesto.rutas() == [a]
+
+
+def main():
+    test_subida_identica_no_reembebe()
+    test_extension_en_mayusculas()
+    test_reconcilia_archivos_borrados()
+    test_eliminar_y_sincronizar()
+    print("OK")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,70 @@
+# tests/test_almacen_textos.py
+
+import os
+import tempfile
+import uuid
+from types import SimpleNamespace
+
+from src.almacen_textos import AlmacenTextos, completar_textos
+
+
+def test_guardar_y_leer():
+    with tempfile.TemporaryDirectory() as carpeta:
+        ruta = os.path.join(carpeta, "textos.sqlite3")
+        almacen = AlmacenTextos(ruta)
+        id_uuid = uuid.uuid4()
+        textos = {
+            "1": "Capítulo 1: ¿qué es la fotosíntesis? ñandú, café, 漢字 🌱",
+            str(id_uuid): "x" * 100_000,
+            "3": "",
+        }
+        almacen.guardar_varios(
+            [("1", "a.pdf", textos["1"]), (id_uuid, "a.pdf", textos[str(id_uuid)]), (3, "b.txt", "")]
+        )
+
+        # Los ids se comparan como texto; los que faltan no se devuelven
+        assert almacen.obtener_varios(["1", id_uuid, 3, "no-existe"]) == textos
+        # Comprimido: el texto repetido ocupa mucho menos
+        assert almacen.estadisticas()["bytes_comprimidos"] < 10_000
+
+        # Sobrescribir y reabrir
+        almacen.guardar_varios([("1", "a.pdf", "nuevo")])
+        assert AlmacenTextos(ruta).obtener_varios(["1"]) == {"1": "nuevo"}
+
+
+def test_borrados():
+    with tempfile.TemporaryDirectory() as carpeta:
+        almacen = AlmacenTextos(os.path.join(carpeta, "textos.sqlite3"))
+        almacen.guardar_varios(
+            [("1", "a.pdf", "uno"), ("2", "a.pdf", "dos"), ("3", "b.txt", "tres"), ("4", "c.md", "cuatro")]
+        )
+
+        almacen.conservar_solo("a.pdf", ["2"])
+        almacen.borrar(["3"])
+        almacen.borrar_fuentes(["c.md"])
+        assert almacen.obtener_varios(["1", "2", "3", "4"]) == {"2": "dos"}
+
+
+def test_completar_textos():
+    with tempfile.TemporaryDirectory() as carpeta:
+        almacen = AlmacenTextos(os.path.join(carpeta, "textos.sqlite3"))
+        almacen.guardar_varios([("1", "a.pdf", "del almacén")])
+        puntos = [
+            SimpleNamespace(id="1", payload={"source_path": "a.pdf"}),
+            # Punto antiguo con el texto en el payload: no se toca
+            SimpleNamespace(id="2", payload={"texto": "del payload"}),
+        ]
+
+        completar_textos(puntos, almacen)
+        assert [p.payload["texto"] for p in puntos] == ["del almacén", "del payload"]
+
+
+def main():
+    test_guardar_y_leer()
+    test_borrados()
+    test_completar_textos()
+    print("OK")
+
+
+if __name__ == "__main__":
+    main()
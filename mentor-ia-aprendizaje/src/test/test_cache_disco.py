@@ -0,0 +1,50 @@
+# tests/test_cache_disco.py
+
+import os
+import tempfile
+import time
+
+from src.cache_disco import CacheDisco
+
+
+def test_expulsa_las_menos_usadas():
+    with tempfile.TemporaryDirectory() as carpeta:
+        cache = CacheDisco(os.path.join(carpeta, "c.sqlite3"), max_bytes=300)
+        for clave in ("a", "b", "c"):
+            cache.guardar(clave, clave.encode() * 100)
+            time.sleep(0.01)
+
+        # Usar "a" la convierte en la más reciente. Al pasarse del máximo se
+        # expulsa hasta el 90% (270 bytes): primero "b", luego "c"
+        assert cache.obtener("a") == b"a" * 100
+        time.sleep(0.01)
+        cache.guardar("d", b"d" * 100)
+
+        assert cache.obtener_varios(["a", "b", "c", "d"]).keys() == {"a", "d"}
+        assert cache.estadisticas()["bytes"] == 200
+
+
+def test_persistencia_y_contadores():
+    with tempfile.TemporaryDirectory() as carpeta:
+        ruta = os.path.join(carpeta, "c.sqlite3")
+        cache = CacheDisco(ruta, max_bytes=1000)
+        cache.guardar_varios([("x", b"123"), ("y", b"4567")])
+        # Un valor mayor que la caché entera no se guarda
+        cache.guardar("enorme", b"0" * 1001)
+        cache.guardar("x", b"12")
+
+        reabierta = CacheDisco(ruta, max_bytes=1000)
+        assert reabierta.obtener_varios(["x", "y", "enorme"]) == {"x": b"12", "y": b"4567"}
+        estadisticas = reabierta.estadisticas()
+        assert (estadisticas["aciertos"], estadisticas["fallos"]) == (2, 1)
+        assert (estadisticas["entradas"], estadisticas["bytes"]) == (2, 6)
+
+
+def main():
+    test_expulsa_las_menos_usadas()
+    test_persistencia_y_contadores()
+    print("OK")
+
+
+if __name__ == "__main__":
+    main()
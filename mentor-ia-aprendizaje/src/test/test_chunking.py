@@ -0,0 +1,53 @@
+# tests/test_chunking.py
+
+import warnings
+
+from src.chunking import chunk_text, chunkear_paginas, estimar_tokens
+
+
+def test_palabra_mas_larga_que_el_chunk():
+    # Una cadena sin espacios (URL, base64...) más larga que el chunk entero
+    cadena = "x" * 5000
+    texto = f"Antes de la cadena. {cadena} Después de la cadena."
+
+    for max_tokens in (2, 16, 64, 256):
+        chunks = chunk_text(texto, max_tokens=max_tokens, overlap_tokens=0)
+        assert all(estimar_tokens(c) <= max_tokens for c in chunks), max_tokens
+        # No se pierde ningún carácter de la cadena
+        assert sum(c.count("x") for c in chunks) == len(cadena)
+
+
+def test_presupuesto_de_tokens():
+    parrafos = [
+        " ".join(f"Frase {p}-{i} con palabras de longitudes variadas y signos, ¿no?" for i in range(40))
+        for p in range(10)
+    ]
+    paginas = [(n, "\n\n".join(parrafos[n::3])) for n in range(3)]
+
+    for max_tokens, overlap_tokens in ((32, 8), (128, 16), (256, 32)):
+        for chunk, inicio, fin in chunkear_paginas(paginas, max_tokens, overlap_tokens):
+            assert chunk and estimar_tokens(chunk) <= max_tokens
+            assert inicio <= fin
+
+
+def test_parametros_antiguos_en_caracteres():
+    texto = " ".join(f"Frase {i} del texto de prueba." for i in range(200))
+
+    with warnings.catch_warnings(record=True) as avisos:
+        warnings.simplefilter("always")
+        chunks = chunk_text(texto, chunk_size=800, chunk_overlap=200)
+    assert any(issubclass(a.category, DeprecationWarning) for a in avisos)
+
+    assert chunks == chunk_text(texto, max_tokens=200, overlap_tokens=50)
+    assert all(len(c) <= 800 for c in chunks)
+
+
+def main():
+    test_palabra_mas_larga_que_el_chunk()
+    test_presupuesto_de_tokens()
+    test_parametros_antiguos_en_caracteres()
+    print("OK")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,110 @@
+# tests/test_manifiesto.py
+
+import json
+import os
+import tempfile
+from unittest import mock
+
+from src.manifiesto import ManifiestoIngesta
+
+
+def _escribir(ruta, texto):
+    with open(ruta, "w", encoding="utf-8") as f:
+        f.write(texto)
+
+
+def test_omite_sin_cambios_y_detecta_modificados():
+    with tempfile.TemporaryDirectory() as carpeta:
+        doc = os.path.join(carpeta, "a.txt")
+        _escribir(doc, "uno")
+        manifiesto = ManifiestoIngesta("col", os.path.join(carpeta, "m.json"))
+
+        entrada = manifiesto.revisar(doc)
+        assert entrada is not None
+        manifiesto.registrar(doc, entrada, ["id-1"])
+        assert manifiesto.revisar(doc) is None
+
+        # Mismo contenido con otro mtime: sigue sin cambios
+        st = os.stat(doc)
+        os.utime(doc, ns=(st.st_atime_ns, st.st_mtime_ns + 10**9))
+        assert manifiesto.revisar(doc) is None
+
+        _escribir(doc, "dos, más largo")
+        entrada = manifiesto.revisar(doc)
+        assert entrada is not None
+        manifiesto.registrar(doc, entrada, ["id-2"])
+        assert manifiesto.revisar(doc) is None
+        # forzar=True siempre devuelve entrada
+        assert manifiesto.revisar(doc, forzar=True) is not None
+
+
+def test_archivo_borrado_antes_de_revisar():
+    with tempfile.TemporaryDirectory() as carpeta:
+        manifiesto = ManifiestoIngesta("col", os.path.join(carpeta, "m.json"))
+        assert manifiesto.revisar(os.path.join(carpeta, "no-existe.txt")) is None
+
+
+def test_guardar_y_cargar_con_fusionadas():
+    with tempfile.TemporaryDirectory() as carpeta:
+        ruta = os.path.join(carpeta, "m.json")
+        doc = os.path.join(carpeta, "a.txt")
+        _escribir(doc, "uno")
+
+        manifiesto = ManifiestoIngesta("col", ruta)
+        manifiesto.registrar(doc, manifiesto.revisar(doc), ["id-1", "id-2"])
+        manifiesto.anotar_fusionadas(doc, ["b.txt", "c.txt"])
+        manifiesto.anotar_fusionadas(doc, ["b.txt"])
+        manifiesto.guardar()
+
+        cargado = ManifiestoIngesta("col", ruta)
+        assert cargado.chunk_ids(doc) == ["id-1", "id-2"]
+        assert cargado.fusionadas(doc) == ["b.txt", "c.txt"]
+        assert cargado.revisar(doc) is None
+
+        # Invalidar conserva los chunk ids para sustituirlos
+        cargado.invalidar(doc)
+        assert cargado.revisar(doc) is not None
+        assert cargado.chunk_ids(doc) == ["id-1", "id-2"]
+
+        # Otra colección: se empieza vacío
+        assert ManifiestoIngesta("otra", ruta).rutas() == []
+
+
+def test_guardado_atomico():
+    with tempfile.TemporaryDirectory() as carpeta:
+        ruta = os.path.join(carpeta, "m.json")
+        doc = os.path.join(carpeta, "a.txt")
+        _escribir(doc, "uno")
+
+        manifiesto = ManifiestoIngesta("col", ruta)
+        manifiesto.registrar(doc, manifiesto.revisar(doc), ["id-1"])
+        manifiesto.guardar()
+        with open(ruta, encoding="utf-8") as f:
+            antes = f.read()
+
+        # Un fallo al escribir deja intacto el manifiesto anterior y sin temporales
+        manifiesto.registrar(doc, manifiesto.revisar(doc, forzar=True), ["id-2"])
+        with mock.patch("src.manifiesto.json.dump", side_effect=OSError("disco lleno")):
+            try:
+                manifiesto.guardar()
+            except OSError:
+                pass
+            else:
+                raise AssertionError("guardar() debía propagar el error")
+
+        with open(ruta, encoding="utf-8") as f:
+            assert f.read() == antes
+        assert json.loads(antes)["archivos"][doc]["chunk_ids"] == ["id-1"]
+        assert sorted(os.listdir(carpeta)) == ["a.txt", "m.json"]
+
+
+def main():
+    test_omite_sin_cambios_y_detecta_modificados()
+    test_archivo_borrado_antes_de_revisar()
+    test_guardar_y_cargar_con_fusionadas()
+    test_guardado_atomico()
+    print("OK")
+
+
+if __name__ == "__main__":
+    main()
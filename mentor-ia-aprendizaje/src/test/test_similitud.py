@@ -0,0 +1,104 @@
+# tests/test_similitud.py
+
+import asyncio
+import os
+import tempfile
+from types import SimpleNamespace
+
+from qdrant_client import AsyncQdrantClient, QdrantClient
+from qdrant_client.models import Distance, PointStruct, VectorParams
+
+from src.agentes.agente_respuesta import AgenteRespuesta
+from src.almacen_textos import AlmacenTextos
+from src.benchmarks.embeddings_falsos import EmbeddingsFalsos
+from src.embeddings import VectorConfig
+from src.similitud import buscar_similares, buscar_similares_async
+
+TEXTOS = [f"Apuntes de fotosíntesis, parte {i}: clorofila y luz." for i in range(6)]
+
+
+class LLMFalso:
+    # Devuelve el prompt recibido: basta para comparar los dos caminos
+    def invoke(self, prompt):
+        return SimpleNamespace(content=prompt)
+
+    async def ainvoke(self, prompt):
+        return SimpleNamespace(content=prompt)
+
+
+def _puntos(embeddings):
+    # El punto 0 lleva el texto en el almacén, no en el payload
+    return [
+        PointStruct(
+            id=i,
+            vector=embeddings.embed_query(texto),
+            payload={"source_path": "a.txt", "chunk_index": i} | ({"texto": texto} if i else {}),
+        )
+        for i, texto in enumerate(TEXTOS)
+    ]
+
+
+def _clientes(coleccion, embeddings):
+    client = QdrantClient(":memory:")
+    client_async = AsyncQdrantClient(":memory:")
+    parametros = VectorParams(size=embeddings.dimension, distance=Distance.COSINE)
+    client.create_collection(coleccion, parametros)
+    client.upsert(coleccion, _puntos(embeddings))
+
+    async def preparar():
+        await client_async.create_collection(coleccion, parametros)
+        await client_async.upsert(coleccion, _puntos(embeddings))
+
+    asyncio.run(preparar())
+    return client, client_async
+
+
+def test_busqueda_async_igual_que_sincrona():
+    with tempfile.TemporaryDirectory() as carpeta:
+        embeddings = EmbeddingsFalsos(dimension=8)
+        client, client_async = _clientes("col", embeddings)
+        almacen = AlmacenTextos(os.path.join(carpeta, "textos.sqlite3"))
+        almacen.guardar_varios([(0, "a.txt", TEXTOS[0])])
+        consulta = embeddings.embed_query(TEXTOS[0])
+
+        sincronos = buscar_similares(client, "col", consulta, top_k=3, almacen_textos=almacen)
+        asincronos = asyncio.run(
+            buscar_similares_async(client_async, "col", consulta, top_k=3, almacen_textos=almacen)
+        )
+
+        assert [(p.id, round(p.score, 5)) for p in asincronos] == [
+            (p.id, round(p.score, 5)) for p in sincronos
+        ]
+        # El texto del punto 0 se completa desde el almacén
+        assert asincronos[0].id == 0 and asincronos[0].payload["texto"] == TEXTOS[0]
+
+
+def test_agente_respuesta_async():
+    with tempfile.TemporaryDirectory() as carpeta:
+        embeddings = EmbeddingsFalsos(dimension=8)
+        vector_config = VectorConfig()
+        client, client_async = _clientes(vector_config.collection_name, embeddings)
+
+        agente = AgenteRespuesta.__new__(AgenteRespuesta)
+        agente.vector_config = vector_config
+        agente.client = client
+        agente.client_async = client_async
+        agente.embeddings_model = embeddings
+        agente.almacen_textos = AlmacenTextos(os.path.join(carpeta, "textos.sqlite3"))
+        agente.llm = LLMFalso()
+
+        for pregunta in (TEXTOS[2], "Una pregunta sin relación"):
+            resultado = asyncio.run(agente.responder_async(pregunta))
+            assert resultado == agente.responder(pregunta)
+        assert resultado["origen"] == "modelo"
+        assert agente.responder(TEXTOS[2])["origen"] == "rag"
+
+
+def main():
+    test_busqueda_async_igual_que_sincrona()
+    test_agente_respuesta_async()
+    print("OK")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,116 @@
+# tests/test_trabajos.py
+
+import os
+import tempfile
+import threading
+import time
+
+from src.pipeline_ingesta import IngestaCancelada
+from src.trabajos import CANCELADO, COMPLETADO, EN_CURSO, PENDIENTE, GestorTrabajos
+
+
+def _esperar(gestor, trabajo_id, estados, segundos=5.0):
+    limite = time.monotonic() + segundos
+    while time.monotonic() < limite:
+        trabajo = gestor.obtener(trabajo_id)
+        if trabajo["estado"] in estados:
+            return trabajo
+        time.sleep(0.01)
+    raise AssertionError(f"{trabajo_id} sigue en {gestor.obtener(trabajo_id)['estado']}")
+
+
+def test_cola_en_orden_con_progreso():
+    ejecutados = []
+
+    def manejador(parametros, progreso):
+        ejecutados.append(parametros["n"])
+        progreso.etapa(f"doc{parametros['n']}.txt", "subido")
+        return parametros["n"] * 10
+
+    with tempfile.TemporaryDirectory() as carpeta:
+        gestor = GestorTrabajos({"prueba": manejador}, os.path.join(carpeta, "t.db"))
+        gestor.iniciar()
+        ids = [gestor.crear("prueba", {"n": n})["id"] for n in range(3)]
+        trabajos = [_esperar(gestor, i, (COMPLETADO,)) for i in ids]
+        gestor.detener()
+
+        assert ejecutados == [0, 1, 2]
+        assert [t["chunks_ingresados"] for t in trabajos] == [0, 10, 20]
+        assert trabajos[1]["progreso"]["archivos"] == {"doc1.txt": "subido"}
+
+
+def test_cancelar_pendiente_y_en_curso():
+    empezado = threading.Event()
+
+    def manejador(parametros, progreso):
+        empezado.set()
+        while not progreso.cancelado():
+            time.sleep(0.01)
+        raise IngestaCancelada()
+
+    with tempfile.TemporaryDirectory() as carpeta:
+        gestor = GestorTrabajos({"prueba": manejador}, os.path.join(carpeta, "t.db"))
+        gestor.iniciar()
+        en_curso = gestor.crear("prueba")["id"]
+        pendiente = gestor.crear("prueba")["id"]
+        assert empezado.wait(5)
+
+        # El pendiente se cancela al momento y el trabajador ya no lo ejecuta
+        assert gestor.cancelar(pendiente)["estado"] == CANCELADO
+        assert gestor.obtener(en_curso)["estado"] == EN_CURSO
+        gestor.cancelar(en_curso)
+        assert _esperar(gestor, en_curso, (CANCELADO,))["estado"] == CANCELADO
+        gestor.detener()
+
+        assert gestor.obtener(pendiente)["iniciado_en"] is None
+        # Cancelar uno ya terminado no lo cambia
+        assert gestor.cancelar(en_curso)["estado"] == CANCELADO
+        assert gestor.cancelar("no-existe") is None
+
+
+def test_reanuda_pendientes_tras_reinicio():
+    with tempfile.TemporaryDirectory() as carpeta:
+        ruta = os.path.join(carpeta, "t.db")
+        # Sin iniciar: los trabajos quedan pendientes, como si la app se cayera
+        anterior = GestorTrabajos({"prueba": lambda p, progreso: 1}, ruta)
+        pendiente = anterior.crear("prueba")["id"]
+        cancelado = anterior.crear("prueba")["id"]
+        anterior._actualizar(cancelado, estado=EN_CURSO, cancelar=1)
+
+        gestor = GestorTrabajos({"prueba": lambda p, progreso: 7}, ruta)
+        assert gestor.obtener(pendiente)["estado"] == PENDIENTE
+        gestor.iniciar()
+        assert _esperar(gestor, pendiente, (COMPLETADO,))["chunks_ingresados"] == 7
+        gestor.detener()
+        assert gestor.obtener(cancelado)["estado"] == CANCELADO
+
+
+def test_purga_trabajos_antiguos():
+    with tempfile.TemporaryDirectory() as carpeta:
+        gestor = GestorTrabajos(
+            {"prueba": lambda p, progreso: 0}, os.path.join(carpeta, "t.db"), retencion_dias=1
+        )
+        antiguo = gestor.crear("prueba")["id"]
+        reciente = gestor.crear("prueba")["id"]
+        for trabajo_id in (antiguo, reciente):
+            gestor._registrar_etapa(trabajo_id, "a.txt", "subido")
+        gestor._actualizar(antiguo, estado=COMPLETADO, terminado_en="2000-01-01T00:00:00")
+        gestor._actualizar(reciente, estado=COMPLETADO, terminado_en="2999-01-01T00:00:00")
+
+        assert gestor.purgar() == 1
+        assert gestor.obtener(antiguo) is None
+        assert gestor.obtener(reciente)["progreso"]["archivos"] == {"a.txt": "subido"}
+        restantes = gestor._conn.execute("SELECT trabajo_id FROM trabajo_archivos").fetchall()
+        assert [r["trabajo_id"] for r in restantes] == [reciente]
+
+
+def main():
+    test_cola_en_orden_con_progreso()
+    test_cancelar_pendiente_y_en_curso()
+    test_reanuda_pendientes_tras_reinicio()
+    test_purga_trabajos_antiguos()
+    print("OK")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,379 @@
+"""
+trabajos.py
+
+Cola de trabajos de ingesta en segundo plano.
+
+- Los endpoints crean un trabajo y devuelven su id al momento; un hilo
+  trabajador los ejecuta de uno en uno (la ingesta ya paraleliza por dentro).
+- El estado y el progreso por archivo y etapa se guardan en SQLite, así que
+  un reinicio no pierde los trabajos: los pendientes o a medias se vuelven
+  a encolar al arrancar (la ingesta es incremental, repetirla es barato).
+- Un trabajo pendiente o en curso se puede cancelar.
+- Los trabajos terminados hace más de TRABAJOS_RETENCION_DIAS se borran
+  (con su progreso por archivo) al arrancar y tras cada trabajo.
+"""
+
+import json
+import os
+import queue
+import sqlite3
+import threading
+import traceback
+import uuid
+from datetime import datetime, timedelta
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+from src.pipeline_ingesta import ETAPAS, IngestaCancelada, ProgresoIngesta
+
+RUTA_DB_DEFECTO = "data/.trabajos.sqlite3"
+
+# Estados de un trabajo
+PENDIENTE = "pendiente"
+EN_CURSO = "en_curso"
+COMPLETADO = "completado"
+FALLIDO = "fallido"
+CANCELADO = "cancelado"
+
+ESTADOS_FINALES = (COMPLETADO, FALLIDO, CANCELADO)
+ESTADOS_ACTIVOS = (PENDIENTE, EN_CURSO)
+
+# Un manejador recibe los parámetros del trabajo y el objeto de progreso,
+# y devuelve el número de chunks ingresados (borrados, en los de borrado).
+Manejador = Callable[[Dict[str, Any], ProgresoIngesta], int]
+
+_ESQUEMA = """
+CREATE TABLE IF NOT EXISTS trabajos (
+    id TEXT PRIMARY KEY,
+    tipo TEXT NOT NULL,
+    parametros TEXT NOT NULL,
+    estado TEXT NOT NULL,
+    creado_en TEXT NOT NULL,
+    iniciado_en TEXT,
+    terminado_en TEXT,
+    chunks_ingresados INTEGER,
+    error TEXT,
+    cancelar INTEGER NOT NULL DEFAULT 0
+);
+CREATE TABLE IF NOT EXISTS trabajo_archivos (
+    trabajo_id TEXT NOT NULL,
+    ruta TEXT NOT NULL,
+    etapa TEXT NOT NULL,
+    PRIMARY KEY (trabajo_id, ruta)
+);
+"""
+
+
+def _ahora() -> str:
+    return datetime.now().isoformat(timespec="seconds")
+
+
+class _ProgresoTrabajo(ProgresoIngesta):
+    def __init__(self, gestor: "GestorTrabajos", trabajo_id: str) -> None:
+        self._gestor = gestor
+        self._trabajo_id = trabajo_id
+
+    def etapa(self, ruta: str, etapa: str) -> None:
+        self._gestor._registrar_etapa(self._trabajo_id, ruta, etapa)
+
+    def cancelado(self) -> bool:
+        return self._gestor._cancelacion_pedida(self._trabajo_id)
+
+
+class GestorTrabajos:
+    def __init__(
+        self,
+        manejadores: Dict[str, Manejador],
+        ruta_db: Optional[str] = None,
+        retencion_dias: Optional[int] = None,
+    ) -> None:
+        self.manejadores = manejadores
+        self.ruta_db = ruta_db or os.getenv("TRABAJOS_DB", RUTA_DB_DEFECTO)
+        # Días que se conservan los trabajos terminados (0 = siempre)
+        self.retencion_dias = (
+            retencion_dias
+            if retencion_dias is not None
+            else int(os.getenv("TRABAJOS_RETENCION_DIAS", "30"))
+        )
+
+        carpeta = os.path.dirname(self.ruta_db)
+        if carpeta:
+            os.makedirs(carpeta, exist_ok=True)
+
+        self._conn = sqlite3.connect(self.ruta_db, check_same_thread=False)
+        self._conn.row_factory = sqlite3.Row
+        self._lock = threading.Lock()
+        with self._lock, self._conn:
+            self._conn.executescript(_ESQUEMA)
+
+        self._cola: "queue.Queue[Optional[str]]" = queue.Queue()
+        self._cancelados: set = set()
+        self._hilo: Optional[threading.Thread] = None
+
+    # ---------------------------------------------------------
+    #  CICLO DE VIDA
+    # ---------------------------------------------------------
+    def iniciar(self) -> None:
+        """
+        Arranca el hilo trabajador y vuelve a encolar los trabajos que
+        quedaron pendientes o a medias en la ejecución anterior.
+        """
+        if self._hilo is not None:
+            return
+
+        self.purgar()
+        with self._lock, self._conn:
+            filas = self._conn.execute(
+                "SELECT id, cancelar FROM trabajos WHERE estado IN (?, ?) "
+                "ORDER BY creado_en, rowid",
+                (PENDIENTE, EN_CURSO),
+            ).fetchall()
+
+        for fila in filas:
+            if fila["cancelar"]:
+                self._finalizar(fila["id"], CANCELADO)
+                continue
+            self._actualizar(fila["id"], estado=PENDIENTE)
+            self._cola.put(fila["id"])
+
+        if filas:
+            print(f"[TRABAJOS] Reanudando {len(filas)} trabajos pendientes.")
+
+        self._hilo = threading.Thread(target=self._trabajador, daemon=True)
+        self._hilo.start()
+
+    def detener(self) -> None:
+        """
+        Detiene el hilo trabajador cuando termine el trabajo en curso.
+        """
+        if self._hilo is None:
+            return
+        self._cola.put(None)
+        self._hilo.join()
+        self._hilo = None
+
+    # ---------------------------------------------------------
+    #  API
+    # ---------------------------------------------------------
+    def crear(self, tipo: str, parametros: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
+        """
+        Registra un trabajo nuevo y lo encola. Devuelve su estado inicial.
+        """
+        if tipo not in self.manejadores:
+            raise ValueError(f"Tipo de trabajo desconocido: {tipo}")
+
+        trabajo_id = uuid.uuid4().hex
+        with self._lock, self._conn:
+            self._conn.execute(
+                "INSERT INTO trabajos (id, tipo, parametros, estado, creado_en) "
+                "VALUES (?, ?, ?, ?, ?)",
+                (trabajo_id, tipo, json.dumps(parametros or {}), PENDIENTE, _ahora()),
+            )
+        self._cola.put(trabajo_id)
+        print(f"[TRABAJOS] Trabajo {trabajo_id} ({tipo}) encolado.")
+        return self.obtener(trabajo_id)  # type: ignore[return-value]
+
+    def obtener(self, trabajo_id: str) -> Optional[Dict[str, Any]]:
+        """
+        Estado y progreso de un trabajo (None si no existe).
+        """
+        with self._lock:
+            fila = self._conn.execute(
+                "SELECT * FROM trabajos WHERE id = ?", (trabajo_id,)
+            ).fetchone()
+            if fila is None:
+                return None
+            archivos = self._conn.execute(
+                "SELECT ruta, etapa FROM trabajo_archivos WHERE trabajo_id = ?",
+                (trabajo_id,),
+            ).fetchall()
+        return self._a_dict(fila, {a["ruta"]: a["etapa"] for a in archivos})
+
+    def listar(self, limite: int = 50) -> List[Dict[str, Any]]:
+        """
+        Últimos trabajos, del más reciente al más antiguo (sin detalle por archivo).
+        """
+        with self._lock:
+            filas = self._conn.execute(
+                "SELECT * FROM trabajos ORDER BY creado_en DESC, rowid DESC LIMIT ?", (limite,)
+            ).fetchall()
+            conteos = {
+                (c["trabajo_id"], c["etapa"]): c["n"]
+                for c in self._conn.execute(
+                    "SELECT trabajo_id, etapa, COUNT(*) AS n FROM trabajo_archivos "
+                    "GROUP BY trabajo_id, etapa"
+                ).fetchall()
+            }
+
+        trabajos = []
+        for fila in filas:
+            por_etapa_exacta = {e: conteos.get((fila["id"], e), 0) for e in ETAPAS}
+            trabajo = self._a_dict(fila, None)
+            trabajo["progreso"] = {"por_etapa": self._acumular(por_etapa_exacta)}
+            trabajos.append(trabajo)
+        return trabajos
+
+    def cancelar(self, trabajo_id: str) -> Optional[Dict[str, Any]]:
+        """
+        Pide cancelar un trabajo. Si aún no empezó, se cancela al momento;
+        si está en curso, la ingesta se detiene en el siguiente elemento.
+        Devuelve el estado del trabajo (None si no existe).
+        """
+        # Una sola sentencia: el trabajador no puede terminarlo ni empezarlo
+        # entre la comprobación del estado y la marca de cancelación
+        with self._lock, self._conn:
+            cambiadas = self._conn.execute(
+                "UPDATE trabajos SET cancelar = 1, "
+                "terminado_en = CASE WHEN estado = ? THEN ? ELSE terminado_en END, "
+                "estado = CASE WHEN estado = ? THEN ? ELSE estado END "
+                "WHERE id = ? AND estado IN (?, ?)",
+                (PENDIENTE, _ahora(), PENDIENTE, CANCELADO, trabajo_id, *ESTADOS_ACTIVOS),
+            ).rowcount
+
+        if cambiadas:
+            self._cancelados.add(trabajo_id)
+            print(f"[TRABAJOS] Cancelación pedida para {trabajo_id}.")
+        return self.obtener(trabajo_id)
+
+    def purgar(self) -> int:
+        """
+        Borra los trabajos terminados hace más de retencion_dias, con su
+        progreso por archivo. Devuelve cuántos trabajos se borraron.
+        """
+        if self.retencion_dias <= 0:
+            return 0
+        limite = (datetime.now() - timedelta(days=self.retencion_dias)).isoformat(
+            timespec="seconds"
+        )
+        finales = ",".join("?" * len(ESTADOS_FINALES))
+        with self._lock, self._conn:
+            borrados = self._conn.execute(
+                f"DELETE FROM trabajos WHERE estado IN ({finales}) AND terminado_en < ?",
+                (*ESTADOS_FINALES, limite),
+            ).rowcount
+            # También los huérfanos que dejaran versiones anteriores
+            self._conn.execute(
+                "DELETE FROM trabajo_archivos "
+                "WHERE trabajo_id NOT IN (SELECT id FROM trabajos)"
+            )
+        if borrados:
+            print(f"[TRABAJOS] {borrados} trabajos antiguos borrados.")
+        return borrados
+
+    # ---------------------------------------------------------
+    #  TRABAJADOR
+    # ---------------------------------------------------------
+    def _trabajador(self) -> None:
+        while True:
+            trabajo_id = self._cola.get()
+            if trabajo_id is None:
+                return
+            try:
+                self._ejecutar(trabajo_id)
+                self.purgar()
+            except Exception:  # el hilo no debe morir por un trabajo
+                traceback.print_exc()
+
+    def _ejecutar(self, trabajo_id: str) -> None:
+        trabajo = self.obtener(trabajo_id)
+        if trabajo is None:
+            return
+        # Si se canceló mientras estaba en la cola, ya no está pendiente
+        if not self._actualizar(
+            trabajo_id, estados=(PENDIENTE,), estado=EN_CURSO, iniciado_en=_ahora()
+        ):
+            return
+
+        print(f"[TRABAJOS] Ejecutando trabajo {trabajo_id} ({trabajo['tipo']})...")
+        manejador = self.manejadores[trabajo["tipo"]]
+
+        try:
+            chunks = manejador(trabajo["parametros"], _ProgresoTrabajo(self, trabajo_id))
+        except IngestaCancelada:
+            self._finalizar(trabajo_id, CANCELADO)
+        except Exception as e:
+            traceback.print_exc()
+            self._finalizar(trabajo_id, FALLIDO, error=str(e) or type(e).__name__)
+        else:
+            self._finalizar(trabajo_id, COMPLETADO, chunks_ingresados=chunks)
+        finally:
+            self._cancelados.discard(trabajo_id)
+
+    # ---------------------------------------------------------
+    #  PERSISTENCIA
+    # ---------------------------------------------------------
+    def _registrar_etapa(self, trabajo_id: str, ruta: str, etapa: str) -> None:
+        with self._lock, self._conn:
+            self._conn.execute(
+                "INSERT INTO trabajo_archivos (trabajo_id, ruta, etapa) VALUES (?, ?, ?) "
+                "ON CONFLICT (trabajo_id, ruta) DO UPDATE SET etapa = excluded.etapa",
+                (trabajo_id, ruta, etapa),
+            )
+
+    def _cancelacion_pedida(self, trabajo_id: str) -> bool:
+        return trabajo_id in self._cancelados
+
+    def _actualizar(
+        self,
+        trabajo_id: str,
+        estados: Optional[Tuple[str, ...]] = None,
+        **campos: Any,
+    ) -> bool:
+        """
+        Actualiza los campos del trabajo; con `estados`, solo si está en uno
+        de ellos. Devuelve si se actualizó.
+        """
+        asignaciones = ", ".join(f"{c} = ?" for c in campos)
+        condicion = "id = ?"
+        parametros: Tuple[Any, ...] = (*campos.values(), trabajo_id)
+        if estados:
+            condicion += f" AND estado IN ({','.join('?' * len(estados))})"
+            parametros += tuple(estados)
+        with self._lock, self._conn:
+            return self._conn.execute(
+                f"UPDATE trabajos SET {asignaciones} WHERE {condicion}", parametros
+            ).rowcount > 0
+
+    def _finalizar(self, trabajo_id: str, estado: str, **campos: Any) -> None:
+        # Nunca se sobrescribe un estado final (p. ej. una cancelación ya aplicada)
+        if self._actualizar(
+            trabajo_id, estados=ESTADOS_ACTIVOS, estado=estado, terminado_en=_ahora(), **campos
+        ):
+            print(f"[TRABAJOS] Trabajo {trabajo_id}: {estado}.")
+
+    @staticmethod
+    def _acumular(por_etapa_exacta: Dict[str, int]) -> Dict[str, int]:
+        """
+        Pasa de "archivos cuya última etapa es X" a "archivos que llegaron a X".
+        """
+        acumulado: Dict[str, int] = {}
+        total = 0
+        for etapa in reversed(ETAPAS):
+            total += por_etapa_exacta.get(etapa, 0)
+            acumulado[etapa] = total
+        return {e: acumulado[e] for e in ETAPAS}
+
+    def _a_dict(
+        self,
+        fila: sqlite3.Row,
+        archivos: Optional[Dict[str, str]],
+    ) -> Dict[str, Any]:
+        trabajo: Dict[str, Any] = {
+            "id": fila["id"],
+            "tipo": fila["tipo"],
+            "parametros": json.loads(fila["parametros"]),
+            "estado": fila["estado"],
+            "creado_en": fila["creado_en"],
+            "iniciado_en": fila["iniciado_en"],
+            "terminado_en": fila["terminado_en"],
+            "chunks_ingresados": fila["chunks_ingresados"],
+            "error": fila["error"],
+        }
+        if archivos is not None:
+            por_etapa_exacta = {e: 0 for e in ETAPAS}
+            for etapa in archivos.values():
+                por_etapa_exacta[etapa] = por_etapa_exacta.get(etapa, 0) + 1
+            trabajo["progreso"] = {
+                "archivos": archivos,
+                "por_etapa": self._acumular(por_etapa_exacta),
+            }
+        return trabajo
@@ -0,0 +1,136 @@
+"""
+vigilancia.py
+
+Vigilancia de la carpeta de documentos (BASE_DOCS_DIR) para indexar de
+forma continua, sin barridos completos con /ingestar.
+
+- watchfiles agrupa las ráfagas de cambios (copiar un PDF grande genera
+  muchos eventos): se espera a que la carpeta lleve un rato quieta y se
+  entrega un único lote con las rutas creadas, modificadas o borradas.
+- Cada lote se pasa a una función: en la app, encola un trabajo "cambios"
+  (ver src/trabajos.py); en la línea de comandos, llama directamente a
+  AgenteExtraccion.sincronizar_archivos.
+
+Uso desde la línea de comandos:
+    python -m src.vigilancia --carpeta data/ejemplos
+
+En la app se activa con VIGILANCIA_ACTIVA=1.
+"""
+
+import argparse
+import os
+import threading
+import traceback
+from dataclasses import dataclass
+from typing import Any, Callable, List, Optional
+
+from watchfiles import Change, watch
+
+from src.agentes.agente_extraccion import EXTENSIONES_SOPORTADAS, AgenteExtraccion
+
+
+@dataclass
+class VigilanciaConfig:
+    # Vigilar BASE_DOCS_DIR al arrancar la app (1/0)
+    activa: bool = os.getenv("VIGILANCIA_ACTIVA", "0") == "1"
+    # Silencio (ms) tras el último cambio antes de entregar el lote
+    espera_ms: int = int(os.getenv("VIGILANCIA_ESPERA_MS", "500"))
+    # Máximo (ms) que se agrupan cambios de una ráfaga continua
+    debounce_ms: int = int(os.getenv("VIGILANCIA_DEBOUNCE_MS", "5000"))
+
+
+def _es_documento(cambio: Change, ruta: str) -> bool:
+    nombre = os.path.basename(ruta)
+    # Ocultos y temporales de editores (.~lock.*, ~$*.docx...)
+    if nombre.startswith((".", "~")):
+        return False
+    return os.path.splitext(nombre)[1].lower() in EXTENSIONES_SOPORTADAS
+
+
+class VigilanteDocumentos:
+    def __init__(
+        self,
+        carpeta: str,
+        al_cambiar: Callable[[List[str]], Any],
+        config: Optional[VigilanciaConfig] = None,
+    ) -> None:
+        """
+        `al_cambiar` recibe cada lote de rutas cambiadas, con el mismo formato
+        que usa la ingesta (carpeta + nombre, como source_path).
+        """
+        self.carpeta = carpeta
+        self.al_cambiar = al_cambiar
+        self.config = config or VigilanciaConfig()
+        self._parar = threading.Event()
+        self._hilo: Optional[threading.Thread] = None
+
+    # ---------------------------------------------------------
+    #  CICLO DE VIDA
+    # ---------------------------------------------------------
+    def iniciar(self) -> None:
+        """
+        Vigila la carpeta en un hilo en segundo plano.
+        """
+        if self._hilo is not None:
+            return
+        self._parar.clear()
+        self._hilo = threading.Thread(target=self.ejecutar, daemon=True)
+        self._hilo.start()
+
+    def detener(self) -> None:
+        if self._hilo is None:
+            return
+        self._parar.set()
+        self._hilo.join(timeout=10)
+        self._hilo = None
+
+    def ejecutar(self) -> None:
+        """
+        Bucle de vigilancia (bloquea hasta que se llame a detener()).
+        """
+        os.makedirs(self.carpeta, exist_ok=True)
+        print(f"[VIGILANCIA] Vigilando {self.carpeta}...")
+
+        for cambios in watch(
+            self.carpeta,
+            watch_filter=_es_documento,
+            debounce=self.config.debounce_ms,
+            step=self.config.espera_ms,
+            stop_event=self._parar,
+            recursive=False,
+            ignore_permission_denied=True,
+            raise_interrupt=False,
+        ):
+            # watchfiles da rutas absolutas; la ingesta identifica los archivos
+            # por carpeta + nombre (source_path), así que se reconstruye así
+            rutas = sorted({os.path.join(self.carpeta, os.path.basename(r)) for _, r in cambios})
+            print(f"[VIGILANCIA] Cambios detectados: {rutas}")
+            try:
+                self.al_cambiar(rutas)
+            except Exception:  # el vigilante no debe morir por un lote
+                traceback.print_exc()
+
+        print("[VIGILANCIA] Vigilancia detenida.")
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(
+        description="Indexa en continuo los documentos que se añaden, cambian o borran en la carpeta."
+    )
+    parser.add_argument("--carpeta", default="data/ejemplos", help="Carpeta a vigilar.")
+    parser.add_argument(
+        "--sin-barrido-inicial",
+        action="store_true",
+        help="No ingestar al arrancar los cambios hechos mientras no se vigilaba.",
+    )
+    args = parser.parse_args()
+
+    agente = AgenteExtraccion()
+    if not args.sin_barrido_inicial:
+        agente.ingestar_documentos(args.carpeta)
+
+    VigilanteDocumentos(args.carpeta, agente.sincronizar_archivos).ejecutar()
+
+
+if __name__ == "__main__":
+    main()
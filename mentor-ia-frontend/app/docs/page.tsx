@@ -148,8 +148,8 @@
 
 "use client";
 
-import { useEffect, useState } from "react";
-import { uploadDocument, getIndexedDocuments } from "@/lib/api";
+import { useEffect, useRef, useState } from "react";
+import { uploadDocument, getIndexedDocuments, waitForJob } from "@/lib/api";
 import type { DocumentoIndexadoInfo } from "@/lib/types";
 
 export default function DocsPage() {
@@ -159,6 +159,8 @@ export default function DocsPage() {
   const [loading, setLoading] = useState(false);
   const [message, setMessage] = useState<string | null>(null);
   const [error, setError] = useState<string | null>(null);
+  // Para dejar de consultar los trabajos de ingesta al salir de la página
+  const abortRef = useRef<AbortController | null>(null);
 
   async function cargarDocumentos() {
     try {
@@ -174,8 +176,30 @@ export default function DocsPage() {
 
   useEffect(() => {
     cargarDocumentos();
+    const controller = new AbortController();
+    abortRef.current = controller;
+    return () => controller.abort();
   }, []);
 
+  // La ingesta corre en segundo plano: avisamos cuando termina
+  async function seguirIngesta(nombre: string, trabajoId: string) {
+    const signal = abortRef.current?.signal;
+    try {
+      const trabajo = await waitForJob(trabajoId, { signal });
+      if (trabajo.estado === "completado") {
+        setMessage(
+          `Se indexó "${nombre}": ${trabajo.chunks_ingresados ?? 0} chunks ingresados.`,
+        );
+        await cargarDocumentos();
+      } else {
+        setError(`La ingesta de "${nombre}" terminó en estado "${trabajo.estado}".`);
+      }
+    } catch (e: any) {
+      if (signal?.aborted) return;
+      setError(e?.message ?? "Error al consultar la ingesta");
+    }
+  }
+
   async function handleUpload() {
     if (!file || loading) return;
     setLoading(true);
@@ -184,11 +208,9 @@ export default function DocsPage() {
 
     try {
       const res = await uploadDocument(file);
-      setMessage(
-        `Se subió "${res.filename}" y se ingestaron ${res.chunks_ingresados} chunks.`,
-      );
+      setMessage(`Se subió "${res.filename}"; indexando en segundo plano...`);
       setFile(null);
-      await cargarDocumentos();
+      seguirIngesta(res.filename, res.trabajo_id);
     } catch (e: any) {
       setError(e?.message ?? "Error al subir el PDF");
     } finally {
@@ -243,7 +265,7 @@ export default function DocsPage() {
               disabled={!file || loading}
               className="rounded-full bg-indigo-500 px-5 py-1.5 text-xs font-medium text-white transition hover:bg-indigo-400 disabled:bg-neutral-800 disabled:text-neutral-500"
             >
-              {loading ? "Subiendo e indexando..." : "Subir e indexar"}
+              {loading ? "Subiendo..." : "Subir e indexar"}
             </button>
           </div>
           <p className="text-xs text-neutral-500">
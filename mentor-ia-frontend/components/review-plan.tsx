@@ -1,9 +1,9 @@
 "use client"
 
 import type React from "react"
-import { useState, useRef } from "react"
+import { useState, useRef, useEffect } from "react"
 import { CalendarIcon, BookOpen, Clock, CheckCircle2, ArrowRight, AlertCircle, Upload } from "lucide-react"
-import { createPlan, uploadDocument } from "@/lib/api"
+import { createPlan, uploadDocument, waitForJob } from "@/lib/api"
 import { Button } from "@/components/ui/button"
 import { Input } from "@/components/ui/input"
 import { Card, CardContent, CardHeader, CardTitle, CardDescription } from "@/components/ui/card"
@@ -25,7 +25,16 @@ export function ReviewPlan() {
   const [error, setError] = useState<string | null>(null)
   const [plan, setPlan] = useState<PlanRepasoResponse | null>(null)
   const [uploadedFile, setUploadedFile] = useState<string | null>(null)
+  const [indexing, setIndexing] = useState(false)
   const fileInputRef = useRef<HTMLInputElement>(null)
+  // Stops polling the ingestion job when the component unmounts
+  const abortRef = useRef<AbortController | null>(null)
+
+  useEffect(() => {
+    const controller = new AbortController()
+    abortRef.current = controller
+    return () => controller.abort()
+  }, [])
 
   // Helper function to render description
   const renderDescription = (desc: string | import("@/lib/types").SesionDescripcionBlock[]) => {
@@ -55,9 +64,11 @@ export function ReviewPlan() {
 
     try {
       const file = files[0]
-      await uploadDocument(file)
+      const { trabajo_id } = await uploadDocument(file)
       setUploadedFile(file.name)
       setTopic(`Plan basado en: ${file.name}`)
+      // Ingestion runs in the background; the plan waits until it is indexed
+      trackIngestion(file.name, trabajo_id)
     } catch (err) {
       setError(err instanceof Error ? err.message : "Error al subir el archivo")
     } finally {
@@ -65,6 +76,23 @@ export function ReviewPlan() {
     }
   }
 
+  const trackIngestion = async (fileName: string, trabajoId: string) => {
+    const signal = abortRef.current?.signal
+    setIndexing(true)
+    try {
+      const trabajo = await waitForJob(trabajoId, { signal })
+      if (trabajo.estado !== "completado") {
+        setUploadedFile(null)
+        setError(`La ingesta de ${fileName} terminó en estado "${trabajo.estado}"`)
+      }
+    } catch (err) {
+      if (signal?.aborted) return
+      setError(err instanceof Error ? err.message : "Error al consultar la ingesta")
+    } finally {
+      if (!signal?.aborted) setIndexing(false)
+    }
+  }
+
   const handleGenerate = async (e: React.FormEvent) => {
     e.preventDefault()
     if (!topic.trim() && !uploadedFile) return
@@ -154,9 +182,9 @@ export function ReviewPlan() {
                       variant="outline"
                       className="w-full border-dashed bg-transparent"
                       onClick={() => fileInputRef.current?.click()}
-                      disabled={uploading}
+                      disabled={uploading || indexing}
                     >
-                      {uploading ? "Subiendo..." : "Seleccionar PDF/TXT"}
+                      {uploading ? "Subiendo..." : indexing ? "Indexando..." : "Seleccionar PDF/TXT"}
                     </Button>
                   </div>
                   {uploadedFile && (
@@ -196,7 +224,7 @@ export function ReviewPlan() {
               <Button
                 type="submit"
                 className="w-full"
-                disabled={loading || (mode === "topic" && !topic.trim()) || (mode === "file" && !uploadedFile)}
+                disabled={loading || (mode === "topic" && !topic.trim()) || (mode === "file" && (!uploadedFile || indexing))}
               >
                 {loading ? "Generando Plan..." : "Generar Plan de Repaso"}
                 {!loading && <ArrowRight className="ml-2 h-4 w-4" />}
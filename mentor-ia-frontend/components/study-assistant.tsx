@@ -4,7 +4,7 @@ import type React from "react"
 
 import { useState, useRef, useEffect } from "react"
 import { Send, FileText, ImageIcon, Sparkles, BookOpen, AlertCircle, Upload, Trash2, FileImage, Eye, Download } from "lucide-react"
-import { askQuery, uploadDocument, listDocs, getIndexedDocuments, ocrImage } from "@/lib/api"
+import { askQuery, uploadDocument, waitForJob, listDocs, getIndexedDocuments, ocrImage } from "@/lib/api"
 import type { QueryResponse, DocumentoInfo, DocumentosIndexadosResponse, OCRResponse } from "@/lib/types"
 import { Button } from "@/components/ui/button"
 import { Textarea } from "@/components/ui/textarea"
@@ -42,6 +42,14 @@ export function StudyAssistant() {
   const scrollAreaRef = useRef<HTMLDivElement>(null)
   const fileInputRef = useRef<HTMLInputElement>(null)
   const ocrFileInputRef = useRef<HTMLInputElement>(null)
+  // Stops polling ingestion jobs when the component unmounts
+  const abortRef = useRef<AbortController | null>(null)
+
+  useEffect(() => {
+    const controller = new AbortController()
+    abortRef.current = controller
+    return () => controller.abort()
+  }, [])
 
   // Auto-scroll to bottom when messages change
   useEffect(() => {
@@ -119,7 +127,7 @@ export function StudyAssistant() {
 
     try {
       const file = files[0]
-      await uploadDocument(file)
+      const { trabajo_id } = await uploadDocument(file)
       setUploadedFiles((prev) => [...prev, file.name])
 
       // Add a system message about the upload
@@ -127,10 +135,12 @@ export function StudyAssistant() {
         ...prev,
         {
           role: "assistant",
-          content: `He procesado correctamente el archivo: ${file.name}. Ahora puedes hacerme preguntas sobre su contenido.`,
+          content: `He recibido el archivo: ${file.name}. Lo estoy indexando; te aviso cuando termine.`,
           timestamp: new Date(),
         },
       ])
+      // Ingestion runs in the background: don't block the upload button on it
+      trackIngestion(file.name, trabajo_id)
     } catch (err) {
       setError(err instanceof Error ? err.message : "Error al subir el archivo")
     } finally {
@@ -139,6 +149,29 @@ export function StudyAssistant() {
     }
   }
 
+  const trackIngestion = async (fileName: string, trabajoId: string) => {
+    const signal = abortRef.current?.signal
+    try {
+      const trabajo = await waitForJob(trabajoId, { signal })
+      if (trabajo.estado !== "completado") {
+        setError(`La ingesta de ${fileName} terminó en estado "${trabajo.estado}"`)
+        return
+      }
+      setMessages((prev) => [
+        ...prev,
+        {
+          role: "assistant",
+          content: `He procesado correctamente el archivo: ${fileName}. Ahora puedes hacerme preguntas sobre su contenido.`,
+          timestamp: new Date(),
+        },
+      ])
+      setIndexedDocuments(await getIndexedDocuments())
+    } catch (err) {
+      if (signal?.aborted) return
+      setError(err instanceof Error ? err.message : "Error al consultar la ingesta")
+    }
+  }
+
   const clearHistory = () => {
     setMessages([])
     setError(null)
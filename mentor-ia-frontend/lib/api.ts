@@ -112,6 +112,8 @@ import type {
   UploadPdfResponse,
   DocumentosIndexadosResponse,
   PlanRepasoResponse,
+  TrabajoIngesta,
+  EliminarDocumentoResponse,
 } from "@/lib/types";
 
 const BACKEND_URL =
@@ -194,6 +196,8 @@ export async function listDocs(): Promise<DocumentoInfo[]> {
 }
 
 // -------- /upload-document --------
+// Devuelve en cuanto el archivo está subido: la ingesta sigue en segundo
+// plano y su estado se consulta con getJob / waitForJob(trabajo_id)
 export async function uploadDocument(file: File): Promise<UploadPdfResponse> {
   const formData = new FormData();
   formData.append("file", file);
@@ -212,6 +216,97 @@ export async function uploadDocument(file: File): Promise<UploadPdfResponse> {
   return res.json();
 }
 
+// -------- /trabajos/{id} --------
+export async function getJob(
+  trabajoId: string,
+  signal?: AbortSignal,
+): Promise<TrabajoIngesta> {
+  const res = await fetch(`${BACKEND_URL}/trabajos/${trabajoId}`, {
+    method: "GET",
+    signal,
+  });
+
+  if (!res.ok) {
+    const text = await res.text().catch(() => "");
+    console.error("Error en /trabajos:", res.status, text);
+    throw new Error("Error al consultar el trabajo de ingesta");
+  }
+
+  return res.json();
+}
+
+export interface OpcionesEsperaTrabajo {
+  intervaloMs?: number;
+  // Tiempo máximo de espera; al superarlo se lanza un error (el trabajo sigue)
+  maxEsperaMs?: number;
+  // Para dejar de consultar (p. ej. al desmontar el componente)
+  signal?: AbortSignal;
+}
+
+function esperar(ms: number, signal?: AbortSignal): Promise<void> {
+  return new Promise((resolve, reject) => {
+    const alAbortar = () => {
+      clearTimeout(temporizador);
+      reject(signal?.reason);
+    };
+    const temporizador = setTimeout(() => {
+      signal?.removeEventListener("abort", alAbortar);
+      resolve();
+    }, ms);
+    signal?.addEventListener("abort", alAbortar, { once: true });
+  });
+}
+
+// Consulta el trabajo hasta que termina (completado, fallido o cancelado)
+export async function waitForJob(
+  trabajoId: string,
+  { intervaloMs = 1500, maxEsperaMs = 10 * 60 * 1000, signal }: OpcionesEsperaTrabajo = {},
+): Promise<TrabajoIngesta> {
+  const limite = Date.now() + maxEsperaMs;
+  while (true) {
+    signal?.throwIfAborted();
+    const trabajo = await getJob(trabajoId, signal);
+    if (["completado", "fallido", "cancelado"].includes(trabajo.estado)) {
+      return trabajo;
+    }
+    if (Date.now() + intervaloMs > limite) {
+      throw new Error(
+        `El trabajo ${trabajoId} sigue "${trabajo.estado}" tras ${Math.round(maxEsperaMs / 1000)} s`,
+      );
+    }
+    await esperar(intervaloMs, signal);
+  }
+}
+
+export async function cancelJob(trabajoId: string): Promise<TrabajoIngesta> {
+  const res = await fetch(`${BACKEND_URL}/trabajos/${trabajoId}/cancelar`, {
+    method: "POST",
+  });
+
+  if (!res.ok) {
+    const text = await res.text().catch(() => "");
+    console.error("Error en /trabajos/cancelar:", res.status, text);
+    throw new Error("Error al cancelar el trabajo de ingesta");
+  }
+
+  return res.json();
+}
+
+// -------- DELETE /documentos/{nombre} --------
+export async function deleteDocument(nombre: string): Promise<EliminarDocumentoResponse> {
+  const res = await fetch(`${BACKEND_URL}/documentos/${encodeURIComponent(nombre)}`, {
+    method: "DELETE",
+  });
+
+  if (!res.ok) {
+    const text = await res.text().catch(() => "");
+    console.error("Error en DELETE /documentos:", res.status, text);
+    throw new Error("Error al eliminar el documento");
+  }
+
+  return res.json();
+}
+
 // -------- /documentos-indexados (opcional, si lo usas) --------
 export async function getIndexedDocuments(): Promise<DocumentosIndexadosResponse> {
   const res = await fetch(`${BACKEND_URL}/documentos-indexados`, {
@@ -103,15 +103,51 @@ export interface DocumentoInfo {
   tipo?: string;
 }
 
+// La ingesta corre en segundo plano (ver /trabajos/{trabajo_id})
 export interface UploadPdfResponse {
   filename: string;
-  chunks_ingresados: number;
+  trabajo_id: string;
+  estado: EstadoTrabajo;
+}
+
+// Trabajos de ingesta en segundo plano (/trabajos/{id})
+export type EstadoTrabajo =
+  | "pendiente"
+  | "en_curso"
+  | "completado"
+  | "fallido"
+  | "cancelado";
+
+export interface TrabajoIngesta {
+  id: string;
+  tipo: string;
+  estado: EstadoTrabajo;
+  creado_en: string;
+  iniciado_en: string | null;
+  terminado_en: string | null;
+  chunks_ingresados: number | null;
+  error: string | null;
+  progreso: {
+    archivos?: Record<string, string>;
+    por_etapa: Record<string, number>;
+  };
+}
+
+// DELETE /documentos/{nombre}
+// El borrado en Qdrant corre en segundo plano (ver /trabajos/{trabajo_id})
+export interface EliminarDocumentoResponse {
+  nombre: string;
+  archivo_eliminado: boolean;
+  trabajo_id: string;
+  estado: EstadoTrabajo;
 }
 
 // Documentos indexados en Qdrant
 export interface DocumentoIndexadoInfo extends DocumentoInfo {
   total_chunks?: number;
   chunks?: number;
+  // Chunks de otros documentos que también contienen este (duplicados fusionados)
+  chunks_fusionados?: number;
 }
 
 export interface DocumentosIndexadosResponse {